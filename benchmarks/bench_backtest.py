@@ -0,0 +1,99 @@
+"""Backtest throughput on synthetic 1-minute candles.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_backtest [pairs] [years] [trades_per_pair]
+
+Writes random-walk candles as ``.npy`` files to a temporary directory, then
+replays the trades under a stop-only rule and 1R/2R/3R targets with a
+one-day time exit.
+"""
+
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from core.backtest import CandleSet, ExitRule, run_backtest
+
+MINUTES_PER_YEAR = 365 * 24 * 60
+T0 = 1704067200  # 2024-01-01 00:00:00 UTC
+
+
+def write_candles(directory: str, pair: str, count: int, seed: int):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0008, count)))
+    open_ = np.concatenate([[100.0], close[:-1]])
+    wick = np.abs(rng.normal(0, 0.0005, count)) * close
+    data = np.column_stack(
+        [
+            T0 + 60 * np.arange(count),
+            open_,
+            np.maximum(open_, close) + wick,
+            np.minimum(open_, close) - wick,
+            close,
+            np.ones(count),
+        ]
+    )
+    np.save(f"{directory}/{pair}.npy", data)
+    return close
+
+
+def synthetic_trades(pair, close, count, rng, first_id):
+    trades = []
+    for i in range(count):
+        bar = rng.randrange(len(close) - 1)
+        entry = float(close[bar])
+        direction = rng.choice(["long", "short"])
+        distance = entry * rng.uniform(0.003, 0.02)
+        trades.append(
+            {
+                "id": first_id + i,
+                "date": time.strftime(
+                    "%Y-%m-%d %H:%M:%S", time.gmtime(T0 + 60 * bar + 30)
+                ),
+                "pair": pair,
+                "direction": direction,
+                "entry": entry,
+                "stop_loss": (
+                    entry - distance if direction == "long" else entry + distance
+                ),
+                "risk_pct": 1.0,
+                "account_size": 1000.0,
+            }
+        )
+    return trades
+
+
+def main():
+    pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    years = float(sys.argv[2]) if len(sys.argv) > 2 else 2
+    per_pair = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    count = int(MINUTES_PER_YEAR * years)
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as directory:
+        trades = []
+        for p in range(pairs):
+            pair = f"PAIR{p}USDT"
+            close = write_candles(directory, pair, count, seed=p)
+            trades += synthetic_trades(pair, close, per_pair, rng, len(trades) + 1)
+            del close
+
+        rules = [ExitRule(None, 1440)] + [ExitRule(r, 1440) for r in (1, 2, 3)]
+        started = time.perf_counter()
+        result = run_backtest(trades, CandleSet(directory), rules)
+        seconds = time.perf_counter() - started
+
+    print(
+        f"{pairs} pairs x {count:,} candles, {len(trades):,} trades x {len(rules)} rules"
+    )
+    print(f"  {seconds:.2f} s ({len(result.trade_id) / seconds:,.0f} results/s)")
+    for label, stats in result.summary().items():
+        print(f"  {label:<16} win {stats.win_rate:5.1f}%  avg R {stats.r_mean:+.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Bytes per trade held in memory: plain dicts vs ``storage.records.Trade``.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_memory [count]
+"""
+
+import json
+import random
+import sys
+import tracemalloc
+
+from storage.records import Trade
+
+
+def synthetic_trades(count: int) -> list[str]:
+    """JSON lines shaped like trades written by core.trades.open/close_trade."""
+    rng = random.Random(42)
+    pairs = ["BTCUSDT", "ETHUSDT", "SOLUSDT", "DOGEUSDT", "XRPUSDT"]
+    lines = []
+    for i in range(1, count + 1):
+        entry = rng.uniform(1, 60000)
+        stop = entry * rng.uniform(0.95, 0.99)
+        closed = rng.random() < 0.9
+        lines.append(
+            json.dumps(
+                {
+                    "id": i,
+                    "date": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+                    f" {rng.randint(0, 23):02d}:00:00",
+                    "pair": rng.choice(pairs),
+                    "account_size": 1000,
+                    "risk_pct": 2,
+                    "entry": entry,
+                    "stop_loss": stop,
+                    "direction": rng.choice(["long", "short"]),
+                    "risk_amount": 20.0,
+                    "quantity": 20.0 / (entry - stop),
+                    "order_value": 20.0 / (entry - stop) * entry,
+                    "required_leverage": 1.0,
+                    "leverage_note": "✅ No leverage required",
+                    "taker_fee": 0.55,
+                    "maker_fee": 0.2,
+                    "status": "closed" if closed else "open",
+                    "exit_price": entry * 1.01 if closed else None,
+                    "gross_pnl": 12.3 if closed else None,
+                    "fees_paid": 1.1 if closed else None,
+                    "net_pnl": 11.2 if closed else None,
+                    "notes": "tp hit" if closed else None,
+                }
+            )
+        )
+    return lines
+
+
+def measure(lines: list[str], build) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = [build(json.loads(line)) for line in lines]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(records) == len(lines)
+    return (after - before) / len(lines)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    lines = synthetic_trades(count)
+
+    as_dict = measure(lines, dict)
+    as_trade = measure(lines, Trade)
+
+    print(f"{count} trades")
+    print(f"  dict : {as_dict:8.0f} bytes/trade")
+    print(f"  Trade: {as_trade:8.0f} bytes/trade ({as_trade / as_dict:.0%} of dict)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Cold start: import cost of the app and time until the menu is interactive.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_startup [runs]
+
+Each run is a fresh interpreter. Import costs come from ``python -X
+importtime``; time to menu is the wall time from launching a headless app
+until its menu is mounted and accepting keys. Medians over ``runs``
+(default 5) are printed.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MENU_SCRIPT = """
+import asyncio
+import tui
+
+async def main():
+    app = tui.CryptoHelperApp()
+    async with app.run_test() as pilot:
+        await pilot.pause()
+        print("ready", flush=True)
+
+asyncio.run(main())
+"""
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    """``{module: (self_us, cumulative_us)}`` for one fresh ``import module``."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+        check=True,
+    )
+    times = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def imported_modules(module: str) -> set[str]:
+    """Every module a fresh interpreter imports for ``import module``."""
+    return set(import_times(module))
+
+
+def time_to_menu() -> float:
+    """Seconds from launching a headless app until its menu is interactive."""
+    started = time.perf_counter()
+    with subprocess.Popen(
+        [sys.executable, "-c", MENU_SCRIPT],
+        stdout=subprocess.PIPE,
+        text=True,
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    ) as child:
+        for line in child.stdout:
+            if line.strip() == "ready":
+                return time.perf_counter() - started
+    raise RuntimeError("the app exited before its menu was ready")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    for module in ("core.trades", "tui"):
+        samples = [import_times(module) for _ in range(runs)]
+        cumulative = statistics.median(s[module][1] for s in samples) / 1000
+        loaded = samples[0]
+        heavy = sorted(
+            {name.split(".")[0] for name in loaded} & {"rich", "textual", "numpy"}
+        )
+        print(
+            f"import {module:<12} {cumulative:8.1f} ms  {len(loaded):4d} modules"
+            f"  ({', '.join(heavy) or 'no UI/numpy packages'})"
+        )
+
+    menu = statistics.median(time_to_menu() for _ in range(runs))
+    print(f"time to menu        {menu * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Stop-loss trigger checks per tick: heap index vs scanning open trades.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_stops [open_trades] [ticks]
+
+Defaults to 10k open trades over 20 pairs and a million random-walk ticks.
+The scan is timed on the first 1% of the ticks and extrapolated.
+"""
+
+import random
+import sys
+import time
+
+from core.stops import StopEngine
+
+PAIRS = [f"PAIR{i}USDT" for i in range(20)]
+
+
+def synthetic_open_trades(count: int, rng: random.Random) -> list[dict]:
+    trades = []
+    for i in range(1, count + 1):
+        direction = rng.choice(["long", "short"])
+        distance = rng.uniform(0.02, 0.3)  # stops 2-30% from the start price
+        stop = 100 * (1 - distance if direction == "long" else 1 + distance)
+        trades.append(
+            {
+                "id": i,
+                "pair": rng.choice(PAIRS),
+                "direction": direction,
+                "stop_loss": stop,
+                "status": "open",
+            }
+        )
+    return trades
+
+
+def synthetic_ticks(count: int, rng: random.Random) -> list[tuple[str, float]]:
+    prices = dict.fromkeys(PAIRS, 100.0)
+    ticks = []
+    for _ in range(count):
+        pair = rng.choice(PAIRS)
+        prices[pair] *= 1 + rng.gauss(0, 0.001)
+        ticks.append((pair, prices[pair]))
+    return ticks
+
+
+def scan(trades: list[dict], ticks) -> int:
+    """Baseline: check every open trade of the pair on every tick."""
+    live = {t["id"]: t for t in trades}
+    hits = 0
+    for pair, price in ticks:
+        for t in list(live.values()):
+            if t["pair"] != pair:
+                continue
+            if (t["direction"] == "long" and price <= t["stop_loss"]) or (
+                t["direction"] == "short" and price >= t["stop_loss"]
+            ):
+                del live[t["id"]]
+                hits += 1
+    return hits
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    tick_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000
+    rng = random.Random(42)
+    trades = synthetic_open_trades(count, rng)
+    ticks = synthetic_ticks(tick_count, rng)
+
+    started = time.perf_counter()
+    engine = StopEngine(trades)
+    built = time.perf_counter() - started
+
+    started = time.perf_counter()
+    hits = 0
+    for pair, price in ticks:
+        hits += len(engine.on_tick(pair, price))
+    heap_seconds = time.perf_counter() - started
+
+    sample = ticks[: max(1, tick_count // 100)]
+    started = time.perf_counter()
+    scan(trades, sample)
+    scan_seconds = (time.perf_counter() - started) * tick_count / len(sample)
+
+    print(f"{count} open trades, {tick_count} ticks, {hits} stops hit")
+    print(f"  index build: {built * 1000:8.1f} ms")
+    print(
+        f"  heap       : {heap_seconds:8.2f} s ({tick_count / heap_seconds:,.0f} ticks/s)"
+    )
+    print(
+        f"  scan (est.): {scan_seconds:8.2f} s"
+        f" ({tick_count / scan_seconds:,.0f} ticks/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
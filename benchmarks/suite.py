@@ -0,0 +1,322 @@
+"""Scaling benchmarks for storage, the trade lifecycle and history rendering.
+
+Run from the repository root::
+
+    python -m benchmarks.suite [--sizes 1000 10000 100000 1000000]
+                               [--backend json] [--out bench_results.json]
+                               [--baseline benchmarks/baseline.json]
+                               [--threshold 0.25] [--update-baseline]
+                               [--no-compare]
+
+For each history size a synthetic trade log is written to a temporary
+directory (nothing touches ``trades.json`` or the network) and the suite
+measures:
+
+* ``load_s`` / ``load_peak_mb`` - cold ``load_trades`` time and peak memory
+* ``save_s`` / ``save_peak_mb`` - ``save_trades`` of the whole history
+* ``open_p50_ms`` ... ``delete_p95_ms`` - p50 and p95 latency per operation
+* ``summary_s`` - ``rebuild_stats`` + ``load_stats`` (view_history's summary)
+* ``view_history_s`` - the full console ``view_history`` (sizes up to
+  ``VIEW_HISTORY_MAX`` only; it prints every row)
+* ``filter_p50_ms`` / ``filter_p95_ms`` - history filter bar queries
+  (``FILTER_QUERIES``) answered from the repository indexes
+* ``first_paint_s`` - headless Textual time until ViewHistoryScreen has
+  mounted and painted its first frame
+
+Results go to ``--out`` as JSON. The run is compared against
+``--baseline`` (by default the committed ``benchmarks/baseline.json``) and
+fails (exit status 1) when a metric is more than ``--threshold`` (a
+fraction) slower or larger than the baseline; ``--update-baseline`` writes
+the run as the new baseline instead and ``--no-compare`` skips the check.
+Only the sizes and the backend the baseline has are compared.
+
+The committed baseline is the JSON backend at the default sizes on a
+single-core reference box. Baselines are machine specific: on another
+machine, record one with ``--update-baseline`` before comparing. One
+million trades is left out of the default sizes and the baseline: with the
+JSON backend every timed write rewrites the whole log, so that size takes
+tens of minutes and its ``save_trades`` peaks at several GB under
+tracemalloc. Pass it in ``--sizes`` to run it.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import storage
+from benchmarks.bench_memory import synthetic_trades
+from core import aggregates, report
+from core import trades as trade_ops
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+VIEW_HISTORY_MAX = 10_000
+DEFAULT_THRESHOLD = 0.25
+# What the history filter bar typically asks for while typing
+FILTER_QUERIES = (
+    {"pair": "SOLUSDT"},
+    {
+        "pair": "SOLUSDT",
+        "direction": "short",
+        "start": "2025-09-01",
+        "end": "2025-10-01",
+    },
+    {"status": "closed", "min_pnl": 0},
+    {"start": "2025-06-01"},
+    {"text": "tp"},
+    {"pair": "BTCUSDT", "status": "open", "text": "t"},
+)
+# Changes smaller than these are noise whatever the ratio
+MIN_DELTA = {"_s": 0.005, "_ms": 0.5, "_mb": 1.0}
+
+
+def operations_for(size: int) -> int:
+    """Lifecycle operations timed per size; every write rewrites big stores."""
+    return 50 if size <= 10_000 else 20 if size <= 100_000 else 5
+
+
+@contextlib.contextmanager
+def use_log(path: str):
+    """Point ``storage`` at ``path`` for the duration of the block."""
+    previous = storage.TRADE_LOG
+    storage.TRADE_LOG = path
+    try:
+        yield
+    finally:
+        storage.TRADE_LOG = previous
+
+
+def write_history(path: str, size: int):
+    with open(path, "w") as f:
+        f.write("[" + ",".join(synthetic_trades(size)) + "]")
+
+
+def measure(func, *args):
+    """Run ``func`` once; return ``(result, seconds, peak_mb)``."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = func(*args)
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak / 2**20
+
+
+def percentiles(samples: list[float]) -> tuple[float, float]:
+    """p50 and p95 of ``samples``."""
+    if len(samples) < 2:
+        return samples[0], samples[0]
+    cuts = statistics.quantiles(samples, n=20, method="inclusive")
+    return statistics.median(samples), cuts[18]
+
+
+def timed(func, *args) -> float:
+    started = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+def bench_storage(path: str) -> dict:
+    fresh = storage.TradeRepository(storage.STORES[backend()](path))
+    trades, load_s, load_mb = measure(fresh.load)
+    _, save_s, save_mb = measure(storage.save_trades, trades)
+    return {
+        "load_s": load_s,
+        "load_peak_mb": load_mb,
+        "save_s": save_s,
+        "save_peak_mb": save_mb,
+    }
+
+
+def bench_lifecycle(operations: int) -> dict:
+    opened, closed, deleted = [], [], []
+    ids = []
+    for i in range(operations):
+        started = time.perf_counter()
+        trade = trade_ops.open_trade("BTCUSDT", "long", 1000, 1, 60000 + i, 59000)
+        opened.append((time.perf_counter() - started) * 1000)
+        ids.append(trade["id"])
+    for trade_id in ids:
+        closed.append(timed(trade_ops.close_trade, trade_id, 61000.0, "bench"))
+    for trade_id in ids:
+        deleted.append(timed(trade_ops.delete_trade, trade_id))
+
+    result = {}
+    for name, samples in (("open", opened), ("close", closed), ("delete", deleted)):
+        p50, p95 = percentiles(samples)
+        result[f"{name}_p50_ms"] = p50
+        result[f"{name}_p95_ms"] = p95
+    return result
+
+
+def bench_history(size: int) -> dict:
+    started = time.perf_counter()
+    aggregates.rebuild_stats()
+    aggregates.load_stats()
+    result = {"summary_s": time.perf_counter() - started}
+    if size <= VIEW_HISTORY_MAX:
+        console = report.console
+        report.console = type(console)(file=io.StringIO(), width=120)
+        try:
+            started = time.perf_counter()
+            report.view_history()
+            result["view_history_s"] = time.perf_counter() - started
+        finally:
+            report.console = console
+    return result
+
+
+def bench_filter() -> dict:
+    storage.query_trade_ids(text="warm")  # the notes index is built on first use
+    samples = [
+        timed(functools.partial(storage.query_trade_ids, **query))
+        for _ in range(5)
+        for query in FILTER_QUERIES
+    ]
+    p50, p95 = percentiles(samples)
+    return {"filter_p50_ms": p50, "filter_p95_ms": p95}
+
+
+async def _first_paint() -> float:
+    from textual.app import App
+
+    from screens import ViewHistoryScreen
+
+    app = App()
+    async with app.run_test(size=(160, 50)) as pilot:
+        started = time.perf_counter()
+        await app.push_screen(ViewHistoryScreen())
+        await pilot.pause()
+        return time.perf_counter() - started
+
+
+def bench_first_paint() -> dict:
+    return {"first_paint_s": asyncio.run(_first_paint())}
+
+
+def backend() -> str:
+    return os.environ.get("TCH_STORAGE", "json")
+
+
+def run_size(size: int) -> dict:
+    with tempfile.TemporaryDirectory(prefix="tch-bench-") as tmp:
+        path = os.path.join(tmp, "trades.json")
+        write_history(path, size)
+        with use_log(path):
+            result = {}
+            if backend() != "json":
+                # Migrate the synthetic JSON log into the backend under test
+                loaded = storage.JsonStore(path).load()
+                os.remove(path)
+                storage.save_trades(loaded)
+            result.update(bench_storage(path))
+            result.update(bench_history(size))
+            result.update(bench_filter())
+            result.update(bench_first_paint())
+            result.update(bench_lifecycle(operations_for(size)))
+            storage._repositories.pop((backend(), path), None)
+        return result
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Describe every metric that regressed by more than ``threshold``."""
+    regressions = []
+    for size, metrics in results.items():
+        for name, value in metrics.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            floor = next((d for s, d in MIN_DELTA.items() if name.endswith(s)), 0)
+            if value > base * (1 + threshold) and value - base > floor:
+                regressions.append(
+                    f"{size} trades {name}: {value:.4g} vs baseline {base:.4g}"
+                    f" (+{value / base - 1:.0%})"
+                )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the scaling benchmarks.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--backend", choices=storage.STORES, default=None)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="allowed slowdown as a fraction of the baseline (default 0.25)",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="write this run to --baseline instead of comparing",
+    )
+    parser.add_argument(
+        "--no-compare", action="store_true", help="do not compare with a baseline"
+    )
+    args = parser.parse_args(argv)
+    if args.backend:
+        os.environ["TCH_STORAGE"] = args.backend
+
+    results = {}
+    for size in args.sizes:
+        print(f"{size:>9,} trades ...", flush=True)
+        results[str(size)] = metrics = run_size(size)
+        for name, value in metrics.items():
+            print(f"    {name:<16} {value:12.4f}")
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "backend": backend(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif not args.no_compare:
+        try:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f"No baseline at {args.baseline}; nothing compared")
+            return 0
+        if baseline["meta"]["backend"] != backend():
+            print(
+                f"The baseline is for the {baseline['meta']['backend']} backend;"
+                " nothing compared"
+            )
+            return 0
+        regressions = compare(results, baseline["results"], args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions over {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
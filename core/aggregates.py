@@ -0,0 +1,280 @@
+### aggregates.py
+### Running performance aggregates over closed trades, updated in O(1)
+
+import argparse
+import math
+from dataclasses import asdict, dataclass, field
+
+import storage
+
+STATS_META = "stats"
+
+
+@dataclass
+class RunningStats:
+    """Aggregates over closed trades that can be updated one trade at a time.
+
+    R multiples (net_pnl / risk_amount) feed a Welford mean/variance, and
+    ``loss_streaks`` counts the runs of consecutive losses by length, so the
+    longest one survives removals. Removing a trade is O(1) given what it
+    cannot know from the aggregates alone: the closed trades next to it in
+    close order (the runs it shortens or joins) and the remaining PnL range
+    (a new largest win/loss). Without those the stats are marked stale and
+    rebuilt on next load.
+    """
+
+    closed: int = 0
+    wins: int = 0
+    losses: int = 0
+    net_pnl: float = 0.0
+    gross_profit: float = 0.0
+    gross_loss: float = 0.0
+    fees_paid: float = 0.0
+    largest_win: float = 0.0
+    largest_loss: float = 0.0
+    loss_streak: int = 0
+    max_loss_streak: int = 0
+    r_count: int = 0
+    r_mean: float = 0.0
+    r_m2: float = 0.0
+    loss_streaks: dict[int, int] = field(default_factory=dict)  # length -> runs
+    stale: bool = False
+
+    def __post_init__(self):
+        # JSON object keys are strings
+        self.loss_streaks = {int(k): v for k, v in self.loss_streaks.items()}
+
+    # ---- updates -------------------------------------------------------
+
+    def add(self, trade: dict):
+        pnl = trade.get("net_pnl") or 0.0
+        self.closed += 1
+        self.net_pnl += pnl
+        self.fees_paid += trade.get("fees_paid") or 0.0
+
+        if pnl > 0:
+            self.wins += 1
+            self.gross_profit += pnl
+            self.largest_win = max(self.largest_win, pnl)
+        elif pnl < 0:
+            self.losses += 1
+            self.gross_loss += -pnl
+            self.largest_loss = min(self.largest_loss, pnl)
+
+        if pnl < 0:
+            if self.loss_streak:
+                self._count_run(self.loss_streak, -1)
+            self.loss_streak += 1
+            self._count_run(self.loss_streak, 1)
+            self.max_loss_streak = max(self.max_loss_streak, self.loss_streak)
+        else:
+            self.loss_streak = 0
+
+        r = r_multiple(trade)
+        if r is not None:
+            self.r_count += 1
+            delta = r - self.r_mean
+            self.r_mean += delta / self.r_count
+            self.r_m2 += delta * (r - self.r_mean)
+
+    def remove(self, trade: dict, near=None, pnl_range=None):
+        """Take ``trade`` out of the stats.
+
+        ``near`` is ``(before, after)``: the net PnLs of the remaining closed
+        trades just before and just after it in close order, nearest first,
+        at least ``max_loss_streak + 1`` a side where there are that many.
+        ``pnl_range`` is the remaining ``(lowest, highest)`` net PnL, or None
+        if no closed trade is left. Without ``near`` the stats go stale when
+        the trade may have been the largest win/loss or in a loss run.
+        """
+        pnl = trade.get("net_pnl") or 0.0
+        self.closed -= 1
+        self.net_pnl -= pnl
+        self.fees_paid -= trade.get("fees_paid") or 0.0
+
+        if pnl > 0:
+            self.wins -= 1
+            self.gross_profit -= pnl
+        elif pnl < 0:
+            self.losses -= 1
+            self.gross_loss -= -pnl
+
+        r = r_multiple(trade)
+        if r is not None:
+            self.r_count -= 1
+            if self.r_count == 0:
+                self.r_mean = self.r_m2 = 0.0
+            else:
+                old_mean = self.r_mean
+                self.r_mean = (old_mean * (self.r_count + 1) - r) / self.r_count
+                self.r_m2 -= (r - self.r_mean) * (r - old_mean)
+
+        if near is None:
+            # Without the context, only what cannot have changed is kept
+            if pnl and pnl in (self.largest_win, self.largest_loss):
+                self.stale = True
+            if pnl < 0 or self.losses:
+                self.stale = True  # may shorten or join loss streaks
+            return
+        low, high = pnl_range or (0.0, 0.0)
+        self.largest_win = max(high, 0.0)
+        self.largest_loss = min(low, 0.0)
+        self._remove_from_runs(pnl < 0, *near)
+
+    def _count_run(self, length: int, step: int):
+        count = self.loss_streaks.get(length, 0) + step
+        if count:
+            self.loss_streaks[length] = count
+        else:
+            del self.loss_streaks[length]
+
+    def _remove_from_runs(self, loss: bool, before, after):
+        """Shorten the loss run ``trade`` was in, or join the two it split."""
+        a = _leading_losses(before)
+        b = _leading_losses(after)
+        last = b == len(after)  # no later non-loss: the run is the current one
+        if loss:
+            self._count_run(a + b + 1, -1)
+            if a + b:
+                self._count_run(a + b, 1)
+        elif a and b:
+            self._count_run(a, -1)
+            self._count_run(b, -1)
+            self._count_run(a + b, 1)
+        if last:
+            self.loss_streak = a + b
+        self.max_loss_streak = max(self.loss_streaks, default=0)
+
+    # ---- derived metrics -----------------------------------------------
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.closed * 100 if self.closed else 0.0
+
+    @property
+    def profit_factor(self) -> float | None:
+        return self.gross_profit / self.gross_loss if self.gross_loss else None
+
+    @property
+    def avg_win(self) -> float:
+        return self.gross_profit / self.wins if self.wins else 0.0
+
+    @property
+    def avg_loss(self) -> float:
+        return -self.gross_loss / self.losses if self.losses else 0.0
+
+    @property
+    def r_std(self) -> float:
+        return math.sqrt(self.r_m2 / (self.r_count - 1)) if self.r_count > 1 else 0.0
+
+    def matches(self, other: "RunningStats", tol: float = 1e-6) -> bool:
+        """Compare with another set of stats, allowing float round-off."""
+        for key, value in asdict(self).items():
+            if key == "stale":
+                continue
+            if key == "loss_streaks":
+                if value != other.loss_streaks:
+                    return False
+                continue
+            if not math.isclose(value, getattr(other, key), abs_tol=tol):
+                return False
+        return True
+
+
+def _leading_losses(pnls) -> int:
+    count = 0
+    for pnl in pnls:
+        if not (pnl or 0.0) < 0:
+            break
+        count += 1
+    return count
+
+
+def r_multiple(trade: dict) -> float | None:
+    risk = trade.get("risk_amount")
+    if not risk or trade.get("net_pnl") is None:
+        return None
+    return trade["net_pnl"] / risk
+
+
+def close_order(trade: dict):
+    """The order trades were closed in (see ``storage.index.close_key``)."""
+    closed_at = trade.get("closed_at") or trade["date"]
+    return (closed_at, trade.get("close_seq") or 0, trade["id"])
+
+
+def rebuild_stats() -> RunningStats:
+    """Recompute the stats from every closed trade and persist them."""
+    stats = RunningStats()
+    for t in sorted(storage.find_trades(status="closed"), key=close_order):
+        stats.add(t)
+    save_stats(stats)
+    return stats
+
+
+def _stored_stats() -> RunningStats | None:
+    data = storage.read_meta(STATS_META)
+    if data is None or data.get("stale") or "loss_streaks" not in data:
+        return None  # (stats from before the loss runs were kept)
+    return RunningStats(**data)
+
+
+def load_stats() -> RunningStats:
+    stats = _stored_stats()
+    return rebuild_stats() if stats is None else stats
+
+
+def save_stats(stats: RunningStats):
+    storage.write_meta(STATS_META, asdict(stats))
+
+
+def record_close(trade: dict):
+    """Fold a freshly closed trade into the persisted stats."""
+    stats = _stored_stats()
+    if stats is None:
+        rebuild_stats()  # the store already has the trade closed
+        return
+    stats.add(trade)
+    save_stats(stats)
+
+
+def record_delete(trade: dict):
+    """Take a deleted trade out of the persisted stats (if it was closed)."""
+    if trade["status"] != "closed":
+        return
+    stats = _stored_stats()
+    if stats is None:
+        rebuild_stats()  # the trade is already gone from the store
+        return
+    # Enough neighbours to walk past the longest run either way
+    before, after = storage.closed_trades_near(
+        close_order(trade), stats.max_loss_streak + 1
+    )
+    near = ([t.get("net_pnl") for t in before], [t.get("net_pnl") for t in after])
+    stats.remove(trade, near, storage.net_pnl_range())
+    save_stats(stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the running trade stats.")
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="compare the stored stats against a full rebuild",
+    )
+    args = parser.parse_args()
+
+    if args.verify:
+        stored = storage.read_meta(STATS_META)
+        rebuilt = rebuild_stats()
+        if stored is not None and RunningStats(**stored).matches(rebuilt):
+            print("✅ Stored stats match a full rebuild.")
+        else:
+            print("⚠️ Stored stats were out of date and have been rebuilt.")
+    else:
+        rebuild_stats()
+        print("Stats rebuilt.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+### analytics.py
+### Equity curve, drawdowns, risk-adjusted ratios and R distribution (NumPy)
+###
+### The closed trades are read once into columnar arrays (close time, net PnL,
+### fees, risk) in close order; every metric is then a handful of vectorized
+### passes (cumsum, maximum.accumulate, ...), so a million trades take a few
+### hundred milliseconds. The arrays and the report are cached on the store
+### generation: reopening the history without a change costs nothing.
+
+import argparse
+from dataclasses import dataclass
+
+import numpy as np
+
+import storage
+
+FIELDS = ("closed_at", "net_pnl", "fees_paid", "risk_amount")
+R_BINS = np.arange(-3.0, 5.5, 0.5)  # histogram edges; outliers go to the ends
+PERCENTILES = (5, 25, 50, 75, 95)
+SPARK = "▁▂▃▄▅▆▇█"
+
+_cached: tuple | None = None  # (trades version, report)
+
+
+@dataclass
+class Columns:
+    """Closed trades as parallel arrays, ordered by close time then id."""
+
+    closed_at: np.ndarray  # datetime64[s]
+    net_pnl: np.ndarray  # float64
+    fees_paid: np.ndarray  # float64, 0 where missing
+    risk_amount: np.ndarray  # float64, NaN where missing
+
+    def __len__(self):
+        return len(self.net_pnl)
+
+
+@dataclass
+class Report:
+    trades: int
+    equity: np.ndarray  # cumulative net PnL after each trade
+    drawdown: np.ndarray  # equity minus its running peak (<= 0)
+    max_drawdown: float  # deepest drawdown (<= 0)
+    max_drawdown_trades: int  # longest run of trades below a previous peak
+    max_drawdown_days: float  # ... and its length in time, peak to recovery
+    underwater: bool  # the last trade is below the peak
+    fees_paid: float
+    sharpe: float | None  # mean / std of the R multiples, per trade
+    sortino: float | None  # mean / downside deviation of the R multiples
+    r_percentiles: dict[int, float]
+    r_histogram: np.ndarray  # counts per R_BINS bucket
+
+    @property
+    def net_pnl(self) -> float:
+        return float(self.equity[-1]) if self.trades else 0.0
+
+
+def read_columns() -> tuple[tuple, dict]:
+    """``storage.trade_columns`` of the closed trades, plus their open date
+    if some have no close time (closed before it was recorded)."""
+    version, values = storage.trade_columns(FIELDS, status="closed")
+    if None in values["closed_at"]:
+        again, dates = storage.trade_columns(("date",), status="closed")
+        if again != version:
+            return read_columns()  # changed in between
+        values.update(dates)
+    return version, values
+
+
+def build_columns(values: dict) -> Columns:
+    """Arrays from the ``read_columns`` values."""
+    closed_at = np.array(values["closed_at"], dtype="datetime64[s]")
+    missing = np.isnat(closed_at)
+    if missing.any():
+        opened = np.array(values["date"], dtype="datetime64[s]")
+        closed_at[missing] = opened[missing]
+    columns = Columns(
+        closed_at=closed_at,
+        net_pnl=np.nan_to_num(np.array(values["net_pnl"], dtype=float)),
+        fees_paid=np.nan_to_num(np.array(values["fees_paid"], dtype=float)),
+        risk_amount=np.array(values["risk_amount"], dtype=float),
+    )
+    if len(closed_at) and (closed_at[1:] < closed_at[:-1]).any():
+        # Usually closed in id order already; otherwise sort, ids on ties
+        order = np.argsort(closed_at, kind="stable")
+        columns = Columns(**{k: array[order] for k, array in vars(columns).items()})
+    return columns
+
+
+def r_multiples(columns: Columns) -> np.ndarray:
+    """net_pnl / risk_amount of the trades with a risk amount."""
+    risk = columns.risk_amount
+    valid = np.isfinite(risk) & (risk != 0)
+    return columns.net_pnl[valid] / risk[valid]
+
+
+def drawdown_runs(drawdown: np.ndarray, closed_at: np.ndarray) -> tuple[int, float]:
+    """Longest stretch below a previous peak, in trades and in days.
+
+    The curve starts at a peak of 0 before the first trade; a stretch ends
+    on the trade that makes a new peak, or runs to the last trade.
+    """
+    n = len(drawdown)
+    peaks = np.flatnonzero(drawdown >= 0)
+    bounds = np.concatenate(([-1], peaks, [n]))
+    lengths = np.diff(bounds) - 1  # trades strictly between two peaks
+    runs = lengths > 0
+    if not runs.any():
+        return 0, 0.0
+    # Time from the peak trade (or the first trade) to the recovering trade
+    # (or the last trade)
+    starts = closed_at[np.maximum(bounds[:-1], 0)]
+    ends = closed_at[np.minimum(bounds[1:], n - 1)]
+    seconds = (ends - starts)[runs].astype("int64")
+    return int(lengths.max()), float(seconds.max()) / 86400
+
+
+def compute(columns: Columns) -> Report:
+    n = len(columns)
+    equity = np.cumsum(columns.net_pnl)
+    peak = np.maximum.accumulate(equity)
+    np.maximum(peak, 0.0, out=peak)  # the curve starts at 0
+    drawdown = equity - peak
+    trades, days = drawdown_runs(drawdown, columns.closed_at) if n else (0, 0.0)
+
+    r = r_multiples(columns)
+    sharpe = sortino = None
+    if len(r) > 1:
+        mean = r.mean()
+        std = r.std(ddof=1)
+        downside = np.sqrt(np.mean(np.minimum(r, 0.0) ** 2))
+        sharpe = float(mean / std) if std else None
+        sortino = float(mean / downside) if downside else None
+    percentiles = (
+        dict(zip(PERCENTILES, np.percentile(r, PERCENTILES).tolist())) if len(r) else {}
+    )
+    histogram, _ = np.histogram(np.clip(r, R_BINS[0], R_BINS[-1]), bins=R_BINS)
+
+    return Report(
+        trades=n,
+        equity=equity,
+        drawdown=drawdown,
+        max_drawdown=float(drawdown.min()) if n else 0.0,
+        max_drawdown_trades=trades,
+        max_drawdown_days=days,
+        underwater=bool(n and drawdown[-1] < 0),
+        fees_paid=float(columns.fees_paid.sum()),
+        sharpe=sharpe,
+        sortino=sortino,
+        r_percentiles=percentiles,
+        r_histogram=histogram,
+    )
+
+
+def load_report() -> Report:
+    """The report over all closed trades, cached until the trades change."""
+    global _cached
+    if _cached is not None and _cached[0] == storage.trades_version():
+        return _cached[1]
+    version, values = read_columns()
+    report = compute(build_columns(values))
+    _cached = (version, report)
+    return report
+
+
+def sparkline(values: np.ndarray, width: int = 60) -> str:
+    """``values`` as at most ``width`` block characters, low to high.
+
+    Longer series are sampled at ``width`` evenly spaced points, first and
+    last included, so the line ends on the latest value.
+    """
+    if not len(values):
+        return ""
+    if len(values) > width:
+        values = values[np.linspace(0, len(values) - 1, width).round().astype(int)]
+    low, high = values.min(), values.max()
+    if high == low:
+        return SPARK[len(SPARK) // 2] * len(values)
+    levels = ((values - low) / (high - low) * (len(SPARK) - 1)).round().astype(int)
+    return "".join(SPARK[i] for i in levels)
+
+
+def summary(report: Report) -> str:
+    """One-line drawdown and ratio summary for the history screen."""
+    if not report.trades:
+        return "No closed trades yet."
+    sharpe = "-" if report.sharpe is None else f"{report.sharpe:.2f}"
+    sortino = "-" if report.sortino is None else f"{report.sortino:.2f}"
+    median = report.r_percentiles.get(50)
+    text = (
+        f"Max DD: {report.max_drawdown:.2f} USDT • "
+        f"Longest DD: {report.max_drawdown_trades} trades / "
+        f"{report.max_drawdown_days:.1f} days • "
+        f"Sharpe/trade: {sharpe} • Sortino/trade: {sortino} • "
+        f"Median R: {'-' if median is None else f'{median:+.2f}'}"
+    )
+    if report.underwater:
+        text += f" • Now {report.drawdown[-1]:.2f} below peak"
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Equity curve, drawdowns and R distribution of closed trades."
+    )
+    parser.add_argument("--width", type=int, default=60, help="sparkline width")
+    args = parser.parse_args()
+
+    report = load_report()
+    print(f"Equity ({report.trades} trades, net {report.net_pnl:.2f} USDT):")
+    print(sparkline(report.equity, args.width))
+    print(summary(report))
+    if report.r_percentiles:
+        print(
+            "R percentiles: "
+            + "  ".join(f"p{p} {v:+.2f}" for p, v in report.r_percentiles.items())
+        )
+        for edge, count in zip(R_BINS, report.r_histogram):
+            print(f"{edge:+5.1f}R {count:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+### backtest.py
+### Replays logged trades over OHLCV candles under alternative exit rules
+###
+### For every trade (entry, stop_loss, direction, risk_pct, account_size from
+### the journal) and every exit rule, the candles after the entry are scanned
+### for the first touch of the stop and of the target (``target_r`` times the
+### entry-to-stop distance), with an optional time exit after ``max_bars``
+### candles. Scans run over all trades of a pair at once as NumPy array
+### operations, a block of candles at a time; trades drop out of the scan as
+### soon as they are resolved. Sizing uses calculate_quantity_batch and PnL
+### the close_trade fee model (trade_pnl_batch).
+###
+### Candles live in one file per pair: ``<dir>/<PAIR>.npy`` (2-D float array,
+### columns time, open, high, low, close[, volume]; loaded memory-mapped) or
+### ``<dir>/<PAIR>.csv`` (same columns with a header row). Times are epoch
+### seconds or milliseconds, UTC, ascending; trade dates are read as UTC.
+###
+###     python -m core.backtest candles/ --targets 1 2 3 --max-bars 1440
+
+import argparse
+import os
+from dataclasses import dataclass
+from typing import NamedTuple
+
+import numpy as np
+
+import storage
+from core.aggregates import RunningStats
+from core.calculator import calculate_quantity_batch, trade_pnl_batch
+
+FIRST_BLOCK = 256  # candles per trade in the first scan block
+MAX_BLOCK = 1 << 16  # blocks double up to this many candles
+MAX_CELLS = 1 << 22  # trades x candles scanned per block, bounds the temporaries
+
+# A stop and a target touched inside the same candle count as a stop
+# (intra-candle order is unknown, so assume the worse outcome).
+REASONS = ("stop", "target", "time", "end")
+
+
+class Candles(NamedTuple):
+    time: np.ndarray  # int64 epoch seconds
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+
+@dataclass(frozen=True)
+class ExitRule:
+    target_r: float | None = None  # take profit at this R multiple
+    max_bars: int | None = None  # time exit after this many candles
+
+    @property
+    def label(self) -> str:
+        parts = [f"{self.target_r:g}R" if self.target_r else "no target"]
+        if self.max_bars:
+            parts.append(f"{self.max_bars} bars")
+        return " / ".join(parts)
+
+
+def load_candles(path: str) -> Candles:
+    if path.endswith(".npy"):
+        data = np.load(path, mmap_mode="r")
+    else:
+        data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    time = np.asarray(data[:, 0], dtype=np.float64)
+    if len(time) and time[0] > 1e11:  # milliseconds
+        time = time / 1000
+    return Candles(time.astype(np.int64), *(data[:, i] for i in range(1, 5)))
+
+
+class CandleSet:
+    """Candle files of a directory, loaded per pair on first use."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._cache: dict[str, Candles | None] = {}
+
+    def get(self, pair: str) -> Candles | None:
+        if pair not in self._cache:
+            self._cache[pair] = None
+            for ext in (".npy", ".csv"):
+                path = os.path.join(self.directory, pair + ext)
+                if os.path.exists(path):
+                    self._cache[pair] = load_candles(path)
+                    break
+        return self._cache[pair]
+
+
+def first_touch(candles: Candles, start, span, level, falls) -> np.ndarray:
+    """Offset of the first candle each trade's price touches ``level`` in.
+
+    Trade ``i`` looks at candles ``start[i]`` to ``start[i] + span[i] - 1``;
+    ``falls[i]`` means the level is below the price (touched when the low
+    reaches it), otherwise above (the high reaches it). -1 if never touched.
+    """
+    hit = np.full(len(start), -1, dtype=np.int64)
+    signed_level = np.where(falls, level, -level)
+    pending = np.flatnonzero(span > 0)
+    last = len(candles.time) - 1
+    offset, block = 0, FIRST_BLOCK
+    while pending.size:
+        # Many pending trades get shorter blocks, so a block's arrays stay
+        # at most MAX_CELLS elements
+        block = max(min(block, MAX_CELLS // pending.size), 1)
+        cols = np.arange(offset, offset + block)
+        idx = np.minimum(start[pending, None] + cols, last)
+        values = np.where(falls[pending, None], candles.low[idx], -candles.high[idx])
+        touched = (values <= signed_level[pending, None]) & (cols < span[pending, None])
+        found = touched.any(axis=1)
+        hit[pending[found]] = offset + touched[found].argmax(axis=1)
+        offset += block
+        pending = pending[~found & (span[pending] > offset)]
+        block = min(block * 2, MAX_BLOCK)
+    return hit
+
+
+@dataclass
+class BacktestResult:
+    """One row per (trade, rule); columns are NumPy arrays."""
+
+    trade_id: np.ndarray
+    pair: np.ndarray
+    rule: np.ndarray  # index into rules
+    reason: np.ndarray  # index into REASONS
+    exit_time: np.ndarray
+    exit_price: np.ndarray
+    bars: np.ndarray
+    gross_pnl: np.ndarray
+    fees: np.ndarray
+    net_pnl: np.ndarray
+    risk_amount: np.ndarray
+    r_multiple: np.ndarray
+    rules: tuple
+    skipped: int = 0  # trades without sizing inputs or candles
+
+    def rows(self):
+        for i in range(len(self.trade_id)):
+            yield {
+                "id": int(self.trade_id[i]),
+                "pair": str(self.pair[i]),
+                "rule": self.rules[self.rule[i]].label,
+                "reason": REASONS[self.reason[i]],
+                "exit_time": int(self.exit_time[i]),
+                "exit_price": float(self.exit_price[i]),
+                "bars": int(self.bars[i]),
+                "gross_pnl": float(self.gross_pnl[i]),
+                "fees_paid": float(self.fees[i]),
+                "net_pnl": float(self.net_pnl[i]),
+                "r_multiple": float(self.r_multiple[i]),
+            }
+
+    def summary(self) -> dict[str, RunningStats]:
+        """Aggregate stats per rule, as the history screen computes them."""
+        stats = {rule.label: RunningStats() for rule in self.rules}
+        order = np.lexsort((self.trade_id, self.exit_time))
+        for i in order:
+            stats[self.rules[self.rule[i]].label].add(
+                {
+                    "net_pnl": float(self.net_pnl[i]),
+                    "fees_paid": float(self.fees[i]),
+                    "risk_amount": float(self.risk_amount[i]),
+                }
+            )
+        return stats
+
+
+EXTRA_FIELDS = ("rules", "skipped")  # BacktestResult fields that are not columns
+
+
+def _trade_arrays(trades: list[dict]) -> dict:
+    return {
+        "id": np.array([t["id"] for t in trades], dtype=np.int64),
+        "time": np.array(
+            [t["date"].replace(" ", "T") for t in trades], dtype="datetime64[s]"
+        ).astype(np.int64),
+        "entry": np.array([t["entry"] for t in trades], dtype=np.float64),
+        "stop": np.array([t["stop_loss"] for t in trades], dtype=np.float64),
+        "sign": np.array([1 if t["direction"] == "long" else -1 for t in trades]),
+        "risk_pct": np.array([t["risk_pct"] for t in trades], dtype=np.float64),
+        "account_size": np.array([t["account_size"] for t in trades], np.float64),
+    }
+
+
+def _simulate_pair(candles: Candles, trades: list[dict], rules) -> list[dict]:
+    a = _trade_arrays(trades)
+    sizing = calculate_quantity_batch(
+        a["account_size"], a["risk_pct"], a["entry"], a["stop"]
+    )
+    long = a["sign"] == 1
+    risk = np.abs(a["entry"] - a["stop"])
+    # Only candles opening after the entry time can hit anything
+    start = np.searchsorted(candles.time, a["time"], side="right")
+    available = len(candles.time) - start
+
+    # The stop does not depend on the rule: scan for it once, then cut the
+    # hit off at each rule's time limit
+    stop_hit = first_touch(candles, start, available, a["stop"], long)
+    never = np.iinfo(np.int64).max
+    columns = []
+    for r, rule in enumerate(rules):
+        span = available if not rule.max_bars else np.minimum(available, rule.max_bars)
+        stop_at = np.where((stop_hit >= 0) & (stop_hit < span), stop_hit, never)
+        if rule.target_r:
+            target = a["entry"] + a["sign"] * rule.target_r * risk
+            target_hit = first_touch(candles, start, span, target, ~long)
+            target_at = np.where(target_hit >= 0, target_hit, never)
+        else:
+            target = a["entry"]
+            target_at = np.full(len(start), never)
+
+        exit_at = np.minimum(stop_at, target_at)
+        resolved = exit_at != never
+        by_stop = resolved & (stop_at <= target_at)
+        exit_at = np.where(resolved, exit_at, span - 1)
+        idx = np.minimum(start + np.maximum(exit_at, 0), len(candles.time) - 1)
+        bar_open = candles.open[idx]
+
+        # Fill at the level, or at the open if the candle gapped through it
+        stop_fill = np.where(
+            long, np.minimum(a["stop"], bar_open), np.maximum(a["stop"], bar_open)
+        )
+        target_fill = np.where(
+            long, np.maximum(target, bar_open), np.minimum(target, bar_open)
+        )
+        exit_price = np.where(
+            by_stop,
+            stop_fill,
+            np.where(resolved, target_fill, candles.close[idx]),
+        )
+        # else the candles ran out first
+        if rule.max_bars:
+            timed_out = span == rule.max_bars
+        else:
+            timed_out = np.zeros(len(span), dtype=bool)
+        reason = np.where(by_stop, 0, np.where(resolved, 1, np.where(timed_out, 2, 3)))
+
+        gross, fees, net = trade_pnl_batch(
+            a["sign"], a["entry"], sizing["quantity"], sizing["order_value"], exit_price
+        )
+        keep = sizing["valid"] & (span > 0)
+        columns.append(
+            {
+                "trade_id": a["id"][keep],
+                "rule": np.full(keep.sum(), r),
+                "reason": reason[keep],
+                "exit_time": candles.time[idx][keep],
+                "exit_price": exit_price[keep],
+                "bars": exit_at[keep] + 1,
+                "gross_pnl": gross[keep],
+                "fees": fees[keep],
+                "net_pnl": net[keep],
+                "risk_amount": sizing["risk_amount"][keep],
+                "r_multiple": (net / sizing["risk_amount"])[keep],
+            }
+        )
+    return columns
+
+
+def run_backtest(trades, candle_set: CandleSet, rules) -> BacktestResult:
+    """Simulate ``trades`` under every rule in ``rules``."""
+    rules = tuple(rules)
+    by_pair: dict[str, list[dict]] = {}
+    skipped = 0
+    for t in trades:
+        if any(t.get(k) is None for k in ("stop_loss", "risk_pct", "account_size")):
+            skipped += 1
+            continue
+        by_pair.setdefault(t["pair"], []).append(t)
+
+    parts = []
+    for pair, pair_trades in by_pair.items():
+        candles = candle_set.get(pair)
+        if candles is None or not len(candles.time):
+            skipped += len(pair_trades)
+            continue
+        columns = _simulate_pair(candles, pair_trades, rules)
+        # Trades that could not be sized or have no candles after the entry
+        skipped += len(pair_trades) - len(columns[0]["trade_id"])
+        for part in columns:
+            part["pair"] = np.full(len(part["trade_id"]), pair, dtype=object)
+            parts.append(part)
+
+    names = [f for f in BacktestResult.__dataclass_fields__ if f not in EXTRA_FIELDS]
+    merged = {
+        n: np.concatenate([p[n] for p in parts]) if parts else np.array([])
+        for n in names
+    }
+    return BacktestResult(rules=rules, skipped=skipped, **merged)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay logged trades over OHLCV candles."
+    )
+    parser.add_argument("candles", help="directory of <PAIR>.npy / <PAIR>.csv files")
+    parser.add_argument(
+        "--targets", type=float, nargs="*", default=[1, 2, 3], help="R multiples"
+    )
+    parser.add_argument("--max-bars", type=int, default=None, help="time exit")
+    parser.add_argument("--rows", action="store_true", help="print every result row")
+    args = parser.parse_args()
+
+    rules = [ExitRule(None, args.max_bars)]
+    rules += [ExitRule(r, args.max_bars) for r in args.targets]
+    result = run_backtest(storage.iter_trades(), CandleSet(args.candles), rules)
+
+    if args.rows:
+        print(f"{'ID':>6} {'Pair':<10} {'Rule':<18} {'Exit':<7} {'Price':>12} {'R':>7}")
+        for row in result.rows():
+            print(
+                f"{row['id']:>6} {row['pair']:<10} {row['rule']:<18}"
+                f" {row['reason']:<7} {row['exit_price']:>12.4f}"
+                f" {row['r_multiple']:>7.2f}"
+            )
+        print()
+
+    print(
+        f"{'Rule':<18} {'Trades':>7} {'Win %':>7} {'Net PnL':>12} {'Avg R':>7} {'PF':>6}"
+    )
+    for label, stats in result.summary().items():
+        pf = stats.profit_factor
+        print(
+            f"{label:<18} {stats.closed:>7} {stats.win_rate:>7.1f}"
+            f" {stats.net_pnl:>12.2f} {stats.r_mean:>7.2f}"
+            f" {'-' if pf is None else f'{pf:.2f}':>6}"
+        )
+    if result.skipped:
+        print(f"({result.skipped} trades skipped: no sizing inputs or candles)")
+
+
+if __name__ == "__main__":
+    main()
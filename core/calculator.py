@@ -1,7 +1,13 @@
 ### calculator.py
 ### This file handles quantity size, leverage and fee calculations
 
+from core import perf
 
+TAKER_FEE_RATE = 0.00055
+MAKER_FEE_RATE = 0.0002
+
+
+@perf.timed("calculator.calculate_quantity")
 def calculate_quantity(account_size, risk_pct, entry, stop_loss):
     """
     Calculate trade quantity size, leverage, and fees.
@@ -42,23 +48,134 @@ def calculate_quantity(account_size, risk_pct, entry, stop_loss):
         required_leverage = 1.0
     required_leverage = round(required_leverage, 1)
 
+    # Fees
+    taker_fee = order_value * TAKER_FEE_RATE
+    maker_fee = order_value * MAKER_FEE_RATE
+
+    return {
+        "risk_amount": risk_amount,
+        "quantity": quantity,
+        "order_value": order_value,
+        "required_leverage": required_leverage,
+        "leverage_note": leverage_note(order_value, required_leverage),
+        "taker_fee": taker_fee,
+        "maker_fee": maker_fee,
+    }
+
+
+def leverage_note(order_value, required_leverage):
+    """Human readable leverage advice for a sized order."""
     if required_leverage == 1.0:
-        leverage_note = "✅ No leverage required"
+        return "✅ No leverage required"
     elif required_leverage <= 10:
-        leverage_note = f"⚠️ Order value ({order_value:.2f} USDT) exceeds account size! Moderate leverage suggested: {required_leverage:.1f}×"
+        return f"⚠️ Order value ({order_value:.2f} USDT) exceeds account size! Moderate leverage suggested: {required_leverage:.1f}×"
     else:
-        leverage_note = f"🚨 Order value ({order_value:.2f} USDT) exceeds account size! High leverage required: {required_leverage:.1f}×"
+        return f"🚨 Order value ({order_value:.2f} USDT) exceeds account size! High leverage required: {required_leverage:.1f}×"
+
+
+def trade_pnl(trade, exit_price):
+    """
+    PnL of closing a trade at ``exit_price``, with taker fees on both legs.
+
+    Used for realized PnL by close_trade and for unrealized (mark-to-market)
+    PnL of open trades.
+
+    Returns:
+        tuple: (gross_pnl, fees, net_pnl)
+    """
+    quantity = trade.get("quantity", 0)
+
+    # Gross PnL (long vs short)
+    if trade["direction"] == "long":
+        gross_pnl = (exit_price - trade["entry"]) * quantity
+    else:  # short
+        gross_pnl = (trade["entry"] - exit_price) * quantity
 
     # Fees
-    taker_fee = order_value * 0.00055
-    maker_fee = order_value * 0.0002
+    entry_fee = trade["order_value"] * TAKER_FEE_RATE
+    exit_fee = (quantity * exit_price) * TAKER_FEE_RATE
+    total_fee = entry_fee + exit_fee
+
+    return gross_pnl, total_fee, gross_pnl - total_fee
+
+
+def calculate_quantity_batch(account_size, risk_pct, entry, stop_loss):
+    """
+    Vectorized calculate_quantity for many candidate trades at once.
+
+    Every argument may be a scalar, a sequence or a NumPy array; they are
+    broadcast against each other. Results match calculate_quantity
+    element for element, bit for bit. Rows where the stop loss equals the
+    entry are flagged in the "valid" mask (and hold NaN) instead of raising.
+
+    Returns:
+        dict: {
+        "risk_amount": ndarray,
+        "quantity": ndarray,
+        "order_value": ndarray,
+        "required_leverage": ndarray,
+        "taker_fee": ndarray,
+        "maker_fee": ndarray,
+        "valid": ndarray[bool],
+        }
+    """
+    import numpy as np
+
+    account_size, risk_pct, entry, stop_loss = np.broadcast_arrays(
+        *(
+            np.asarray(a, dtype=np.float64)
+            for a in (account_size, risk_pct, entry, stop_loss)
+        )
+    )
+
+    risk_amount = account_size * (risk_pct / 100)
+
+    stop_distance = np.abs(entry - stop_loss)
+    valid = stop_distance != 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        quantity = np.where(valid, risk_amount / stop_distance, np.nan)
+    order_value = quantity * entry
+
+    required_leverage = _round_leverage(np.maximum(order_value / account_size, 1.0))
 
     return {
         "risk_amount": risk_amount,
         "quantity": quantity,
         "order_value": order_value,
         "required_leverage": required_leverage,
-        "leverage_note": leverage_note,
-        "taker_fee": taker_fee,
-        "maker_fee": maker_fee,
+        "taker_fee": order_value * TAKER_FEE_RATE,
+        "maker_fee": order_value * MAKER_FEE_RATE,
+        "valid": valid,
     }
+
+
+def trade_pnl_batch(direction_sign, entry, quantity, order_value, exit_price):
+    """
+    Vectorized trade_pnl: same fee model, arrays in and out.
+
+    ``direction_sign`` is +1 for longs and -1 for shorts.
+
+    Returns:
+        tuple: (gross_pnl, fees, net_pnl) arrays
+    """
+    gross_pnl = direction_sign * (exit_price - entry) * quantity
+    total_fee = order_value * TAKER_FEE_RATE + (quantity * exit_price) * TAKER_FEE_RATE
+    return gross_pnl, total_fee, gross_pnl - total_fee
+
+
+def _round_leverage(leverage):
+    """np.round(x, 1), corrected to Python's round(x, 1) on near ties.
+
+    NumPy rounds x * 10 (already inexact), Python rounds the exact decimal
+    value, so the two disagree for inputs like 1.15. Only those few elements
+    are re-rounded in Python.
+    """
+    import numpy as np
+
+    rounded = np.round(leverage, 1)
+    scaled = leverage * 10
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        rounded.flat[i] = round(float(leverage.flat[i]), 1)
+    return rounded
@@ -0,0 +1,43 @@
+### events.py
+### Change notifications so screens can patch single rows instead of reloading
+
+import functools
+from dataclasses import dataclass, field
+
+import storage
+
+
+@dataclass
+class TradeChange:
+    """Trade ids touched by one mutation in core.trades."""
+
+    added: list[int] = field(default_factory=list)
+    updated: list[int] = field(default_factory=list)
+    removed: list[int] = field(default_factory=list)
+
+
+_listeners = []
+
+
+def subscribe(callback):
+    """Call ``callback(change: TradeChange)`` after every trade mutation."""
+    _listeners.append(callback)
+
+
+def unsubscribe(callback):
+    if callback in _listeners:
+        _listeners.remove(callback)
+
+
+def emit(change: TradeChange):
+    """Notify the listeners once the current storage transaction commits.
+
+    A transaction that fails (and is retried) notifies nobody, so listeners
+    never see a change that was rolled back or see one twice.
+    """
+    storage.after_commit(functools.partial(_deliver, change))
+
+
+def _deliver(change: TradeChange):
+    for callback in list(_listeners):
+        callback(change)
@@ -0,0 +1,359 @@
+### importer.py
+### Bulk import of exchange fill exports (CSV or JSON lines)
+###
+### Each row of an export is one fill: order id, time, symbol, side, price,
+### quantity and fee. Files are split into byte ranges that are parsed in a
+### process pool; the fills are then replayed per symbol to rebuild round-trip
+### trades and everything new is committed with a single bulk write.
+###
+###     python -m core.importer fills.csv more_fills.jsonl [--workers N]
+
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from operator import attrgetter
+from typing import NamedTuple
+
+import storage
+from core import aggregates, events, rollups
+
+CHUNK_BYTES = 1 << 20  # bytes of export parsed per pool task
+QTY_EPSILON = 1e-9  # position sizes below this count as flat
+
+# Accepted column names (first match wins), covering common exchange exports
+COLUMNS = {
+    "order_id": ("order_id", "orderId", "exchange_order_id"),
+    "time": ("time", "timestamp", "exec_time", "execTime"),
+    "symbol": ("symbol", "pair"),
+    "side": ("side",),
+    "price": ("price", "exec_price", "execPrice"),
+    "qty": ("qty", "quantity", "exec_qty", "execQty"),
+    "fee": ("fee", "exec_fee", "execFee", "commission"),
+}
+
+
+class ImportFormatError(ValueError):
+    """An export file is missing columns or has a malformed row."""
+
+
+class Fill(NamedTuple):
+    time: str  # "%Y-%m-%d %H:%M:%S", UTC
+    symbol: str
+    side: str  # "buy" or "sell"
+    price: float
+    qty: float
+    fee: float
+    order_id: str
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    duplicate_fills: int = 0
+    added: int = 0
+    updated: int = 0  # open trades that the export shows closed
+    skipped: int = 0  # trades already in the store
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+# ---- parsing ---------------------------------------------------------------
+
+
+def _timestamp(value) -> str:
+    """Normalize epoch seconds/milliseconds or ISO 8601 to the trade format."""
+    text = str(value).strip()
+    if text.replace(".", "", 1).isdigit():
+        seconds = float(text)
+        if seconds > 1e11:  # milliseconds
+            seconds /= 1000
+        moment = datetime.fromtimestamp(seconds, timezone.utc)
+    else:
+        moment = datetime.fromisoformat(text.replace("Z", "+00:00"))
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _fill(get) -> Fill:
+    side = get("side").strip().lower()
+    if side not in ("buy", "sell"):
+        raise ValueError(f"unknown side {side!r}")
+    return Fill(
+        time=_timestamp(get("time")),
+        symbol=get("symbol").strip().upper(),
+        side=side,
+        price=float(get("price")),
+        qty=abs(float(get("qty"))),
+        fee=float(get("fee") or 0.0),
+        order_id=str(get("order_id")).strip(),
+    )
+
+
+def _resolve_columns(names) -> dict:
+    """Map each fill field to the name it has in this export."""
+    resolved = {}
+    for field, aliases in COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                resolved[field] = alias
+                break
+        else:
+            if field != "fee":
+                raise ImportFormatError(f"missing column for {field!r}")
+    return resolved
+
+
+def _parse_range(path: str, start: int, end: int, fmt: str, header, columns):
+    """Parse the fills between two line-aligned byte offsets of a file."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+
+    fills = []
+    if fmt == "csv":
+        index = {field: header.index(name) for field, name in columns.items()}
+        records = csv.reader(io.StringIO(text))
+
+        def getter(row):
+            return lambda field: row[index[field]] if field in index else None
+
+    else:
+        records = (json.loads(line) for line in text.splitlines() if line.strip())
+
+        def getter(record):
+            return lambda field: (
+                record.get(columns[field]) if field in columns else None
+            )
+
+    for record in records:
+        if not record:
+            continue
+        try:
+            fills.append(_fill(getter(record)))
+        except (ValueError, IndexError, KeyError, AttributeError) as e:
+            raise ImportFormatError(f"{path}: bad row {record!r}: {e}") from e
+    return fills
+
+
+def _tasks(path: str, chunk_bytes: int):
+    """Split a file into line-aligned parse tasks."""
+    fmt = "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        first = f.readline()
+        if fmt == "csv":
+            header = next(csv.reader([first.decode("utf-8-sig")]))
+            columns = _resolve_columns(header)
+            start = f.tell()
+        else:
+            header = None
+            columns = _resolve_columns(json.loads(first) if first.strip() else {})
+            start = 0
+
+        while start < size:
+            f.seek(min(start + chunk_bytes, size))
+            f.readline()  # finish the line the chunk ends in
+            end = f.tell()
+            yield (path, start, end, fmt, header, columns)
+            start = end
+
+
+def parse_files(paths, workers: int | None = None, chunk_bytes: int = CHUNK_BYTES):
+    """Parse every fill in ``paths``, keeping file and row order.
+
+    Chunks are parsed in a pool of ``workers`` processes (default: one per
+    CPU) unless there is only one chunk or one worker.
+    """
+    tasks = [task for path in paths for task in _tasks(path, chunk_bytes)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        chunks = [_parse_range(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_parse_range, *zip(*tasks)))
+    return list(itertools.chain.from_iterable(chunks))
+
+
+# ---- grouping --------------------------------------------------------------
+
+
+class _Position:
+    """Running state of one round trip while its fills are replayed."""
+
+    def __init__(self, fill: Fill):
+        self.symbol = fill.symbol
+        self.direction = "long" if fill.side == "buy" else "short"
+        self.date = fill.time
+        self.order_id = fill.order_id
+        self.size = 0.0
+        self.entry_qty = self.entry_value = 0.0
+        self.exit_qty = self.exit_value = 0.0
+        self.fees = 0.0
+
+    def opens(self, fill: Fill) -> bool:
+        return (fill.side == "buy") == (self.direction == "long")
+
+    def to_trade(self, closed_at: str | None) -> dict:
+        entry = self.entry_value / self.entry_qty
+        trade = {
+            "date": self.date,
+            "pair": self.symbol,
+            "entry": entry,
+            "stop_loss": None,
+            "direction": self.direction,
+            "exchange_order_id": self.order_id,
+        }
+        if closed_at is None:
+            quantity = self.size
+            trade.update(
+                status="open",
+                exit_price=None,
+                gross_pnl=None,
+                fees_paid=None,
+                net_pnl=None,
+                notes="Imported (partly closed)" if self.exit_qty else "Imported",
+            )
+        else:
+            quantity = self.entry_qty
+            sign = 1 if self.direction == "long" else -1
+            gross_pnl = sign * (self.exit_value - entry * self.exit_qty)
+            trade.update(
+                status="closed",
+                closed_at=closed_at,
+                exit_price=self.exit_value / self.exit_qty,
+                gross_pnl=gross_pnl,
+                fees_paid=self.fees,
+                net_pnl=gross_pnl - self.fees,
+                notes="Imported",
+            )
+        trade.update(quantity=quantity, order_value=entry * quantity)
+        return trade
+
+
+def group_fills(fills) -> list[dict]:
+    """Rebuild round-trip trades from fills, replayed per symbol in time order.
+
+    A trade opens when the position leaves flat and closes when it returns to
+    flat; a fill that flips the position closes the trade and opens the
+    opposite one with the remainder (its fee is split pro rata). Positions
+    still open at the end become open trades. Trades come back ordered by
+    opening time and carry the order id of their first fill as
+    ``exchange_order_id``.
+    """
+    trades = []
+    ordered = sorted(fills, key=attrgetter("symbol", "time"))
+    for _, symbol_fills in itertools.groupby(ordered, key=attrgetter("symbol")):
+        position = None
+        for fill in symbol_fills:
+            qty = fill.qty
+            fee_per_unit = fill.fee / fill.qty if fill.qty else 0.0
+            while qty > QTY_EPSILON:
+                if position is None:
+                    position = _Position(fill)
+                if position.opens(fill):
+                    position.size += qty
+                    position.entry_qty += qty
+                    position.entry_value += qty * fill.price
+                    position.fees += qty * fee_per_unit
+                    qty = 0.0
+                else:
+                    part = min(qty, position.size)
+                    position.size -= part
+                    position.exit_qty += part
+                    position.exit_value += part * fill.price
+                    position.fees += part * fee_per_unit
+                    qty -= part
+                    if position.size <= QTY_EPSILON:
+                        trades.append(position.to_trade(fill.time))
+                        position = None
+        if position is not None:
+            trades.append(position.to_trade(None))
+    trades.sort(key=lambda t: (t["date"], t["pair"]))
+    return trades
+
+
+# ---- committing ------------------------------------------------------------
+
+
+@storage.atomic
+def commit_trades(trades: list[dict], result: ImportResult):
+    """Write the new trades in one bulk write, skipping known order ids."""
+    existing = {
+        t["exchange_order_id"]: t
+        for t in storage.iter_trades()
+        if t.get("exchange_order_id")
+    }
+    new, updated, skipped = [], [], 0
+    for trade in trades:
+        known = existing.get(trade["exchange_order_id"])
+        if known is None:
+            new.append(trade)
+        elif known["status"] == "open" and trade["status"] == "closed":
+            # Imported while still open; the export now has the exit fills
+            fields = {k: v for k, v in trade.items() if k not in ("date", "notes")}
+            storage.update_trade(known["id"], fields)
+            updated.append(known["id"])
+        else:
+            skipped += 1
+
+    for trade_id, trade in zip(storage.allocate_trade_ids(len(new)), new):
+        trade["id"] = trade_id
+    storage.add_trades(new)
+    result.added, result.updated, result.skipped = len(new), len(updated), skipped
+
+    if any(t["status"] == "closed" for t in new) or updated:
+        # Imported closes can predate existing ones, so replay them in order
+        aggregates.rebuild_stats()
+        rollups.rebuild_rollups()
+    if new or updated:
+        events.emit(events.TradeChange(added=[t["id"] for t in new], updated=updated))
+
+
+def import_files(
+    paths, workers: int | None = None, chunk_bytes: int = CHUNK_BYTES
+) -> ImportResult:
+    """Import fill exports into the active store and report what happened.
+
+    Fills repeated across (or within) the files are only counted once.
+    """
+    started = time.perf_counter()
+    result = ImportResult()
+    fills = parse_files(paths, workers=workers, chunk_bytes=chunk_bytes)
+    result.rows = len(fills)
+    unique = list(dict.fromkeys(fills))
+    result.duplicate_fills = len(fills) - len(unique)
+    commit_trades(group_fills(unique), result)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import exchange fill exports.")
+    parser.add_argument("paths", nargs="+", help="CSV or JSON-lines fill exports")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="parser processes (default: CPUs)"
+    )
+    args = parser.parse_args()
+
+    result = import_files(args.paths, workers=args.workers)
+    print(
+        f"Imported {result.added} trades ({result.updated} updated,"
+        f" {result.skipped} already present) from {result.rows} fills"
+        f" ({result.duplicate_fills} duplicates) in {result.seconds:.2f}s"
+        f" - {result.rows_per_second:,.0f} rows/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
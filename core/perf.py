@@ -0,0 +1,161 @@
+### perf.py
+### In-memory timing registry: counts, totals and latency percentiles
+###
+### Wrap a function with ``@perf.timed("name")`` or a block with
+### ``with perf.timer("name"):``. Each name keeps a count, a total and its
+### last ``SAMPLES`` durations (for p50/p95/p99), so recording costs two clock
+### reads and a deque append. ``snapshot()`` summarizes the registry; the TUI
+### shows it on a hidden performance screen (F12).
+###
+###     TCH_PERF_DUMP=perf.json    dump the registry as JSON when the process exits
+###     TCH_PROFILE=tch.prof       cProfile the whole session (read with pstats)
+
+import atexit
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+SAMPLES = 1024  # recent durations kept per name for the percentiles
+
+
+class Stat:
+    """Count, total and recent samples of one timed operation (nanoseconds)."""
+
+    __slots__ = ("count", "total", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.samples = deque(maxlen=SAMPLES)
+
+    def add(self, elapsed: int):
+        self.count += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.samples.append(elapsed)
+
+    def summary(self) -> dict:
+        ordered = sorted(self.samples)
+
+        def pct(q):
+            return ordered[min(len(ordered) - 1, int(q * len(ordered)))] / 1e6
+
+        return {
+            "count": self.count,
+            "total_ms": self.total / 1e6,
+            "mean_ms": self.total / self.count / 1e6,
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": self.max / 1e6,
+        }
+
+
+_stats: dict[str, Stat] = {}
+_lock = threading.Lock()
+_profiler = None  # cProfile.Profile while a session is being profiled
+
+
+def record(name: str, elapsed_ns: int):
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            stat = _stats[name] = Stat()
+        stat.add(elapsed_ns)
+
+
+@contextmanager
+def timer(name: str):
+    """Time the block under ``name`` (also when it raises)."""
+    started = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter_ns() - started)
+
+
+def timed(name: str | None = None):
+    """Decorator timing every call of a function or coroutine function."""
+
+    def decorate(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter_ns()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    record(label, time.perf_counter_ns() - started)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, time.perf_counter_ns() - started)
+
+        return wrapper
+
+    return decorate
+
+
+def snapshot() -> dict[str, dict]:
+    """Summary of every timed name, slowest total first."""
+    with _lock:
+        summaries = {name: stat.summary() for name, stat in _stats.items()}
+    return dict(sorted(summaries.items(), key=lambda item: -item[1]["total_ms"]))
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def dump(path: str):
+    with open(path, "w") as f:
+        json.dump(snapshot(), f, indent=2)
+
+
+# ---- session hooks -----------------------------------------------------------
+
+
+def start_profile():
+    global _profiler
+    if _profiler is None:
+        import cProfile
+
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def stop_profile(path: str):
+    """Stop the cProfile session and write its stats to ``path``."""
+    global _profiler
+    if _profiler is not None:
+        _profiler.disable()
+        _profiler.dump_stats(path)
+        _profiler = None
+
+
+def configure_from_env():
+    """Start profiling / schedule the exit dump requested by the environment."""
+    profile_path = os.environ.get("TCH_PROFILE")
+    if profile_path:
+        start_profile()
+        atexit.register(stop_profile, profile_path)
+    dump_path = os.environ.get("TCH_PERF_DUMP")
+    if dump_path:
+        atexit.register(dump, dump_path)
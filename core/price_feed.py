@@ -0,0 +1,286 @@
+### price_feed.py
+### Live prices and unrealized (mark-to-market) PnL for open trades
+###
+### A source is an async iterator of ``(pair, price)`` ticks: a TCP stream of
+### tick lines (e.g. a local bridge to an exchange websocket) or a replay
+### file. The feed runs its own asyncio loop on a background thread, so tick
+### bursts never compete with the Textual event loop. Ticks only overwrite the
+### latest price per pair; at most ``max_ui_rate`` times a second the pairs
+### that moved are re-marked and one coalesced update goes to the listeners.
+###
+### Enable it in the TUI with ``TCH_PRICE_FEED``:
+###
+###     TCH_PRICE_FEED=replay:ticks.jsonl[:speed]    (speed 0 = as fast as possible)
+###     TCH_PRICE_FEED=tcp:127.0.0.1:9000
+###
+### Tick lines are JSON (``{"pair": "BTCUSDT", "price": 61000.5}``, with an
+### optional epoch-seconds ``"time"`` used to pace replays) or ``PAIR PRICE``.
+
+import asyncio
+import json
+import os
+import threading
+from typing import NamedTuple
+
+import storage
+from core import events
+from core.calculator import trade_pnl
+
+UI_REFRESH_HZ = 4  # coalesced listener updates per second, whatever the tick rate
+REPLAY_BATCH = 1000  # ticks replayed between yields to the feed loop
+RECONNECT_DELAY = 2.0  # seconds between TCP reconnect attempts
+
+
+class Mark(NamedTuple):
+    """Unrealized PnL of an open trade at the latest price."""
+
+    price: float
+    gross_pnl: float
+    fees: float
+    net_pnl: float
+
+
+def mark(trade: dict, price: float) -> Mark:
+    """Value an open trade at ``price`` with the same fee logic as close_trade."""
+    return Mark(price, *trade_pnl(trade, price))
+
+
+def parse_tick(line: str) -> tuple[str, float, float | None]:
+    """Parse one tick line into ``(pair, price, time)``."""
+    line = line.strip()
+    if line.startswith("{"):
+        tick = json.loads(line)
+        pair = tick.get("pair") or tick["symbol"]
+        return pair.upper(), float(tick["price"]), tick.get("time")
+    pair, price = line.replace(",", " ").split()[:2]
+    return pair.upper(), float(price), None
+
+
+# ---- sources ---------------------------------------------------------------
+
+
+async def replay_source(path: str, speed: float = 0):
+    """Ticks from a file. With ``speed`` > 0, ``time`` gaps are replayed
+    ``speed`` times faster than real time; otherwise as fast as possible.
+    """
+    loop = asyncio.get_running_loop()
+    started = first = None
+    with open(path) as f:
+        for count, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            pair, price, at = parse_tick(line)
+            if speed > 0 and at is not None:
+                if first is None:
+                    started, first = loop.time(), at
+                delay = started + (at - first) / speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif count % REPLAY_BATCH == 0:
+                await asyncio.sleep(0)  # let the publisher run
+            yield pair, price
+
+
+async def tcp_source(host: str, port: int):
+    """Ticks from a line-oriented TCP stream; reconnects if it drops."""
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+        except OSError:
+            await asyncio.sleep(RECONNECT_DELAY)
+            continue
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    pair, price, _ = parse_tick(line.decode())
+                    yield pair, price
+        finally:
+            writer.close()
+        await asyncio.sleep(RECONNECT_DELAY)
+
+
+def source_from_spec(spec: str):
+    """Build a source from a ``TCH_PRICE_FEED`` value."""
+    kind, _, rest = spec.partition(":")
+    if kind == "replay":
+        path, _, speed = rest.partition(":")
+        return replay_source(path, float(speed or 0))
+    if kind == "tcp":
+        host, _, port = rest.rpartition(":")
+        return tcp_source(host or "127.0.0.1", int(port))
+    raise ValueError(f"Unknown price feed: {spec!r}")
+
+
+# ---- feed ------------------------------------------------------------------
+
+
+class PriceFeed:
+    """Latest price per pair and marks for every open trade.
+
+    Listeners are called on the feed thread with ``{trade_id: Mark}`` for
+    the trades whose pair moved since the previous update; screens hand the
+    update to the UI thread as a Textual message (``post_message`` is
+    thread-safe).
+    """
+
+    def __init__(self, source, open_trades=None, max_ui_rate: float = UI_REFRESH_HZ):
+        self.source = source
+        self.max_ui_rate = max_ui_rate
+        self.prices: dict[str, float] = {}
+        self.marks: dict[int, Mark] = {}
+        self.ticks = 0
+        self._dirty: set[str] = set()
+        self._listeners = []
+        self._tick_handlers = []
+        self._lock = threading.Lock()  # guards the open-trade index
+        self._open_by_pair: dict[str, dict[int, dict]] = {}
+        self._loop = None
+        self._task = None
+        self._thread = None
+        if open_trades is not None:
+            for t in open_trades:
+                self._track(t)
+
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def add_tick_handler(self, handler):
+        """Call ``handler(pair, price)`` on the feed thread for every tick.
+
+        Unlike listeners these are not coalesced (e.g. stop-loss checks must
+        see every price); handlers have to be cheap.
+        """
+        # Copied on write: the feed thread iterates the list without a lock
+        self._tick_handlers = [*self._tick_handlers, handler]
+
+    def remove_tick_handler(self, handler):
+        self._tick_handlers = [h for h in self._tick_handlers if h is not handler]
+
+    # ---- open trades ---------------------------------------------------
+
+    def _track(self, trade: dict):
+        self._open_by_pair.setdefault(trade["pair"], {})[trade["id"]] = trade
+        price = self.prices.get(trade["pair"])
+        if price is not None:
+            self.marks[trade["id"]] = mark(trade, price)
+
+    def _untrack(self, trade_id: int):
+        for trades in self._open_by_pair.values():
+            if trades.pop(trade_id, None) is not None:
+                break
+        self.marks.pop(trade_id, None)
+
+    def _on_trades_changed(self, change: events.TradeChange):
+        with self._lock:
+            for trade_id in change.updated + change.removed:
+                self._untrack(trade_id)
+            for trade_id in change.added + change.updated:
+                trade = storage.get_trade(trade_id)
+                if trade is not None and trade["status"] == "open":
+                    self._track(trade)
+
+    # ---- running -------------------------------------------------------
+
+    async def run(self):
+        """Consume the source until it ends or the feed is stopped."""
+        publisher = asyncio.create_task(self._publish_loop())
+        try:
+            async for pair, price in self.source:
+                self.prices[pair] = price
+                self._dirty.add(pair)
+                self.ticks += 1
+                for handler in self._tick_handlers:
+                    handler(pair, price)
+        finally:
+            publisher.cancel()
+            self.flush()
+
+    async def _publish_loop(self):
+        interval = 1 / self.max_ui_rate
+        while True:
+            await asyncio.sleep(interval)
+            self.flush()
+
+    def flush(self):
+        """Re-mark the trades on pairs that moved and notify listeners."""
+        if not self._dirty:
+            return
+        pairs, self._dirty = self._dirty, set()
+        changed = {}
+        with self._lock:
+            for pair in pairs:
+                price = self.prices[pair]
+                for trade_id, trade in self._open_by_pair.get(pair, {}).items():
+                    changed[trade_id] = self.marks[trade_id] = mark(trade, price)
+        if changed:
+            for callback in list(self._listeners):
+                callback(changed)
+
+    def start(self):
+        """Run the feed on a daemon thread with its own event loop.
+
+        The open trades are read from the store on that thread, before the
+        first tick, so starting the feed never waits on storage.
+        """
+        if self._thread is not None:
+            return
+        events.subscribe(self._on_trades_changed)
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self.run())
+
+        def main():
+            try:
+                if not self._open_by_pair:
+                    self._load_open_trades()
+                self._loop.run_until_complete(self._task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._loop.close()
+
+        self._thread = threading.Thread(target=main, name="price-feed", daemon=True)
+        self._thread.start()
+
+    def _load_open_trades(self):
+        # Under the lock, so a trade change arriving meanwhile applies after
+        with self._lock:
+            for t in storage.iter_trades(status="open"):
+                self._track(t)
+
+    def stop(self):
+        events.unsubscribe(self._on_trades_changed)
+        if self._thread is None:
+            return
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join(timeout=2)
+        self._thread = None
+
+
+_feed: PriceFeed | None = None
+
+
+def get_feed() -> PriceFeed | None:
+    """The running feed, or None when no price feed is configured."""
+    return _feed
+
+
+def start_from_env() -> PriceFeed | None:
+    """Start the feed configured by ``TCH_PRICE_FEED`` (if any)."""
+    global _feed
+    spec = os.environ.get("TCH_PRICE_FEED")
+    if _feed is None and spec:
+        _feed = PriceFeed(source_from_spec(spec))
+        _feed.start()
+    return _feed
+
+
+def stop():
+    global _feed
+    if _feed is not None:
+        _feed.stop()
+        _feed = None
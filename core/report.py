@@ -0,0 +1,87 @@
+### report.py
+### Console (Rich) report of the trade history and its analytics
+###
+###     python -m core.report
+
+from rich import box
+from rich.console import Console
+from rich.table import Table
+
+import storage
+from core import aggregates
+
+console = Console()
+
+
+HISTORY_CHUNK = 500  # rows per printed table, so printing stays bounded
+
+
+def _history_table(title: str | None, show_header: bool) -> Table:
+    # Fixed widths keep the columns aligned across chunks
+    table = Table(title=title, box=box.ROUNDED, show_header=show_header)
+    table.add_column("ID", style="cyan", justify="center", width=7)
+    table.add_column("Pair", style="magenta", width=10)
+    table.add_column("Dir", justify="center", width=5)
+    table.add_column("Status", justify="center", width=6)
+    table.add_column("Entry", width=12)
+    table.add_column("Exit", width=12)
+    table.add_column("Net PnL", justify="right", width=10)
+    table.add_column("Notes", min_width=10)
+    return table
+
+
+def view_history():
+    total_trades = storage.count_trades()
+    if not total_trades:
+        console.print("[red]No trade history found.[/red]")
+        return
+
+    # Analytics summary (running aggregates, no scan)
+    stats = aggregates.load_stats()
+    profit_factor = stats.profit_factor
+
+    console.print("\n[bold cyan]Trade Analytics[/bold cyan]")
+    console.print(f"Total trades: {total_trades}")
+    console.print(f"Closed trades: {stats.closed}")
+    console.print(f"Net PnL: {stats.net_pnl:.2f} USDT")
+    console.print(f"Win rate: {stats.win_rate:.2f}%")
+    console.print(
+        f"Profit factor: {'-' if profit_factor is None else f'{profit_factor:.2f}'}"
+    )
+    console.print(
+        f"Avg win / loss: {stats.avg_win:.2f} / {stats.avg_loss:.2f} USDT"
+        f" (largest {stats.largest_win:.2f} / {stats.largest_loss:.2f})"
+    )
+    console.print(f"Max consecutive losses: {stats.max_loss_streak}")
+    console.print(f"R multiple: {stats.r_mean:.2f} ± {stats.r_std:.2f}\n")
+
+    # Color-coded history table, streamed: one chunk of rows is held at a time
+    table = _history_table("Trade History", show_header=True)
+    for t in storage.iter_trades():
+        pnl = t.get("net_pnl")
+        if pnl is None:
+            pnl_str = "-"
+        elif pnl >= 0:
+            pnl_str = f"[green]{pnl:.2f}[/green]"
+        else:
+            pnl_str = f"[red]{pnl:.2f}[/red]"
+
+        table.add_row(
+            str(t["id"]),
+            t["pair"],
+            t["direction"].upper(),
+            t["status"],
+            str(t["entry"]),
+            str(t.get("exit_price") or "-"),
+            pnl_str,
+            str(t.get("notes") or "-"),
+        )
+        if table.row_count == HISTORY_CHUNK:
+            console.print(table)
+            table = _history_table(None, show_header=False)
+    if table.row_count:
+        console.print(table)
+
+
+if __name__ == "__main__":
+    view_history()
@@ -0,0 +1,288 @@
+### rollups.py
+### Materialized PnL rollups per day/week/month and per pair/direction
+###
+### Every closed trade is counted in one cell: its close day x "PAIR/direction".
+### Cells only hold sums (trades, wins, net PnL, fees, R), so closing a trade
+### adds to one cell and deleting it subtracts exactly - unlike the running
+### stats there is nothing to rebuild. The day cells are persisted one meta
+### document per month ("rollups.YYYY-MM", listed in the "rollups" document),
+### so a close or delete rewrites only its month; weeks and months are summed
+### from the days, so any time bucket is answered without reading a trade.
+
+import argparse
+import math
+from dataclasses import astuple, dataclass
+from datetime import date
+
+import storage
+from core.aggregates import r_multiple
+
+ROLLUPS_META = "rollups"  # {"months": [...]}: the months with a document
+GRANULARITIES = ("day", "week", "month")
+
+
+@dataclass
+class Cell:
+    """Sums over the closed trades of one bucket."""
+
+    trades: int = 0
+    wins: int = 0
+    net_pnl: float = 0.0
+    fees_paid: float = 0.0
+    r_sum: float = 0.0
+    r_count: int = 0
+
+    def add(self, trade: dict, sign: int = 1):
+        pnl = trade.get("net_pnl") or 0.0
+        self.trades += sign
+        self.wins += sign if pnl > 0 else 0
+        self.net_pnl += sign * pnl
+        self.fees_paid += sign * (trade.get("fees_paid") or 0.0)
+        r = r_multiple(trade)
+        if r is not None:
+            self.r_sum += sign * r
+            self.r_count += sign
+
+    def merge(self, other: "Cell"):
+        self.trades += other.trades
+        self.wins += other.wins
+        self.net_pnl += other.net_pnl
+        self.fees_paid += other.fees_paid
+        self.r_sum += other.r_sum
+        self.r_count += other.r_count
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.trades * 100 if self.trades else 0.0
+
+    @property
+    def avg_r(self) -> float | None:
+        return self.r_sum / self.r_count if self.r_count else None
+
+    def matches(self, other: "Cell", tol: float = 1e-6) -> bool:
+        return all(
+            math.isclose(a, b, abs_tol=tol)
+            for a, b in zip(astuple(self), astuple(other))
+        )
+
+
+def close_day(trade: dict) -> str:
+    return (trade.get("closed_at") or trade["date"])[:10]
+
+
+def period(day: str, granularity: str) -> str:
+    """The bucket of ``day`` (YYYY-MM-DD): the day, its ISO week or its month."""
+    if granularity == "day":
+        return day
+    if granularity == "week":
+        year, week, _ = date.fromisoformat(day).isocalendar()
+        return f"{year}-W{week:02d}"
+    if granularity == "month":
+        return day[:7]
+    raise ValueError(f"Unknown granularity: {granularity!r}")
+
+
+def group_key(trade: dict) -> str:
+    return f"{trade['pair']}/{trade['direction']}"
+
+
+class Rollups:
+    """Day x pair/direction cells of the closed trades."""
+
+    def __init__(self, days: dict[str, dict[str, Cell]] | None = None):
+        self.days = days if days is not None else {}
+
+    def add(self, trade: dict, sign: int = 1):
+        day, key = close_day(trade), group_key(trade)
+        cells = self.days.setdefault(day, {})
+        cell = cells.setdefault(key, Cell())
+        cell.add(trade, sign)
+        if cell.trades <= 0:
+            del cells[key]
+            if not cells:
+                del self.days[day]
+
+    def remove(self, trade: dict):
+        self.add(trade, sign=-1)
+
+    def rows(
+        self,
+        granularity: str = "day",
+        start: str | None = None,
+        end: str | None = None,
+        split: bool = True,
+    ) -> list[tuple[str, str | None, Cell]]:
+        """``(period, "PAIR/direction" or None, cell)``, newest period first.
+
+        ``start``/``end`` bound the close day (end exclusive). With ``split``
+        each period has one row per pair and direction, otherwise one total.
+        """
+        buckets: dict[tuple, Cell] = {}
+        for day, cells in self.days.items():
+            if (start is not None and day < start) or (end is not None and day >= end):
+                continue
+            bucket = period(day, granularity)
+            for key, cell in cells.items():
+                total = buckets.setdefault((bucket, key if split else None), Cell())
+                total.merge(cell)
+        ordered = sorted(buckets.items(), key=lambda item: item[0][1] or "")
+        ordered.sort(key=lambda item: item[0][0], reverse=True)
+        return [(bucket, key, cell) for (bucket, key), cell in ordered]
+
+    def total(self, start=None, end=None, pair=None, direction=None) -> Cell:
+        """Sum over close days in [start, end) for a pair and/or direction."""
+        total = Cell()
+        for day, cells in self.days.items():
+            if (start is not None and day < start) or (end is not None and day >= end):
+                continue
+            for key, cell in cells.items():
+                cell_pair, cell_direction = key.rsplit("/", 1)
+                if pair is not None and cell_pair != pair:
+                    continue
+                if direction is not None and cell_direction != direction:
+                    continue
+                total.merge(cell)
+        return total
+
+    # ---- persistence ---------------------------------------------------
+
+    def to_json(self) -> dict:
+        return {
+            "days": {
+                day: {key: list(astuple(cell)) for key, cell in cells.items()}
+                for day, cells in self.days.items()
+            }
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Rollups":
+        return cls(
+            {
+                day: {key: Cell(*values) for key, values in cells.items()}
+                for day, cells in data["days"].items()
+            }
+        )
+
+    def matches(self, other: "Rollups") -> bool:
+        """Same cells as ``other``, allowing float round-off."""
+        if self.days.keys() != other.days.keys():
+            return False
+        for day, cells in self.days.items():
+            theirs = other.days[day]
+            if cells.keys() != theirs.keys():
+                return False
+            if not all(cell.matches(theirs[key]) for key, cell in cells.items()):
+                return False
+        return True
+
+
+def month_meta(month: str) -> str:
+    """Name of the meta document holding the day cells of ``month``."""
+    return f"{ROLLUPS_META}.{month}"
+
+
+def _months() -> list[str] | None:
+    data = storage.read_meta(ROLLUPS_META)
+    if data is None or "months" not in data:
+        return None  # (or stored before they were split by month)
+    return data["months"]
+
+
+def rebuild_rollups() -> Rollups:
+    """Recompute the rollups from every closed trade and persist them."""
+    rollups = Rollups()
+    for t in storage.iter_trades(status="closed"):
+        rollups.add(t)
+    save_rollups(rollups)
+    return rollups
+
+
+def _stored_rollups() -> Rollups | None:
+    months = _months()
+    if months is None:
+        return None
+    rollups = Rollups()
+    for month in months:
+        data = storage.read_meta(month_meta(month))
+        if data is None:
+            return None
+        rollups.days.update(Rollups.from_json(data).days)
+    return rollups
+
+
+def load_rollups() -> Rollups:
+    rollups = _stored_rollups()
+    return rebuild_rollups() if rollups is None else rollups
+
+
+def save_rollups(rollups: Rollups):
+    by_month: dict[str, Rollups] = {}
+    for day, cells in rollups.days.items():
+        by_month.setdefault(day[:7], Rollups()).days[day] = cells
+    for month, days in by_month.items():
+        storage.write_meta(month_meta(month), days.to_json())
+    storage.write_meta(ROLLUPS_META, {"months": sorted(by_month)})
+
+
+def _record(trade: dict, sign: int):
+    """Apply ``trade`` to its month's document only."""
+    months = _months()
+    if months is None:
+        rebuild_rollups()  # the store already reflects the change
+        return
+    month = close_day(trade)[:7]
+    data = storage.read_meta(month_meta(month)) if month in months else None
+    rollups = Rollups.from_json(data) if data is not None else Rollups()
+    rollups.add(trade, sign)
+    storage.write_meta(month_meta(month), rollups.to_json())
+    if (month in months) != bool(rollups.days):
+        months = sorted(set(months) ^ {month})
+        storage.write_meta(ROLLUPS_META, {"months": months})
+
+
+def record_close(trade: dict):
+    """Add a freshly closed trade to its day's cell."""
+    _record(trade, 1)
+
+
+def record_delete(trade: dict):
+    """Subtract a deleted trade from its day's cell (if it was closed)."""
+    if trade["status"] == "closed":
+        _record(trade, -1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or maintain the PnL rollups.")
+    parser.add_argument(
+        "granularity", nargs="?", choices=GRANULARITIES, default="month"
+    )
+    parser.add_argument(
+        "--by-pair", action="store_true", help="split by pair/direction"
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="compare the stored rollups against a full rebuild",
+    )
+    args = parser.parse_args()
+
+    if args.verify:
+        stored = _stored_rollups()
+        rebuilt = rebuild_rollups()
+        if stored is not None and stored.matches(rebuilt):
+            print("✅ Stored rollups match a full rebuild.")
+        else:
+            print("⚠️ Stored rollups were out of date and have been rebuilt.")
+        return
+
+    for bucket, key, cell in load_rollups().rows(args.granularity, split=args.by_pair):
+        avg_r = "-" if cell.avg_r is None else f"{cell.avg_r:+.2f}R"
+        print(
+            f"{bucket:<10} {key or '':<16} {cell.trades:>6} trades"
+            f" {cell.win_rate:5.1f}% won  net {cell.net_pnl:>12.2f}"
+            f"  fees {cell.fees_paid:>10.2f}  avg {avg_r}"
+        )
+
+
+if __name__ == "__main__":
+    main()
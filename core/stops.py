@@ -0,0 +1,188 @@
+### stops.py
+### Stop-loss trigger engine: watches the stop of every open trade
+###
+### Stops are indexed per pair in two heaps: long stops as a max-heap (they
+### trigger when the price falls to them, highest first) and short stops as a
+### min-heap (they trigger when the price rises to them, lowest first). A tick
+### only looks at the top of its pair's heaps and pops the stops it crossed,
+### so it costs O(k log n) for k triggered trades instead of a scan over every
+### open trade. Closed, deleted or re-stopped trades are dropped lazily: their
+### heap entries are skipped when they surface.
+###
+###     python -m core.stops ticks.jsonl [--close]    (replay ticks against the store)
+
+import argparse
+import heapq
+import threading
+from typing import NamedTuple
+
+import storage
+from core import events
+from core.price_feed import parse_tick
+
+ACTIONS = ("alert", "close")
+
+
+class Trigger(NamedTuple):
+    trade_id: int
+    pair: str
+    direction: str
+    stop: float
+    price: float  # the tick that crossed the stop
+
+
+class StopEngine:
+    """Open trades' stop levels, indexed for per-tick trigger checks."""
+
+    def __init__(self, open_trades=()):
+        self._long: dict[str, list] = {}  # pair -> heap of (-stop, id)
+        self._short: dict[str, list] = {}  # pair -> heap of (stop, id)
+        self._live: dict[int, tuple] = {}  # id -> (pair, direction, stop)
+        self._lock = threading.Lock()
+        for t in open_trades:
+            self.track(t)
+
+    def __len__(self):
+        return len(self._live)
+
+    def track(self, trade: dict):
+        """Watch an open trade's stop (replacing any earlier one)."""
+        stop = trade.get("stop_loss")
+        if trade.get("status", "open") != "open" or stop is None:
+            self.untrack(trade["id"])
+            return
+        key = (trade["pair"], trade["direction"], stop)
+        with self._lock:
+            if self._live.get(trade["id"]) == key:
+                return
+            self._live[trade["id"]] = key
+            if trade["direction"] == "long":
+                heapq.heappush(self._long.setdefault(key[0], []), (-stop, trade["id"]))
+            else:
+                heapq.heappush(self._short.setdefault(key[0], []), (stop, trade["id"]))
+
+    def untrack(self, trade_id: int):
+        with self._lock:
+            self._live.pop(trade_id, None)  # heap entry is skipped later
+
+    def on_tick(self, pair: str, price: float) -> list[Trigger]:
+        """Pop and return the trades whose stop this tick crossed."""
+        triggered = []
+        with self._lock:
+            heap = self._long.get(pair)
+            while heap and -heap[0][0] >= price:
+                neg_stop, trade_id = heapq.heappop(heap)
+                if self._live.get(trade_id) == (pair, "long", -neg_stop):
+                    del self._live[trade_id]
+                    triggered.append(Trigger(trade_id, pair, "long", -neg_stop, price))
+            heap = self._short.get(pair)
+            while heap and heap[0][0] <= price:
+                stop, trade_id = heapq.heappop(heap)
+                if self._live.get(trade_id) == (pair, "short", stop):
+                    del self._live[trade_id]
+                    triggered.append(Trigger(trade_id, pair, "short", stop, price))
+        return triggered
+
+    def on_trades_changed(self, change: events.TradeChange):
+        """Keep the index in step with opens, closes and deletes."""
+        for trade_id in change.removed:
+            self.untrack(trade_id)
+        for trade_id in change.added + change.updated:
+            trade = storage.get_trade(trade_id)
+            if trade is None:
+                self.untrack(trade_id)
+            else:
+                self.track(trade)
+
+    def replay(self, path: str, on_trigger=None) -> list[Trigger]:
+        """Feed every tick of a replay file through the engine."""
+        triggered = []
+        with open(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                pair, price, _ = parse_tick(line)
+                hits = self.on_tick(pair, price)
+                if hits:
+                    triggered.extend(hits)
+                    if on_trigger is not None:
+                        on_trigger(hits)
+        return triggered
+
+
+def close_at_stop(trigger: Trigger):
+    """Auto-close action: close the trade at its stop price."""
+    from core.trades import close_trade
+
+    return close_trade(trigger.trade_id, trigger.stop, notes="Stop loss hit")
+
+
+_engine: StopEngine | None = None
+_attached: tuple | None = None  # (feed, tick handler) while started
+
+
+def get_engine() -> StopEngine | None:
+    return _engine
+
+
+def start(feed, on_trigger) -> StopEngine:
+    """Watch the open trades' stops on every tick of a running price feed.
+
+    ``on_trigger(list[Trigger])`` is called on the feed thread.
+    """
+    global _engine, _attached
+    stop()
+    engine = StopEngine()
+    events.subscribe(engine.on_trades_changed)
+    loaded = False
+
+    def on_tick(pair, price):
+        nonlocal loaded
+        if not loaded:
+            # The open trades are read on the feed thread, not the caller's
+            # (the UI thread): before the first tick needs them
+            for t in storage.iter_trades(status="open"):
+                engine.track(t)
+            loaded = True
+        # Bound to this engine, not the global: stop() may run in between
+        hits = engine.on_tick(pair, price)
+        if hits:
+            on_trigger(hits)
+
+    feed.add_tick_handler(on_tick)
+    _engine, _attached = engine, (feed, on_tick)
+    return engine
+
+
+def stop():
+    """Detach the engine from the feed and from trade events."""
+    global _engine, _attached
+    if _attached is not None:
+        feed, on_tick = _attached
+        feed.remove_tick_handler(on_tick)
+        _attached = None
+    if _engine is not None:
+        events.unsubscribe(_engine.on_trades_changed)
+        _engine = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay ticks against open stops.")
+    parser.add_argument("ticks", help="tick replay file (JSON lines or PAIR PRICE)")
+    parser.add_argument(
+        "--close", action="store_true", help="close triggered trades at their stop"
+    )
+    args = parser.parse_args()
+
+    engine = StopEngine(storage.iter_trades(status="open"))
+    for hit in engine.replay(args.ticks):
+        print(
+            f"🛑 Trade {hit.trade_id} {hit.pair} {hit.direction.upper()}"
+            f" stop {hit.stop} hit at {hit.price}"
+        )
+        if args.close:
+            close_at_stop(hit)
+
+
+if __name__ == "__main__":
+    main()
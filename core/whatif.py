@@ -0,0 +1,59 @@
+### whatif.py
+### Position sizing what-if grid: (risk %, stop distance %) -> size, leverage, fees
+
+import functools
+
+from core.calculator import calculate_quantity_batch
+
+RISK_STEPS = (0.5, 1.0, 1.5, 2.0, 2.5, 3.0)  # risk % rows
+STOP_STEPS = (0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0)  # stop distance % of entry columns
+CACHE_SIZE = 256
+SIGNIFICANT_DIGITS = 6  # inputs are rounded to this before the cache lookup
+
+
+def _round(value: float) -> float:
+    return float(f"{value:.{SIGNIFICANT_DIGITS}g}")
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _grid(account_size, entry, direction, risk_steps, stop_steps):
+    import numpy as np
+
+    risk = np.array(risk_steps)[:, None]
+    distance = np.array(stop_steps)[None, :] / 100
+    side = -1 if direction == "long" else 1
+    stop_loss = entry * (1 + side * distance)
+    grid = calculate_quantity_batch(account_size, risk, entry, stop_loss)
+    grid["stop_loss"] = np.broadcast_to(stop_loss, grid["quantity"].shape)
+    for values in grid.values():
+        values.flags.writeable = False  # shared by every cache hit
+    return grid
+
+
+def whatif_grid(
+    account_size: float,
+    entry: float,
+    direction: str = "long",
+    risk_steps=RISK_STEPS,
+    stop_steps=STOP_STEPS,
+) -> dict:
+    """calculate_quantity over every (risk %, stop distance %) combination.
+
+    Returns the calculate_quantity_batch arrays (rows: ``risk_steps``,
+    columns: ``stop_steps``) plus the ``stop_loss`` price of each column.
+    Results are memoized on the rounded inputs, so re-rendering while the
+    user types does not recompute unchanged grids. The arrays are read-only.
+    """
+    if account_size <= 0 or entry <= 0:
+        raise ValueError("Account size and entry must be positive.")
+    return _grid(
+        _round(account_size),
+        _round(entry),
+        direction,
+        tuple(risk_steps),
+        tuple(stop_steps),
+    )
+
+
+def cache_info():
+    return _grid.cache_info()
@@ -1,13 +1,27 @@
-from .close_trade_screen import CloseTradeScreen
-from .input_exit_data_screen import InputExitDataScreen
-from .open_trade_screen import OpenTradeScreen
-from .popup_message import PopupMessage
-from .view_history_screen import ViewHistoryScreen
-
-__all__ = [
-    "OpenTradeScreen",
-    "InputExitDataScreen",
-    "CloseTradeScreen",
-    "PopupMessage",
-    "ViewHistoryScreen",
-]
+import importlib
+
+# Screens are imported on first use (``from screens import X`` still works),
+# so starting the app only pays for the screens that are actually opened.
+_SCREENS = {
+    "OpenTradeScreen": ".open_trade_screen",
+    "InputExitDataScreen": ".input_exit_data_screen",
+    "CloseTradeScreen": ".close_trade_screen",
+    "PerfScreen": ".perf_screen",
+    "PopupMessage": ".popup_message",
+    "RollupScreen": ".rollup_screen",
+    "ViewHistoryScreen": ".view_history_screen",
+}
+
+__all__ = list(_SCREENS)
+
+
+def __getattr__(name: str):
+    if name not in _SCREENS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_SCREENS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
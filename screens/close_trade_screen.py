@@ -1,12 +1,19 @@
 from textual.screen import Screen
 from textual.widgets import Button, Label, ListItem, ListView
 
+from core import events, perf
 from screens.input_exit_data_screen import InputExitDataScreen
+from screens.live_marks import LiveMarks
 from screens.popup_message import PopupMessage
+from screens.storage_workers import StorageWorkers
 
 
-class CloseTradeScreen(Screen):
-    """Screen to close an existing trade."""
+class CloseTradeScreen(StorageWorkers, LiveMarks, Screen):
+    """Screen to close an existing trade.
+
+    With a price feed running, each open trade shows its unrealized PnL.
+    The open trades load on a worker thread behind a loading indicator.
+    """
 
     BINDINGS = [("b", "back", "Back")]
 
@@ -16,17 +23,76 @@ class CloseTradeScreen(Screen):
         yield Button("Select Trade to Close", id="select")
         yield Button("Back", id="back")
 
+    @perf.timed("screen.close.mount")
     def on_mount(self):
+        self.open_trades = []
+        self.loaded = False
         self.refresh_trades()
+        # Closes and deletes made elsewhere arrive as change events, so
+        # resuming the screen needs no reload
+        self.watch_trades()
+        self.watch_marks()
 
-    def on_resume(self) -> None:
-        self.refresh_trades()
+    def on_unmount(self):
+        self.unwatch_trades()
+        self.unwatch_marks()
+
+    def apply_marks(self, marks: dict):
+        for index, t in enumerate(self.open_trades):
+            m = marks.get(t["id"])
+            if m is not None:
+                item = self.list_view.children[index]
+                item.query_one(Label).update(self._label(t, m))
+
+    def apply_change(self, change: events.TradeChange, trades: dict):
+        """Add/remove single list items for trades that opened or closed."""
+        if not self.loaded:
+            # The pending load may predate this change: load again
+            self.refresh_trades()
+            return
+
+        for trade_id in change.updated + change.removed:
+            ids = [t["id"] for t in self.open_trades]
+            if trade_id in ids:
+                trade = trades.get(trade_id)
+                if trade is None or trade["status"] != "open":
+                    index = ids.index(trade_id)
+                    del self.open_trades[index]
+                    self.list_view.pop(index)
+                    if not self.open_trades:
+                        self.list_view.append(ListItem(Label("No open trades found.")))
+
+        for trade_id in change.added:
+            trade = trades.get(trade_id)
+            if trade is not None and trade["status"] == "open":
+                if not self.open_trades:
+                    self.list_view.clear()  # drop the "No open trades" item
+                self.open_trades.append(trade)
+                self.list_view.append(
+                    ListItem(Label(self._label(trade, self.current_mark(trade_id))))
+                )
+
+    @staticmethod
+    def _label(t: dict, mark=None) -> str:
+        label = f"[{t['id']}] {t['pair']} {t['direction'].upper()} @ {t['entry']}"
+        if mark is not None:
+            label += (
+                f" • last {mark.price} • uPnL {mark.gross_pnl:+.2f}"
+                f" ({mark.net_pnl:+.2f} after fees)"
+            )
+        return label
 
     def refresh_trades(self):
-        """Load the latest trades and repopulate the list view."""
+        """Load the latest trades in the background, then repopulate the list."""
         from core.trades import get_open_trades
 
-        self.open_trades = get_open_trades()
+        self.loaded = False
+        self.run_read(get_open_trades, done=self._show_trades, busy=self.list_view)
+
+    @perf.timed("screen.close.reload")
+    def _show_trades(self, open_trades: list):
+        self.open_trades = open_trades
+        self.loaded = True
         self.list_view.clear()
 
         if not self.open_trades:
@@ -34,13 +100,14 @@ class CloseTradeScreen(Screen):
             return
 
         for t in self.open_trades:
-            label = f"[{t['id']}] {t['pair']} {t['direction'].upper()} @ {t['entry']}"
-            self.list_view.append(ListItem(Label(label)))
+            self.list_view.append(
+                ListItem(Label(self._label(t, self.current_mark(t["id"]))))
+            )
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "select":
             trade_index = self.list_view.index
-            if trade_index is None:
+            if trade_index is None or trade_index >= len(self.open_trades):
                 self.mount(
                     PopupMessage(
                         "❌ No trade selected.",
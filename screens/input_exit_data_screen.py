@@ -3,10 +3,14 @@ from textual.widgets import Button, Input, Static
 
 from core.trades import close_trade
 from screens.popup_message import PopupMessage
+from screens.storage_workers import StorageWorkers
 
 
-class InputExitDataScreen(Screen):
-    """Screen to enter exit data for closing a trade."""
+class InputExitDataScreen(StorageWorkers, Screen):
+    """Screen to enter exit data for closing a trade.
+
+    The close is queued on the storage writer; its result shows when it lands.
+    """
 
     def __init__(self, trade):
         super().__init__()
@@ -27,60 +31,6 @@ class InputExitDataScreen(Screen):
         if event.button.id == "submit":
             try:
                 exit_price = float(self.exit_input.value)
-                notes = self.notes_input.value.strip() or ""
-
-                closed_trade = close_trade(
-                    trade_id=self.trade["id"], exit_price=exit_price, notes=notes
-                )
-
-                if closed_trade:
-                    pnl = closed_trade.get("pnl", 0)
-                    gross = closed_trade.get("gross_pnl", 0)
-                    fees = closed_trade.get("fees_paid", 0)
-
-                    if pnl > 0:
-                        style = "bold white on green"
-                        emoji = "🚀"
-                        result_text = f"Profitable trade!: +${pnl:.2f} (Gross: +${gross:.2f}, Fees: -${fees:.2f})"
-                    elif pnl < 0:
-                        style = "bold white on red"
-                        emoji = "💀"
-                        result_text = f"Losing trade: -${-pnl:.2f} (Gross: -${-gross:.2f}, Fees: -${fees:.2f})"
-                    else:
-                        style = "bold white on yellow"
-                        emoji = "😐"
-                        result_text = f"Breakeven trade: $0.00 (Gross: ${gross:.2f}, Fees: -${fees:.2f})"
-
-                    # --- Summary Message ---
-                    msg = (
-                        f"{emoji} {result_text}\n\n"
-                        f"Pair: {closed_trade['pair']} ({closed_trade['direction'].upper()})\n"
-                        f"Entry: {closed_trade['entry']:.4f}\n"
-                        f"Exit: {closed_trade['exit_price']:.4f}\n"
-                        f"Quantity: {closed_trade.get('quantity', '-')}\n\n"
-                        f"Gross PnL: {gross:.2f} USDT\n"
-                        f"Fees Paid: {fees:.2f} USDT\n"
-                        f"Net PnL: {pnl:.2f} USDT\n\n"
-                        f"{'🟢 Well done!' if pnl > 0 else '🔴 Review your Strategies.' if pnl < 0 else '🟡 Flat outcome — good discipline!'}"
-                    )
-
-                    popup = PopupMessage(msg, style=style, auto_close=None)
-                    self.mount(popup)
-
-                    # def return_to_menu():
-                    #     self.app.pop_screen()  # Pop the popup message
-                    #     self.app.pop_screen()  # Return to menu
-
-                    # popup.set_timer(0.2, return_to_menu)
-
-                else:
-                    self.mount(
-                        PopupMessage(
-                            "❌ Trade not found.",
-                            style="bold white on red",
-                            auto_close=3,
-                        )
-                    )
             except ValueError as e:
                 self.mount(
                     PopupMessage(
@@ -89,5 +39,63 @@ class InputExitDataScreen(Screen):
                         auto_close=3,
                     )
                 )
+                return
+            notes = self.notes_input.value.strip() or ""
+
+            # One close per submit: re-enabled once this one has landed
+            event.button.disabled = True
+            self.run_write(
+                close_trade,
+                self.trade["id"],
+                exit_price,
+                notes,
+                done=self._show_closed,
+            )
         elif event.button.id == "back":
             self.app.pop_screen()
+
+    def _show_closed(self, closed_trade):
+        self.query_one("#submit", Button).disabled = False
+        if not closed_trade:
+            self.mount(
+                PopupMessage(
+                    "❌ Trade not found.",
+                    style="bold white on red",
+                    auto_close=3,
+                )
+            )
+            return
+
+        pnl = closed_trade.get("net_pnl", 0)
+        gross = closed_trade.get("gross_pnl", 0)
+        fees = closed_trade.get("fees_paid", 0)
+
+        if pnl > 0:
+            style = "bold white on green"
+            emoji = "🚀"
+            result_text = f"Profitable trade!: +${pnl:.2f} (Gross: +${gross:.2f}, Fees: -${fees:.2f})"
+        elif pnl < 0:
+            style = "bold white on red"
+            emoji = "💀"
+            result_text = f"Losing trade: -${-pnl:.2f} (Gross: -${-gross:.2f}, Fees: -${fees:.2f})"
+        else:
+            style = "bold white on yellow"
+            emoji = "😐"
+            result_text = (
+                f"Breakeven trade: $0.00 (Gross: ${gross:.2f}, Fees: -${fees:.2f})"
+            )
+
+        # --- Summary Message ---
+        msg = (
+            f"{emoji} {result_text}\n\n"
+            f"Pair: {closed_trade['pair']} ({closed_trade['direction'].upper()})\n"
+            f"Entry: {closed_trade['entry']:.4f}\n"
+            f"Exit: {closed_trade['exit_price']:.4f}\n"
+            f"Quantity: {closed_trade.get('quantity', '-')}\n\n"
+            f"Gross PnL: {gross:.2f} USDT\n"
+            f"Fees Paid: {fees:.2f} USDT\n"
+            f"Net PnL: {pnl:.2f} USDT\n\n"
+            f"{'🟢 Well done!' if pnl > 0 else '🔴 Review your Strategies.' if pnl < 0 else '🟡 Flat outcome — good discipline!'}"
+        )
+
+        self.mount(PopupMessage(msg, style=style, auto_close=None))
@@ -0,0 +1,46 @@
+# screens/live_marks.py
+from textual.message import Message
+
+from core import price_feed
+
+
+class MarksUpdated(Message):
+    """Coalesced unrealized PnL update from the price feed."""
+
+    def __init__(self, marks: dict):
+        super().__init__()
+        self.marks = marks  # trade id -> price_feed.Mark
+
+
+class LiveMarks:
+    """Screen mixin that receives price-feed marks on the UI thread.
+
+    The feed calls back on its own thread; ``post_message`` is thread-safe,
+    so the update is queued for the screen without blocking the feed.
+    Screens call ``watch_marks``/``unwatch_marks`` on mount/unmount and
+    implement ``apply_marks``.
+    """
+
+    def watch_marks(self):
+        feed = price_feed.get_feed()
+        if feed is not None:
+            feed.subscribe(self._post_marks)
+
+    def unwatch_marks(self):
+        feed = price_feed.get_feed()
+        if feed is not None:
+            feed.unsubscribe(self._post_marks)
+
+    def current_mark(self, trade_id: int):
+        """Latest mark for an open trade, or None without a price."""
+        feed = price_feed.get_feed()
+        return None if feed is None else feed.marks.get(trade_id)
+
+    def _post_marks(self, marks: dict):
+        self.post_message(MarksUpdated(marks))
+
+    def on_marks_updated(self, message: MarksUpdated):
+        self.apply_marks(message.marks)
+
+    def apply_marks(self, marks: dict):
+        raise NotImplementedError
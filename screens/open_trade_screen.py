@@ -1,12 +1,40 @@
+import functools
+
+from rich.table import Table
+from rich.text import Text
 from textual.screen import Screen
 from textual.widgets import Button, Input, Static
 
+from core import perf
+from core.calculator import calculate_quantity
 from core.trades import open_trade
+from core.whatif import RISK_STEPS, STOP_STEPS, whatif_grid
 from screens.popup_message import PopupMessage
+from screens.storage_workers import StorageWorkers
+
+# Leverage bands shared by the confirmation popup and the what-if heatmap
+POPUP_STYLES = {
+    "green": "bold white on green",
+    "yellow": "bold black on yellow",
+    "red": "bold white on red",
+}
+
+
+def leverage_band(lev: float) -> str:
+    if lev <= 3:
+        return "green"
+    elif lev <= 10:
+        return "yellow"
+    return "red"
 
 
-class OpenTradeScreen(Screen):
-    """Screen to open a new trade."""
+class OpenTradeScreen(StorageWorkers, Screen):
+    """Screen to open a new trade.
+
+    While the inputs are edited a what-if grid shows quantity and leverage
+    for a range of risk % and stop distances. Nothing is saved until the
+    trade is confirmed with Y; the save is queued on the storage writer.
+    """
 
     BINDINGS = [("b", "back", "Back")]
 
@@ -28,42 +56,85 @@ class OpenTradeScreen(Screen):
         yield self.stop_input
         yield self.dir_input
 
+        yield Static(id="whatif")
         yield Button("Submit", id="submit")
         yield Button("Back", id="back")
 
+    @perf.timed("screen.open.mount")
+    def on_mount(self):
+        self._refresh_whatif()
+
+    def on_input_changed(self, event: Input.Changed):
+        self._refresh_whatif()
+
+    @perf.timed("screen.open.whatif")
+    def _refresh_whatif(self):
+        """Re-render the what-if grid (memoized, so typing stays responsive)."""
+        panel = self.query_one("#whatif", Static)
+        try:
+            account_size = float(self.account_input.value)
+            entry = float(self.entry_input.value)
+            grid = whatif_grid(account_size, entry, self._direction())
+        except ValueError:
+            panel.update(
+                "💡 Enter account size and entry price to see the what-if grid."
+            )
+            return
+
+        table = Table(title="What-if: quantity • leverage", title_justify="left")
+        table.add_column("Risk % \\ Stop")
+        for step, stop in zip(STOP_STEPS, grid["stop_loss"][0]):
+            table.add_column(f"{step:g}% ({stop:.6g})", justify="right")
+        for i, risk in enumerate(RISK_STEPS):
+            cells = []
+            for j in range(len(STOP_STEPS)):
+                lev = float(grid["required_leverage"][i, j])
+                cells.append(
+                    Text(
+                        f"{grid['quantity'][i, j]:.4g} • {lev:.1f}×",
+                        style=f"black on {leverage_band(lev)}",
+                    )
+                )
+            table.add_row(f"{risk:g}%", *cells)
+
+        table.caption = self._current_sizing(account_size, entry)
+        panel.update(table)
+
+    def _current_sizing(self, account_size: float, entry: float) -> str:
+        """Sizing for the exact risk % and stop entered, if any."""
+        try:
+            risk_pct = float(self.risk_input.value)
+            stop_loss = float(self.stop_input.value)
+            r = calculate_quantity(account_size, risk_pct, entry, stop_loss)
+        except ValueError:
+            return "Order value, fees: enter a risk % and stop loss"
+        return (
+            f"Your inputs → quantity {r['quantity']:.4f} • "
+            f"order value {r['order_value']:.2f} USDT • "
+            f"leverage {r['required_leverage']:.1f}× • "
+            f"fees maker {r['maker_fee']:.4f} / taker {r['taker_fee']:.4f}"
+        )
+
+    def _direction(self) -> str:
+        return "short" if self.dir_input.value.strip().lower() == "short" else "long"
+
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "submit":
             try:
-                trade = open_trade(
-                    pair=self.pair_input.value.strip().upper(),
-                    direction=self.dir_input.value.strip().lower(),
-                    account_size=float(self.account_input.value),
-                    risk_pct=float(self.risk_input.value),
-                    entry=float(self.entry_input.value),
-                    stop_loss=float(self.stop_input.value),
-                )
-
-                lev = trade["required_leverage"]
-                if lev <= 3:
-                    style = "bold white on green"
-                elif 3 < lev <= 10:
-                    style = "bold black on yellow"
-                else:
-                    style = "bold white on red"
-
-                # Build summary message
-                msg = (
-                    f"\n\n✅ Trade added to the list, input the following Quantity\n\n"
-                    f"Pair: {trade['pair']} ({trade['direction'].upper()})\n"
-                    f"Quantity: {trade['quantity']:.4f}\n"
-                    f"Order value: {trade['order_value']:.2f} USDT\n"
-                    f"Required Leverage: {lev:.1f}x"
-                    f"Risk per trade: {trade['risk_amount']:.2f} USDT\n"
-                    f"{trade['leverage_note']}\n\n"
-                    f"Fees → Maker: {trade['maker_fee']:.4f} | Taker: {trade['taker_fee']:.4f}"
+                pending = {
+                    "pair": self.pair_input.value.strip().upper(),
+                    "direction": self.dir_input.value.strip().lower(),
+                    "account_size": float(self.account_input.value),
+                    "risk_pct": float(self.risk_input.value),
+                    "entry": float(self.entry_input.value),
+                    "stop_loss": float(self.stop_input.value),
+                }
+                preview = calculate_quantity(
+                    pending["account_size"],
+                    pending["risk_pct"],
+                    pending["entry"],
+                    pending["stop_loss"],
                 )
-
-                self.mount(PopupMessage(msg, style=style))
             except ValueError as e:
                 self.mount(
                     PopupMessage(
@@ -71,5 +142,60 @@ class OpenTradeScreen(Screen):
                         style="bold white on red",
                     )
                 )
+                return
+
+            # Confirm before anything is written
+            self.pending_trade = pending
+            lev = preview["required_leverage"]
+            self.confirm_popup = PopupMessage(
+                f"Open {pending['pair']} {pending['direction'].upper()}"
+                f" • quantity {preview['quantity']:.4f}"
+                f" • {lev:.1f}× leverage? (Y/N)",
+                style=POPUP_STYLES[leverage_band(lev)],
+            )
+            self.mount(self.confirm_popup)
+            event.button.focus()  # so Y/N is not typed into an input
         elif event.button.id == "back":
             self.app.pop_screen()
+
+    def on_key(self, event):
+        """Listen for Y/N confirmation when popup is active."""
+        if not hasattr(self, "pending_trade"):
+            return
+
+        key = event.key.lower()
+        if key not in ("y", "n"):
+            return
+        event.stop()
+        pending = self.pending_trade
+        del self.pending_trade
+        self.confirm_popup.remove()
+
+        if key == "n":
+            self.mount(
+                PopupMessage(
+                    "❎ Trade not opened.",
+                    style="bold white on yellow",
+                    auto_close=2,
+                )
+            )
+            return
+
+        self.run_write(functools.partial(open_trade, **pending), done=self._show_opened)
+
+    def _show_opened(self, trade: dict):
+        lev = trade["required_leverage"]
+
+        # Build summary message
+        msg = (
+            f"\n\n✅ Trade added to the list, input the following Quantity\n\n"
+            f"Pair: {trade['pair']} ({trade['direction'].upper()})\n"
+            f"Quantity: {trade['quantity']:.4f}\n"
+            f"Order value: {trade['order_value']:.2f} USDT\n"
+            f"Required Leverage: {lev:.1f}x"
+            f"Risk per trade: {trade['risk_amount']:.2f} USDT\n"
+            f"{trade['leverage_note']}\n\n"
+            f"Fees → Maker: {trade['maker_fee']:.4f} | Taker: {trade['taker_fee']:.4f}"
+        )
+
+        self.mount(PopupMessage(msg, style=POPUP_STYLES[leverage_band(lev)]))
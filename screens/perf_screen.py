@@ -0,0 +1,60 @@
+from textual.screen import Screen
+from textual.widgets import Button, DataTable, Static
+
+from core import perf
+
+REFRESH_SECONDS = 1.0
+
+COLUMNS = [
+    ("Operation", None),
+    ("Count", "count"),
+    ("Total ms", "total_ms"),
+    ("Mean ms", "mean_ms"),
+    ("p50 ms", "p50_ms"),
+    ("p95 ms", "p95_ms"),
+    ("p99 ms", "p99_ms"),
+    ("Max ms", "max_ms"),
+]
+
+
+class PerfScreen(Screen):
+    """Live view of the ``core.perf`` timing registry (hidden, F12)."""
+
+    BINDINGS = [
+        ("b", "back", "Back"),
+        ("r", "reset", "Reset"),
+    ]
+
+    def compose(self):
+        yield Static("⏱️ Performance (slowest total first • R reset • B back)")
+        yield DataTable(id="perf_table", zebra_stripes=True)
+        yield Button("Back", id="back")
+
+    def on_mount(self):
+        table = self.query_one("#perf_table", DataTable)
+        for label, _ in COLUMNS:
+            table.add_column(label)
+        table.cursor_type = "row"
+        self.refresh_stats()
+        self.set_interval(REFRESH_SECONDS, self.refresh_stats)
+
+    def refresh_stats(self):
+        table = self.query_one("#perf_table", DataTable)
+        table.clear()
+        for name, summary in perf.snapshot().items():
+            table.add_row(
+                name,
+                str(summary["count"]),
+                *(f"{summary[key]:.2f}" for _, key in COLUMNS[2:]),
+            )
+
+    def action_reset(self):
+        perf.reset()
+        self.refresh_stats()
+
+    def action_back(self):
+        self.app.pop_screen()
+
+    def on_button_pressed(self, event: Button.Pressed):
+        if event.button.id == "back":
+            self.app.pop_screen()
@@ -0,0 +1,107 @@
+from textual.screen import Screen
+from textual.widgets import Button, DataTable, Static
+
+from core import events, perf
+from core.rollups import Rollups, load_rollups
+from screens.storage_workers import StorageWorkers
+
+COLUMNS = ["Period", "Pair", "Dir", "Trades", "Win %", "Net PnL", "Fees", "Avg R"]
+
+
+def rollup_cells(bucket: str, key: str | None, cell) -> tuple:
+    pair, direction = key.rsplit("/", 1) if key else ("all", "-")
+    return (
+        bucket,
+        pair,
+        direction.upper(),
+        str(cell.trades),
+        f"{cell.win_rate:.1f}",
+        f"{cell.net_pnl:.2f}",
+        f"{cell.fees_paid:.2f}",
+        "-" if cell.avg_r is None else f"{cell.avg_r:+.2f}",
+    )
+
+
+class RollupScreen(StorageWorkers, Screen):
+    """PnL per day, week or month, optionally split by pair and direction.
+
+    Rows come from the materialized rollups (``core.rollups``), so switching
+    buckets never reads a trade; closes and deletes elsewhere reload them.
+    """
+
+    BINDINGS = [
+        ("d", "granularity('day')", "Day"),
+        ("w", "granularity('week')", "Week"),
+        ("m", "granularity('month')", "Month"),
+        ("p", "toggle_split", "Split by pair"),
+        ("b", "back", "Back"),
+    ]
+
+    def __init__(self):
+        super().__init__()
+        self.rollups = Rollups()
+        self.granularity = "month"
+        self.split = True
+
+    def compose(self):
+        yield Static(
+            "📅 PnL Rollups (D day • W week • M month • P split by pair • B back)"
+        )
+        yield Static(id="rollup_summary")
+        yield DataTable(id="rollup_table", zebra_stripes=True)
+        yield Button("Back", id="back")
+
+    def on_mount(self):
+        table = self.query_one("#rollup_table", DataTable)
+        for label in COLUMNS:
+            table.add_column(label)
+        table.cursor_type = "row"
+        self.reload()
+        self.watch_trades()
+
+    def on_unmount(self):
+        self.unwatch_trades()
+
+    def apply_change(self, change: events.TradeChange, trades: dict):
+        self.reload()
+
+    def reload(self):
+        table = self.query_one("#rollup_table", DataTable)
+        self.run_read(load_rollups, done=self._show_rollups, busy=table)
+
+    def _show_rollups(self, rollups: Rollups):
+        self.rollups = rollups
+        self.render_rows()
+
+    @perf.timed("screen.rollup.render")
+    def render_rows(self):
+        table = self.query_one("#rollup_table", DataTable)
+        table.clear()
+        rows = self.rollups.rows(self.granularity, split=self.split)
+        for bucket, key, cell in rows:
+            table.add_row(*rollup_cells(bucket, key, cell))
+        if not rows:
+            table.add_row("-", "No closed trades", *["-"] * (len(COLUMNS) - 2))
+
+        total = self.rollups.total()
+        avg_r = "-" if total.avg_r is None else f"{total.avg_r:+.2f}R"
+        self.query_one("#rollup_summary", Static).update(
+            f"By {self.granularity}{' and pair' if self.split else ''} • "
+            f"All time: {total.trades} trades • Net PnL: {total.net_pnl:.2f} USDT • "
+            f"Fees: {total.fees_paid:.2f} • Avg R: {avg_r}"
+        )
+
+    def action_granularity(self, granularity: str):
+        self.granularity = granularity
+        self.render_rows()
+
+    def action_toggle_split(self):
+        self.split = not self.split
+        self.render_rows()
+
+    def action_back(self):
+        self.app.pop_screen()
+
+    def on_button_pressed(self, event: Button.Pressed):
+        if event.button.id == "back":
+            self.app.pop_screen()
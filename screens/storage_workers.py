@@ -0,0 +1,121 @@
+# screens/storage_workers.py
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from textual.message import Message
+
+import storage
+from core import events
+from screens.popup_message import PopupMessage
+
+# Every screen's writes go through this one thread, in submission order
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage-write")
+
+
+def submit_write(func, *args):
+    """Queue ``func(*args)`` on the writer thread; returns an awaitable result."""
+    # Shielded: cancelling the awaiting worker must not drop the queued write
+    return asyncio.shield(asyncio.wrap_future(_writer.submit(func, *args)))
+
+
+class TradesChanged(Message):
+    """A ``core.events`` change, delivered on the UI thread."""
+
+    def __init__(self, change: events.TradeChange, trades: dict):
+        super().__init__()
+        self.change = change
+        self.trades = trades  # added/updated id -> trade (None if gone)
+
+
+class StorageWorkers:
+    """Screen (or App) mixin that keeps storage calls off the UI thread.
+
+    ``run_read`` runs a read on a worker thread while ``busy`` shows a
+    loading indicator (until every read using it has finished or been
+    cancelled); a newer read in the same ``group`` replaces an older one. ``run_write`` queues a mutation on the single storage writer thread,
+    so writes apply in the order they were made. Both hand the result to ``done`` on the UI
+    thread, and both are Textual workers owned by the screen: leaving the
+    screen cancels them, so their ``done`` never runs (a write that already
+    started still completes).
+
+    Mutations emit their change events on the writer thread; ``watch_trades``
+    forwards them as ``TradesChanged`` messages together with the changed
+    trades (read there, so applying a change needs no storage call on the UI
+    thread). Posting a message is thread-safe and never blocks the writer.
+    Screens implement ``apply_change``.
+    """
+
+    def run_read(self, func, *args, done, busy=None, group="storage-read"):
+        return self.run_worker(
+            functools.partial(self._read, func, args, done, busy),
+            group=group,
+            exclusive=True,
+            exit_on_error=False,
+        )
+
+    def run_write(self, func, *args, done=None):
+        pending = submit_write(func, *args)
+        return self.run_worker(
+            functools.partial(self._write, pending, done),
+            group="storage-write",
+            exit_on_error=False,
+        )
+
+    async def _read(self, func, args, done, busy):
+        self._set_busy(busy, 1)
+        try:
+            result = await asyncio.to_thread(func, *args)
+        except Exception as e:
+            self.storage_failed(e)
+            return
+        finally:
+            self._set_busy(busy, -1)
+        done(result)
+
+    def _set_busy(self, busy, step: int):
+        """Show ``busy`` as loading while any read for it is in flight."""
+        if busy is None:
+            return
+        if not hasattr(self, "_busy_reads"):
+            self._busy_reads = {}
+        count = self._busy_reads.get(busy, 0) + step
+        if count:
+            self._busy_reads[busy] = count
+        else:
+            self._busy_reads.pop(busy, None)
+        busy.loading = count > 0
+
+    async def _write(self, pending, done):
+        try:
+            result = await pending
+        except Exception as e:
+            self.storage_failed(e)
+            return
+        if done is not None:
+            done(result)
+
+    def storage_failed(self, error: Exception):
+        self.screen.mount(
+            PopupMessage(
+                f"❌ Storage error: {error}", style="bold white on red", auto_close=5
+            )
+        )
+
+    # ---- change events -------------------------------------------------
+
+    def watch_trades(self):
+        events.subscribe(self._post_change)
+
+    def unwatch_trades(self):
+        events.unsubscribe(self._post_change)
+
+    def _post_change(self, change: events.TradeChange):
+        trades = {i: storage.get_trade(i) for i in change.added + change.updated}
+        self.post_message(TradesChanged(change, trades))
+
+    def on_trades_changed(self, message: TradesChanged):
+        self.apply_change(message.change, message.trades)
+
+    def apply_change(self, change: events.TradeChange, trades: dict):
+        raise NotImplementedError
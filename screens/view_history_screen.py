@@ -1,106 +1,506 @@
+import bisect
+from datetime import date, timedelta
+
 from textual.screen import Screen
-from textual.widgets import Button, DataTable, Static
+from textual.widgets import Button, DataTable, Input, Static
 
+import storage
+from core import events, perf
+from core.aggregates import load_stats
+from core.analytics import load_report, sparkline, summary
 from core.trades import delete_trade
+from screens.live_marks import LiveMarks
 from screens.popup_message import PopupMessage
-from storage import load_trades
+from screens.storage_workers import StorageWorkers
+
+PAGE_SIZE = 100
+WINDOW_PAGES = 3  # rows kept in the table: the cursor's page and its neighbours
+EQUITY_WIDTH = 60  # characters in the equity sparkline
+
+COLUMNS = [
+    ("ID", "id"),
+    ("Pair", "pair"),
+    ("Dir", "direction"),
+    ("Status", "status"),
+    ("Entry", "entry"),
+    ("Exit", "exit_price"),
+    ("Net PnL", "net_pnl"),
+    ("Notes", "notes"),
+]
+
+
+def row_cells(t: dict, mark=None) -> tuple:
+    return (
+        str(t["id"]),
+        t["pair"],
+        t["direction"].upper(),
+        t["status"],
+        str(t["entry"]),
+        str(t.get("exit_price") or "-"),
+        pnl_cell(t, mark),
+        str(t.get("notes") or "-"),
+    )
+
+
+def pnl_cell(t: dict, mark=None) -> str:
+    """Net PnL, or the unrealized net PnL (``~``) of an open trade."""
+    pnl = t.get("net_pnl")
+    if pnl is None and mark is not None and t["status"] == "open":
+        return f"~{mark.net_pnl:.2f}"
+    return "-" if pnl is None else f"{pnl:.2f}"
+
+
+FILTER_HELP = (
+    "pair:SOLUSDT dir:short status:closed from:2025-01-01 to:2025-01-31 pnl:>0 words"
+)
+
+
+def parse_filter(text: str) -> dict:
+    """Criteria for ``storage.query_trade_ids`` from the filter bar's text.
+
+    ``pair:``, ``dir:`` and ``status:`` match exactly; ``from:``/``to:`` are
+    inclusive days; ``pnl:`` takes ``>X``, ``<X`` or ``X..Y`` (inclusive);
+    any other words must each start a word of the notes. Raises ValueError.
+    """
+    criteria = {}
+    words = []
+    for term in text.split():
+        key, sep, value = term.partition(":")
+        key = key.lower()
+        if not sep or not value:
+            words.append(term)
+        elif key == "pair":
+            criteria["pair"] = value.upper()
+        elif key in ("dir", "direction"):
+            if value.lower() not in ("long", "short"):
+                raise ValueError("dir is long or short")
+            criteria["direction"] = value.lower()
+        elif key == "status":
+            if value.lower() not in ("open", "closed"):
+                raise ValueError("status is open or closed")
+            criteria["status"] = value.lower()
+        elif key in ("from", "to"):
+            try:
+                day = date.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"{key}: expects YYYY-MM-DD") from None
+            if key == "from":
+                criteria["start"] = day.isoformat()
+            else:
+                criteria["end"] = (day + timedelta(days=1)).isoformat()
+        elif key == "pnl":
+            try:
+                if value.startswith(">"):
+                    criteria["min_pnl"] = float(value.lstrip(">="))
+                elif value.startswith("<"):
+                    criteria["max_pnl"] = float(value.lstrip("<="))
+                else:
+                    low, _, high = value.partition("..")
+                    criteria["min_pnl"] = float(low)
+                    criteria["max_pnl"] = float(high or low)
+            except ValueError:
+                raise ValueError("pnl: expects >X, <X or X..Y") from None
+        else:
+            words.append(term)
+    if words:
+        criteria["text"] = " ".join(words)
+    return criteria
 
 
-class ViewHistoryScreen(Screen):
-    """Interactive trade history with row navigation + delete."""
+def fetch_page(matches: list[int] | None, start: int, limit: int) -> list[dict]:
+    """Rows ``start`` to ``start + limit`` of the history or of the matches."""
+    if matches is None:
+        return storage.page_trades(start, limit)
+    return storage.get_trades(matches[start : start + limit])
+
+
+class ViewHistoryScreen(StorageWorkers, LiveMarks, Screen):
+    """Interactive trade history with row navigation + delete.
+
+    Only a window of ``WINDOW_PAGES`` pages around the cursor is turned into
+    table rows; neighbouring pages are fetched from storage as the cursor
+    reaches the window edge, so opening the screen does not depend on the
+    size of the history. The filter bar narrows the rows to the trades
+    matching its criteria (see ``parse_filter``), answered from the
+    repository's indexes as you type. Trade mutations arrive as
+    ``core.events`` change events and are applied as single-row updates;
+    with a price feed running, open trades show their unrealized net PnL
+    (``~``). Above the table, the equity curve of the closed trades is drawn
+    as a sparkline with its drawdown summary (``core.analytics``), once the
+    first rows are shown; it reads every closed trade, so a change only marks
+    it out of date and ``E`` recomputes it. Storage is only read and written
+    from worker threads, so a large history never stalls frames.
+    """
+
+    AUTO_FOCUS = "#history_table"
 
     BINDINGS = [
         ("b", "back", "Back"),
         ("d", "delete_selected", "Delete Selected Trade"),
+        ("g", "focus_jump", "Go to page / id"),
+        ("f", "focus_filter", "Filter"),
+        ("]", "page(1)", "Next page"),
+        ("[", "page(-1)", "Previous page"),
+        ("e", "refresh_equity", "Refresh equity"),
     ]
 
     def __init__(self):
         super().__init__()
-        self.trades: list[dict] = []
+        self.trades: list[dict] = []  # trades currently materialized as rows
+        self.window_start = 0  # offset of self.trades[0] in the history
+        self.total = 0  # rows to page through: all trades or the matches
+        self.count = 0  # trades in the history
+        self.criteria: dict = {}  # active filter
+        self.matches: list[int] | None = None  # ids matching it, if any
+        self.filter_error: str | None = None
         self.highlighted_row_key: int | None = None
+        self._reload = None  # worker of the running reload, if any
+        self._pending_window: tuple | None = None  # page asked for meanwhile
+        self._equity_text: str | None = None  # shown equity, once computed
 
     def compose(self):
-        yield Static("📜 Trade History (↑/↓ move • D delete • B back)")
+        yield Static(
+            "📜 Trade History"
+            " (↑/↓ move • \\[ ] page • F filter • G go to • D delete"
+            " • E equity • B back)"
+        )
+        yield Static(id="history_summary")
+        yield Static(id="history_equity")
+        yield Input(placeholder=f"Filter: {FILTER_HELP}", id="filter")
         yield DataTable(id="history_table", zebra_stripes=True)
+        yield Static(id="history_position")
+        yield Input(
+            placeholder="Go to page (e.g. 12) or trade id (e.g. #345)", id="jump"
+        )
         yield Button("Back", id="back")
 
+    @perf.timed("screen.history.mount")
     def on_mount(self):
         table = self.query_one("#history_table", DataTable)
-        table.add_columns(
-            "ID", "Pair", "Dir", "Status", "Entry", "Exit", "Net PnL", "Notes"
-        )
+        for label, key in COLUMNS:
+            table.add_column(label, key=key)
 
-        self._reload_table()
-
-        # Focus and highlight the first row
+        # Focus the table; the first row is highlighted once it has loaded
         table.focus()
         table.cursor_type = "row"  # highlight full row, if supported
 
-        if table.row_count > 0:
-            # Some versions return list, others Row; handle both
-            try:
-                first_key = getattr(table.get_row_at(0), "key", None)
-            except Exception:
-                # fallback: we stored the trade id as row key earlier
-                first_key = (
-                    table.get_row_key_at(0)
-                    if hasattr(table, "get_row_key_at")
-                    else None
-                )
+        self._reload_table()
+        self.watch_trades()
+        self.watch_marks()
+
+    def on_unmount(self):
+        self.unwatch_trades()
+        self.unwatch_marks()
+
+    def apply_marks(self, marks: dict):
+        """Refresh the PnL cell of open trades whose price moved."""
+        table = self.query_one("#history_table", DataTable)
+        for t in self.trades:
+            m = marks.get(t["id"])
+            if m is not None and str(t["id"]) in table.rows:
+                table.update_cell(str(t["id"]), "net_pnl", pnl_cell(t, m))
+
+    def apply_change(self, change: events.TradeChange, trades: dict):
+        """Patch the affected rows instead of re-rendering the table."""
+        self._equity_out_of_date()
+        if self.matches is not None or not self.trades:
+            # Re-run the filter (index lookups), or replace the "No trades
+            # found" placeholder
+            self._reload_table(busy=False)
+            return
+
+        table = self.query_one("#history_table", DataTable)
+        first_id = self.trades[0]["id"]
+        for trade_id in change.removed:
+            self.total -= 1
+            self.count -= 1
+            if str(trade_id) in table.rows:
+                ids = [row["id"] for row in self.trades]
+                del self.trades[ids.index(trade_id)]
+                table.remove_row(str(trade_id))
+            elif trade_id < first_id:
+                # Rows are in id order: the window moved up by one
+                self.window_start -= 1
+
+        for trade_id in change.updated:
+            t = trades.get(trade_id)
+            if t is None or str(trade_id) not in table.rows:
+                continue
+            ids = [row["id"] for row in self.trades]
+            self.trades[ids.index(trade_id)] = t
+            for (_, key), value in zip(COLUMNS, self._cells(t)):
+                table.update_cell(str(trade_id), key, value)
+
+        for trade_id in change.added:
+            self.total += 1
+            self.count += 1
+            # New trades sort last; show them if the window reaches the end
+            at_end = self.window_start + len(self.trades) == self.total - 1
+            if at_end and len(self.trades) < PAGE_SIZE * WINDOW_PAGES:
+                t = trades[trade_id]
+                self.trades.append(t)
+                table.add_row(*self._cells(t), key=str(trade_id))
+
+        if not self.trades:
+            self._show_window(self.window_start)
+        else:
+            row = min(table.cursor_row, len(self.trades) - 1)
+            self.highlighted_row_key = str(self.trades[row]["id"])
+        self._refresh_summary()
+        self._update_position()
+
+    def _cells(self, t: dict) -> tuple:
+        return row_cells(t, self.current_mark(t["id"]))
+
+    def _refresh_summary(self):
+        """Reload the running aggregates (constant time, no history scan)."""
+        self.run_read(load_stats, done=self._show_summary, group="history-summary")
+
+    def _show_summary(self, stats):
+        pf = stats.profit_factor
+        self.query_one("#history_summary", Static).update(
+            f"Trades: {self.count} • Closed: {stats.closed} • "
+            f"Net PnL: {stats.net_pnl:.2f} USDT • Win rate: {stats.win_rate:.1f}% • "
+            f"Profit factor: {'-' if pf is None else f'{pf:.2f}'} • "
+            f"Max losing streak: {stats.max_loss_streak}"
+        )
+
+    def action_refresh_equity(self):
+        self._refresh_equity()
+
+    def _refresh_equity(self):
+        """Recompute the equity curve (cached until the trades change)."""
+        self.run_read(load_report, done=self._show_equity, group="history-equity")
 
-            # If nothing else works, use the first trade id in self.trades
-            if not first_key and self.trades:
-                first_key = int(self.trades[0]["id"])
+    @perf.timed("screen.history.equity")
+    def _show_equity(self, report):
+        line = sparkline(report.equity, EQUITY_WIDTH)
+        self._equity_text = (
+            f"Equity: {line} {report.net_pnl:+.2f} USDT\n{summary(report)}"
+            if report.trades
+            else summary(report)
+        )
+        self.query_one("#history_equity", Static).update(self._equity_text)
 
-            if first_key:
-                self.highlighted_row_key = first_key
-                try:
-                    table.move_cursor(row=0, column=0)
-                except Exception:
-                    pass  # older versions may not have move_cursor()
+    def _equity_out_of_date(self):
+        # Recomputing reads every closed trade: not on each single-row change
+        if self._equity_text is not None:
+            self.query_one("#history_equity", Static).update(
+                f"{self._equity_text} • (out of date: E to refresh)"
+            )
 
-    def _reload_table(self):
-        """Load trades and repopulate DataTable."""
+    def _reload_table(self, busy: bool = True):
+        """Reload the count, summary, matches and window in the background."""
         table = self.query_one("#history_table", DataTable)
-        self.trades = load_trades() or []
-        table.clear(columns=False)
+        # Pages fetched for the old filter or count are out of date
+        self.workers.cancel_group(self, "history-page")
+        self._reload = self.run_read(
+            self._fetch_all,
+            self.window_start,
+            self.criteria,
+            done=self._show_all,
+            busy=table if busy else None,
+            group="history-reload",
+        )
 
+    @staticmethod
+    @perf.timed("screen.history.reload")
+    def _fetch_all(start: int, criteria: dict):
+        count = storage.count_trades()
+        matches = storage.query_trade_ids(**criteria)
+        total = count if matches is None else len(matches)
+        window = PAGE_SIZE * WINDOW_PAGES
+        start = max(0, min(start, total - window))
+        return count, load_stats(), matches, start, fetch_page(matches, start, window)
+
+    def _show_all(self, fetched: tuple):
+        self._reload = None
+        self.count, stats, self.matches, start, trades = fetched
+        self.total = self.count if self.matches is None else len(self.matches)
+        self._show_summary(stats)
+        self._render_window(start, trades)
+        if self._equity_text is None:
+            self._refresh_equity()  # after the first rows, not before them
+        if self._pending_window is not None:
+            self._show_window(*self._pending_window)
+
+    def _show_window(
+        self, start: int, focus_id: int | None = None, offset: int | None = None
+    ):
+        """Fetch the rows starting at offset ``start`` and render them.
+
+        During a reload the request waits for it (the matches and the total
+        it pages through are about to change) and only the latest one runs.
+        """
+        if self._reload is not None and not self._reload.is_finished:
+            self._pending_window = (start, focus_id, offset)
+            return
+        self._pending_window = None
+        window = PAGE_SIZE * WINDOW_PAGES
+        start = max(0, min(start, self.total - window))
+        self.run_read(
+            fetch_page,
+            self.matches,
+            start,
+            window,
+            done=lambda trades: self._render_window(start, trades, focus_id, offset),
+            group="history-page",
+        )
+
+    @perf.timed("screen.history.window")
+    def _render_window(
+        self,
+        start: int,
+        trades: list[dict],
+        focus_id: int | None = None,
+        offset: int | None = None,
+    ):
+        """Materialize ``trades`` (the rows starting at offset ``start``).
+
+        The cursor is put on ``focus_id``, else on ``offset``, else back on the
+        previously highlighted trade if it is part of the new window, otherwise
+        on the same offset as before.
+        """
+        table = self.query_one("#history_table", DataTable)
+        cursor_offset = self.window_start + table.cursor_row
+        self.window_start = start
+        self.trades = trades
+
+        if focus_id is None and offset is None:
+            focus_id = self._highlighted_id()
+
+        table.clear(columns=False)
         if not self.trades:
             table.add_row("-", "No trades found", "-", "-", "-", "-", "-", "-")
             self.highlighted_row_key = None
+            self._update_position()
             return
 
         for t in self.trades:
-            pnl = t.get("net_pnl")
-            pnl_str = "-" if pnl is None else f"{pnl:.2f}"
             # We pass key=t["id"], so it can be referenced safely later
-            table.add_row(
-                str(t["id"]),
-                t["pair"],
-                t["direction"].upper(),
-                t["status"],
-                str(t["entry"]),
-                str(t.get("exit_price") or "-"),
-                pnl_str,
-                str(t.get("notes") or "-"),
-                key=int(t["id"]),
+            table.add_row(*self._cells(t), key=str(t["id"]))
+
+        ids = [row["id"] for row in self.trades]
+        if focus_id in ids:
+            row = ids.index(focus_id)
+        else:
+            target = cursor_offset if offset is None else offset
+            row = max(0, min(target - start, len(ids) - 1))
+        table.move_cursor(row=row)
+        self.highlighted_row_key = str(ids[row])
+        self._update_position()
+
+    def _highlighted_id(self) -> int | None:
+        trade_id = self.highlighted_row_key
+        # Handle versions where row_key is wrapped
+        if hasattr(trade_id, "value"):
+            trade_id = trade_id.value
+        if isinstance(trade_id, str) and trade_id.isdigit():
+            trade_id = int(trade_id)
+        return trade_id
+
+    def _update_position(self):
+        table = self.query_one("#history_table", DataTable)
+        pages = max(1, -(-self.total // PAGE_SIZE))
+        offset = self.window_start + (table.cursor_row if self.trades else 0)
+        text = f"Page {offset // PAGE_SIZE + 1}/{pages} • "
+        if self.matches is None:
+            text += f"{self.total} trades"
+        else:
+            text += f"{self.total} of {self.count} trades match the filter"
+        if self.filter_error:
+            text += f" • ⚠ {self.filter_error}"
+        self.query_one("#history_position", Static).update(text)
+
+    def _jump_to(self, offset: int, trade_id: int | None = None):
+        """Show the window around ``offset`` with the cursor on that row."""
+        self._show_window(offset - PAGE_SIZE, focus_id=trade_id, offset=offset)
+        self.query_one("#history_table", DataTable).focus()
+
+    def action_page(self, step: int):
+        table = self.query_one("#history_table", DataTable)
+        offset = self.window_start + table.cursor_row + step * PAGE_SIZE
+        self._jump_to(max(0, min(offset, self.total - 1)))
+
+    def action_focus_jump(self):
+        self.query_one("#jump", Input).focus()
+
+    def action_focus_filter(self):
+        self.query_one("#filter", Input).focus()
+
+    def on_input_changed(self, event: Input.Changed):
+        """Re-filter as the filter bar is edited."""
+        if event.input.id != "filter":
+            return
+        try:
+            criteria = parse_filter(event.value)
+        except ValueError as e:
+            self.filter_error = str(e)
+        else:
+            self.filter_error = None
+            if criteria != self.criteria:
+                self.criteria = criteria
+                self.window_start = 0
+                self._reload_table(busy=False)
+                return
+        self._update_position()
+
+    def on_input_submitted(self, event: Input.Submitted):
+        if event.input.id != "jump":
+            return
+        value = event.value.strip().lstrip("#")
+        event.input.value = ""
+        if not value.isdigit():
+            return
+
+        if event.value.strip().startswith("#"):
+            trade_id = int(value)
+            if self.matches is not None:
+                index = bisect.bisect_left(self.matches, trade_id)
+                found = index < len(self.matches) and self.matches[index] == trade_id
+                self._jump_to_trade(trade_id, index if found else None)
+                return
+            self.run_read(
+                storage.trade_position,
+                trade_id,
+                done=lambda offset: self._jump_to_trade(trade_id, offset),
+                group="history-page",
             )
+        else:
+            page = max(1, int(value))
+            self._jump_to(min((page - 1) * PAGE_SIZE, max(self.total - 1, 0)))
+
+    def _jump_to_trade(self, trade_id: int, offset: int | None):
+        if offset is None:
+            self.mount(
+                PopupMessage(
+                    f"❌ Trade {trade_id} not found.",
+                    style="bold white on red",
+                    auto_close=2,
+                )
+            )
+            return
+        self._jump_to(offset, trade_id)
 
     def on_data_table_row_highlighted(self, event: DataTable.RowHighlighted):
         """Track which row is currently highlighted."""
         # Some Textual versions pass the row key directly; others require event.row_key
         self.highlighted_row_key = getattr(event, "row_key", None)
+        if not self.trades or event.cursor_row != event.data_table.cursor_row:
+            return  # empty table, or a stale event from a window re-render
+        self._update_position()
+
+        # Near the edge of the window: slide it to fetch the neighbouring page
+        row = event.cursor_row
+        trade_id = self._highlighted_id()
+        if row == len(self.trades) - 1 and self.window_start + row + 1 < self.total:
+            self._show_window(self.window_start + PAGE_SIZE, focus_id=trade_id)
+        elif row == 0 and self.window_start > 0:
+            self._show_window(self.window_start - PAGE_SIZE, focus_id=trade_id)
 
     def action_delete_selected(self):
         """Ask for confirmation before deleting the selected trade."""
-        table = self.query_one("#history_table", DataTable)
-        trade_id = self.highlighted_row_key
-
-        # Handle versions where row_key is wrapped
-        if hasattr(trade_id, "value"):
-            trade_id = trade_id.value
-        if isinstance(trade_id, str) and trade_id.isdigit():
-            trade_id = int(trade_id)
+        trade_id = self._highlighted_id()
 
         if not trade_id:
             if self.trades:
@@ -131,23 +531,11 @@ class ViewHistoryScreen(Screen):
             trade_id = self.pending_delete_id
             del self.pending_delete_id
 
-            if delete_trade(int(trade_id)):
-                self.mount(
-                    PopupMessage(
-                        f"✅ Trade {trade_id} deleted successfully.",
-                        style="bold white on green",
-                        auto_close=2,
-                    )
-                )
-                self._reload_table()
-            else:
-                self.mount(
-                    PopupMessage(
-                        f"❌ Trade {trade_id} not found.",
-                        style="bold white on red",
-                        auto_close=2,
-                    )
-                )
+            self.run_write(
+                delete_trade,
+                int(trade_id),
+                done=lambda deleted: self._show_deleted(trade_id, deleted),
+            )
 
         elif key == "n":
             del self.pending_delete_id
@@ -159,6 +547,24 @@ class ViewHistoryScreen(Screen):
                 )
             )
 
+    def _show_deleted(self, trade_id: int, deleted: bool):
+        if deleted:
+            self.mount(
+                PopupMessage(
+                    f"✅ Trade {trade_id} deleted successfully.",
+                    style="bold white on green",
+                    auto_close=2,
+                )
+            )
+        else:
+            self.mount(
+                PopupMessage(
+                    f"❌ Trade {trade_id} not found.",
+                    style="bold white on red",
+                    auto_close=2,
+                )
+            )
+
     def on_button_pressed(self, event: Button.Pressed):
         if event.button.id == "back":
             self.app.pop_screen()
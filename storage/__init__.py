@@ -0,0 +1,238 @@
+"""Trade persistence.
+
+``load_trades``/``save_trades`` read and write the whole history; the
+per-trade helpers below let the active store answer a query or apply a
+single mutation without loading the whole history. The backend is picked by ``TCH_STORAGE``:
+
+* ``json`` (default) - the whole history in ``trades.json``
+* ``journal`` - append-only journal, see ``storage.journal``
+* ``sqlite`` - indexed SQLite database, see ``storage.sqlite_store``
+* ``partitioned`` - small hot JSON segment plus compressed monthly archives,
+  see ``storage.partitioned``
+
+``TCH_TRADE_LOG`` overrides the ``trades.json`` path; the other backends
+derive their file names from it. Reads and writes go through a cached
+``TradeRepository`` (see ``storage.repository``), so the store is only
+re-read when another process changes it.
+
+Several processes may write the same store. Mutations replace files
+atomically and take an advisory file lock; wrap a read-modify-write that
+spans several calls in ``@storage.atomic`` so it runs under one lock and is
+retried if the store changes underneath it.
+"""
+
+import functools
+import os
+import time
+
+from core import perf
+from storage.base import ConflictError, StorageError
+from storage.journal import JournalStore
+from storage.json_store import JsonStore
+from storage.partitioned import PartitionedStore
+from storage.repository import TradeRepository
+from storage.sqlite_store import SqliteStore
+
+TRADE_LOG = os.environ.get("TCH_TRADE_LOG", "trades.json")
+
+STORES = {
+    "json": JsonStore,
+    "journal": JournalStore,
+    "sqlite": SqliteStore,
+    "partitioned": PartitionedStore,
+}
+
+COMMIT_ATTEMPTS = 5
+
+# Meta documents summarizing the trades (core.aggregates, core.rollups). They
+# are rebuilt from the trades when missing, so replacing the trades drops them.
+DERIVED_META = ("stats", "rollups")
+
+_repositories = {}
+
+
+def get_repository() -> TradeRepository:
+    """Return the repository for the configured mode and ``TRADE_LOG`` path."""
+    mode = os.environ.get("TCH_STORAGE", "json")
+    if mode not in STORES:
+        raise ValueError(f"Unknown storage mode: {mode!r}")
+    key = (mode, TRADE_LOG)
+    if key not in _repositories:
+        _repositories[key] = TradeRepository(STORES[mode](TRADE_LOG))
+    return _repositories[key]
+
+
+def get_store():
+    """Return the backend store behind the active repository."""
+    return get_repository().store
+
+
+def transaction():
+    """Context manager holding the store lock across several calls."""
+    return get_repository().transaction()
+
+
+def after_commit(callback):
+    """Call ``callback()`` once the current transaction commits (now if none)."""
+    get_repository().after_commit(callback)
+
+
+def atomic(func):
+    """Run ``func`` as one transaction, retrying it on a version conflict.
+
+    Nested in another transaction, ``func`` just joins it; a conflict then
+    propagates so the outermost ``atomic`` retries the whole unit.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if get_repository().in_transaction():
+            return func(*args, **kwargs)
+        for attempt in range(1, COMMIT_ATTEMPTS + 1):
+            try:
+                with transaction():
+                    return func(*args, **kwargs)
+            except ConflictError:
+                if attempt == COMMIT_ATTEMPTS:
+                    raise
+                time.sleep(0.01 * attempt)
+
+    return wrapper
+
+
+@perf.timed("storage.load_trades")
+def load_trades():
+    """Load all trades from the active store."""
+    return get_repository().load()
+
+
+@perf.timed("storage.save_trades")
+def save_trades(trades):
+    """Replace all trades in the active store (and drop ``DERIVED_META``)."""
+    repository = get_repository()
+    with repository.store.lock:
+        repository.save(trades)
+        for name in DERIVED_META:
+            repository.write_meta(name, None)
+
+
+def allocate_trade_id() -> int:
+    """Reserve a new, never reused trade id."""
+    return get_repository().allocate_id()
+
+
+def allocate_trade_ids(count: int) -> range:
+    """Reserve a block of ``count`` new trade ids."""
+    return get_repository().allocate_ids(count)
+
+
+def allocate_close_seq() -> int:
+    """Reserve the sequence number of a close (see ``storage.index.close_key``)."""
+    return get_repository().allocate_close_seq()
+
+
+def get_trade(trade_id: int) -> dict | None:
+    return get_repository().get(trade_id)
+
+
+def find_trades(status=None, pair=None, start=None, end=None) -> list[dict]:
+    """Trades matching all given filters; dates form a ``[start, end)`` range."""
+    return get_repository().find(status=status, pair=pair, start=start, end=end)
+
+
+def iter_trades(status=None, pair=None, start=None, end=None):
+    """Stream matching trades one at a time instead of loading the history.
+
+    Filters are applied inside the reader, so only matching trades are
+    turned into records.
+    """
+    return get_repository().iter(status=status, pair=pair, start=start, end=end)
+
+
+def query_trade_ids(**criteria) -> list[int] | None:
+    """Sorted ids of the trades matching ``criteria``, or None if none given.
+
+    Criteria: pair, direction, status, start/end (open date), min_pnl/max_pnl
+    and text (words of the notes); answered from in-memory indexes.
+    """
+    return get_repository().query(**criteria)
+
+
+def get_trades(trade_ids) -> list[dict]:
+    """The trades with these ids, in that order (missing ones skipped)."""
+    return get_repository().get_many(trade_ids)
+
+
+def page_trades(offset: int, limit: int) -> list[dict]:
+    """One page of trades in id order."""
+    return get_repository().page(offset, limit)
+
+
+def trade_position(trade_id: int) -> int | None:
+    """Offset of a trade in id order (for jumping to it), or None."""
+    return get_repository().position(trade_id)
+
+
+def count_trades(status: str | None = None) -> int:
+    return get_repository().count(status)
+
+
+def closed_trades_near(key: tuple, limit: int) -> tuple[list[dict], list[dict]]:
+    """Closed trades just before and from ``key`` in close order."""
+    return get_repository().closed_near(key, limit)
+
+
+def net_pnl_range() -> tuple[float, float] | None:
+    """Lowest and highest net PnL of the closed trades."""
+    return get_repository().pnl_range()
+
+
+def trades_version() -> tuple:
+    """Changes whenever the trades do: a key to cache derived data on."""
+    repository = get_repository()
+    return id(repository), repository.version()
+
+
+def trade_columns(fields, status: str | None = None) -> tuple[tuple, dict]:
+    """``(version, {field: values})`` for every trade in id order.
+
+    ``version`` is the ``trades_version()`` the columns were read at.
+    """
+    repository = get_repository()
+    generation, columns = repository.columns(fields, status)
+    return (id(repository), generation), columns
+
+
+def add_trade(trade: dict):
+    get_repository().add(trade)
+
+
+def add_trades(trades: list[dict]):
+    """Add many trades with a single write (bulk import)."""
+    get_repository().add_many(trades)
+
+
+def update_trade(trade_id: int, fields: dict) -> dict | None:
+    """Apply ``fields`` to a stored trade. Returns the updated trade or None."""
+    return get_repository().update(trade_id, fields)
+
+
+def remove_trade(trade_id: int) -> bool:
+    """Remove a trade. Returns True if it existed."""
+    return get_repository().delete(trade_id)
+
+
+def read_meta(name: str) -> dict | None:
+    """Read a small JSON document persisted alongside the trades."""
+    return get_repository().read_meta(name)
+
+
+def write_meta(name: str, data: dict):
+    get_repository().write_meta(name, data)
+
+
+def compact():
+    """Fold the journal into a new snapshot (no-op for the JSON store)."""
+    store = get_store()
+    if hasattr(store, "compact"):
+        store.compact()
@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+from functools import cached_property
+
+from storage.locking import FileLock
+
+
+class StorageError(Exception):
+    """The trade store could not be read or written safely."""
+
+
+class ConflictError(StorageError):
+    """Another process changed the store between our read and our write."""
+
+
+def atomic_write(path: str, data: str):
+    """Replace ``path`` with ``data`` so readers never see a partial file.
+
+    The data goes to a temporary file in the same directory, is flushed to
+    disk and then renamed over ``path``.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def file_signature(path: str):
+    """Cheap change token for a file: (inode, mtime, size), or None if missing."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class TradeStore:
+    """Interface shared by the storage backends.
+
+    Subclasses implement ``load``/``save`` and the single-trade mutations.
+    The query helpers fall back to filtering a full load; backends with
+    indexes override them.
+    """
+
+    # True when add/update/delete cost less than rewriting everything with save()
+    incremental = False
+    # True when load() is expensive and the store has load_hot() (the trades
+    # that change), count(), max_id(), closed_near(), pnl_range() and a
+    # page() cheaper than a load: the repository caches only the hot trades
+    # and sends other reads to the store
+    partial = False
+
+    @cached_property
+    def lock(self) -> FileLock:
+        """Lock held around every read-modify-write of this store."""
+        base, _ = os.path.splitext(self.path)
+        return FileLock(f"{base}.lock")
+
+    def signature(self):
+        """Token that changes whenever another process modifies the store."""
+        raise NotImplementedError
+
+    def load(self) -> list[dict]:
+        raise NotImplementedError
+
+    def save(self, trades: list[dict]):
+        raise NotImplementedError
+
+    def add(self, trade: dict):
+        raise NotImplementedError
+
+    def add_many(self, trades: list[dict]):
+        """Add several trades as one write (backends override the loop)."""
+        with self.lock:
+            for t in trades:
+                self.add(t)
+
+    def update(self, trade_id: int, fields: dict) -> dict | None:
+        raise NotImplementedError
+
+    def delete(self, trade_id: int) -> bool:
+        raise NotImplementedError
+
+    def begin(self):
+        """A transaction starts: an incremental store may hold its writes."""
+
+    def end(self):
+        """The transaction ends: write anything held since ``begin()``."""
+
+    def read_meta(self, name: str) -> dict | None:
+        """Small JSON document stored next to the trades (e.g. the ID counter).
+
+        File-based stores keep it in ``<trade log name>.<name>.json``.
+        """
+        try:
+            with open(self.meta_path(name)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def write_meta(self, name: str, data: dict):
+        atomic_write(self.meta_path(name), json.dumps(data))
+
+    def meta_path(self, name: str) -> str:
+        base, _ = os.path.splitext(self.path)
+        return f"{base}.{name}.json"
+
+    def get(self, trade_id: int) -> dict | None:
+        for t in self.load():
+            if t["id"] == trade_id:
+                return t
+        return None
+
+    def find(
+        self,
+        status: str | None = None,
+        pair: str | None = None,
+        start: str | None = None,
+        end: str | None = None,
+    ) -> list[dict]:
+        """Trades matching every given filter, in id order.
+
+        ``start``/``end`` compare against the ``date`` string
+        (``"%Y-%m-%d %H:%M:%S"``) as a half-open range ``[start, end)``.
+        """
+        return [t for t in self.load() if matches(t, status, pair, start, end)]
+
+    def page(self, offset: int, limit: int) -> list[dict]:
+        """Trades ``offset`` to ``offset + limit`` in id order."""
+        trades = sorted(self.load(), key=lambda t: t["id"])
+        return trades[max(offset, 0) : offset + limit]
+
+    def iter(self, status=None, pair=None, start=None, end=None):
+        """Yield matching trades one at a time.
+
+        Backends that can read their files incrementally override this so a
+        scan never holds the whole history in memory.
+        """
+        yield from self.find(status=status, pair=pair, start=start, end=end)
+
+
+def matches(t: dict, status=None, pair=None, start=None, end=None) -> bool:
+    if status is not None and t["status"] != status:
+        return False
+    if pair is not None and t["pair"] != pair:
+        return False
+    if start is not None and t["date"] < start:
+        return False
+    if end is not None and t["date"] >= end:
+        return False
+    return True
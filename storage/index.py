@@ -0,0 +1,273 @@
+"""Secondary indexes over the cached trades, for filtering without scans.
+
+``TradeIndex`` keeps
+
+- an inverted index from pair, direction and status to trade ids,
+- the open dates and the net PnLs (closed trades) as sorted arrays with the
+  trade id alongside, so a range is two bisections,
+- a token index over the notes: lowercase words to trade ids, with the
+  distinct words kept sorted so a query word also matches as a prefix (what
+  has been typed so far). Tokenizing every note is the most expensive part
+  of indexing, so this one is built on the first text query.
+- the closed trades in close order (close time, else open date, then id),
+  for looking up a trade's neighbours; built on the first ``around()``.
+
+It is maintained by ``TradeRepository`` on every add, update and delete and
+answers ``query()`` with set intersections, smallest first. The index holds
+ids only; range checks on a small candidate set read the trade records passed
+to ``query()``. Trades are ``Trade`` records, read through their slots (the
+mapping interface costs several calls per field, which adds up to seconds
+when indexing a large store).
+"""
+
+import bisect
+import re
+
+from storage.records import MISSING
+
+FIELDS = ("pair", "direction", "status")
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text) -> list[str]:
+    return _WORD.findall(text.lower()) if text else []
+
+
+def _value(t, field: str):
+    value = getattr(t, field)
+    return None if value is MISSING else value
+
+
+class _SortedColumn:
+    """Values in sorted order with the owning trade id at the same position."""
+
+    __slots__ = ("values", "ids")
+
+    def __init__(self, values=(), ids=()):
+        order = sorted(range(len(values)), key=values.__getitem__)
+        self.values = [values[k] for k in order]
+        self.ids = [ids[k] for k in order]
+
+    def add(self, value, trade_id: int):
+        index = bisect.bisect_right(self.values, value)
+        self.values.insert(index, value)
+        self.ids.insert(index, trade_id)
+
+    def remove(self, value, trade_id: int):
+        lo = bisect.bisect_left(self.values, value)
+        hi = bisect.bisect_right(self.values, value)
+        index = lo + self.ids[lo:hi].index(trade_id)
+        del self.values[index]
+        del self.ids[index]
+
+    def span(self, low=None, high=None, high_inclusive=False) -> tuple[int, int]:
+        lo = 0 if low is None else bisect.bisect_left(self.values, low)
+        if high is None:
+            hi = len(self.values)
+        elif high_inclusive:
+            hi = bisect.bisect_right(self.values, high)
+        else:
+            hi = bisect.bisect_left(self.values, high)
+        return lo, max(lo, hi)
+
+
+class TradeIndex:
+    """Inverted, range and notes indexes over a set of trades."""
+
+    def __init__(self, trades=()):
+        self.postings: dict[str, dict[str, set[int]]] = {f: {} for f in FIELDS}
+        self.tokens: dict[str, set[int]] | None = None  # built on first use
+        self._words: list[str] = []  # sorted keys of self.tokens
+        trades = list(trades)
+        for field in FIELDS:
+            postings = self.postings[field]
+            for t in trades:
+                value = getattr(t, field)
+                if value is not MISSING and value is not None:
+                    postings.setdefault(value, set()).add(t.id)
+        self.dates = self._column(trades, "date")
+        self.pnls = self._column(trades, "net_pnl")
+        self.closes: _SortedColumn | None = None  # built on first use
+
+    @staticmethod
+    def _column(trades, field: str) -> _SortedColumn:
+        values, ids = [], []
+        for t in trades:
+            value = getattr(t, field)
+            if value is not MISSING and value is not None:
+                values.append(value)
+                ids.append(t.id)
+        return _SortedColumn(values, ids)
+
+    def _build_tokens(self, trades):
+        tokens = {}
+        for t in trades:
+            notes = t.notes
+            if notes and notes is not MISSING:
+                for word in _WORD.findall(notes.lower()):
+                    ids = tokens.get(word)
+                    if ids is None:
+                        ids = tokens[word] = set()
+                    ids.add(t.id)
+        self.tokens = tokens
+        self._words = sorted(tokens)
+
+    def _build_closes(self, trades):
+        keys = [close_key(t) for t in trades if t.status == "closed"]
+        self.closes = _SortedColumn(keys, [key[-1] for key in keys])
+
+    # ---- maintenance -----------------------------------------------------
+
+    def _note_words(self, t) -> list[str]:
+        # Nothing to maintain until the notes index has been built
+        return [] if self.tokens is None else tokenize(_value(t, "notes"))
+
+    def add(self, t):
+        trade_id = t.id
+        for field in FIELDS:
+            value = _value(t, field)
+            if value is not None:
+                self.postings[field].setdefault(value, set()).add(trade_id)
+        for word in self._note_words(t):
+            ids = self.tokens.get(word)
+            if ids is None:
+                ids = self.tokens[word] = set()
+                bisect.insort(self._words, word)
+            ids.add(trade_id)
+        if _value(t, "date") is not None:
+            self.dates.add(t.date, trade_id)
+        if _value(t, "net_pnl") is not None:
+            self.pnls.add(t.net_pnl, trade_id)
+        if self.closes is not None and t.status == "closed":
+            self.closes.add(close_key(t), trade_id)
+
+    def remove(self, t):
+        """Unindex ``t`` (as it was indexed: call before changing it)."""
+        trade_id = t.id
+        for field in FIELDS:
+            ids = self.postings[field].get(_value(t, field))
+            if ids is not None:
+                ids.discard(trade_id)
+        for word in set(self._note_words(t)):
+            ids = self.tokens.get(word)
+            if ids is None:
+                continue
+            ids.discard(trade_id)
+            if not ids:
+                del self.tokens[word]
+                del self._words[bisect.bisect_left(self._words, word)]
+        if _value(t, "date") is not None:
+            self.dates.remove(t.date, trade_id)
+        if _value(t, "net_pnl") is not None:
+            self.pnls.remove(t.net_pnl, trade_id)
+        if self.closes is not None and t.status == "closed":
+            self.closes.remove(close_key(t), trade_id)
+
+    # ---- queries ---------------------------------------------------------
+
+    def ids(self, field: str, value) -> set[int]:
+        """Ids of the trades whose ``field`` equals ``value`` (do not modify)."""
+        return self.postings[field].get(value, set())
+
+    def around(self, records, key: tuple, limit: int) -> tuple[list, list]:
+        """Ids of up to ``limit`` closed trades before ``key`` in close order
+        (nearest first) and from it on. ``records`` maps ids to trades."""
+        if self.closes is None:
+            self._build_closes(records.values())
+        index = bisect.bisect_left(self.closes.values, key)
+        before = self.closes.ids[max(index - limit, 0) : index]
+        return before[::-1], self.closes.ids[index : index + limit]
+
+    def _matching_word(self, prefix: str) -> set[int]:
+        ids = set()
+        index = bisect.bisect_left(self._words, prefix)
+        while index < len(self._words) and self._words[index].startswith(prefix):
+            ids |= self.tokens[self._words[index]]
+            index += 1
+        return ids
+
+    def query(
+        self,
+        records,
+        pair=None,
+        direction=None,
+        status=None,
+        start=None,
+        end=None,
+        min_pnl=None,
+        max_pnl=None,
+        text=None,
+    ) -> list[int] | None:
+        """Sorted ids of the trades matching every given criterion.
+
+        ``start``/``end`` bound the open date (end exclusive), ``min_pnl``/
+        ``max_pnl`` the net PnL (both inclusive; open trades have none), and
+        every word of ``text`` must start a word of the notes. ``records``
+        maps ids to trades. Returns None when no criterion is given.
+        """
+        sets = [
+            self.ids(field, value)
+            for field, value in zip(FIELDS, (pair, direction, status))
+            if value is not None
+        ]
+        words = tokenize(text)
+        if words and self.tokens is None:
+            self._build_tokens(records.values())
+        sets += [self._matching_word(word) for word in words]
+
+        ranges = []  # (key, low, high, column span)
+        if start is not None or end is not None:
+            span = self.dates.span(start, end)
+            ranges.append(("date", start, end, self.dates.ids, span))
+        if min_pnl is not None or max_pnl is not None:
+            span = self.pnls.span(min_pnl, max_pnl, high_inclusive=True)
+            ranges.append(("net_pnl", min_pnl, max_pnl, self.pnls.ids, span))
+
+        if not sets and not ranges:
+            return None
+
+        result = None
+        for ids in sorted(sets, key=len):
+            result = set(ids) if result is None else result.intersection(ids)
+            if not result:
+                return []
+
+        for key, low, high, column, (lo, hi) in sorted(
+            ranges, key=lambda r: r[4][1] - r[4][0]
+        ):
+            if result is None:
+                result = set(column[lo:hi])
+            elif len(result) * 4 < hi - lo:
+                # Few candidates left: check their values instead of the span
+                result = {
+                    i
+                    for i in result
+                    if _within(_value(records[i], key), low, high, key == "net_pnl")
+                }
+            else:
+                result.intersection_update(column[lo:hi])
+            if not result:
+                return []
+        return sorted(result)
+
+
+def close_key(t) -> tuple:
+    """Position of a closed trade in close order.
+
+    ``closed_at`` has one-second resolution, so trades closed within the same
+    second are ordered by their close sequence (0 for trades closed before it
+    was kept, or imported).
+    """
+    closed_at = _value(t, "closed_at")
+    return (closed_at or t.date, _value(t, "close_seq") or 0, t.id)
+
+
+def _within(value, low, high, high_inclusive: bool) -> bool:
+    if value is None:
+        return False
+    if low is not None and value < low:
+        return False
+    if high is not None and (value > high if high_inclusive else value >= high):
+        return False
+    return True
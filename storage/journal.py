@@ -0,0 +1,214 @@
+"""Append-only trade journal: a snapshot plus a JSON-lines event log.
+
+State lives in two JSON-lines files next to ``trades.json``:
+
+* ``<name>.snapshot.jsonl`` - a header line ``{"seq": N}`` followed by one
+  trade per line: the folded state after journal event ``N``.
+* ``<name>.journal.jsonl`` - one event per line (``add``/``update``/``delete``),
+  appended by every mutation.
+
+Loading reads the snapshot and replays the journal events newer than its
+``seq``. The replayed state stays in memory and later loads only read the
+journal bytes appended since, so a mutation costs one appended line no matter
+how long the history is. ``compact()`` folds the journal into a new snapshot;
+it also runs on a background thread once ``compact_threshold`` events pile up.
+"""
+
+import json
+import os
+import threading
+
+from storage.base import TradeStore, file_signature, matches
+from storage.json_store import JsonStore
+from storage.records import Trade
+
+COMPACT_THRESHOLD = 5000
+
+
+class JournalStore(TradeStore):
+    """Trade store backed by a snapshot plus an append-only event journal."""
+
+    incremental = True
+
+    def __init__(self, path: str, compact_threshold: int = COMPACT_THRESHOLD):
+        base, _ = os.path.splitext(path)
+        self.path = path
+        self.snapshot_path = f"{base}.snapshot.jsonl"
+        self.journal_path = f"{base}.journal.jsonl"
+        self.compact_threshold = compact_threshold
+
+        self._lock = threading.RLock()
+        self._trades: dict[int, Trade] | None = None  # id -> trade, in id order
+        self._seq = 0  # last event folded into self._trades
+        self._pending = 0  # journal events not yet folded into the snapshot
+        self._offset = 0  # journal bytes already replayed
+        self._snapshot_stat = None
+        self._compactor: threading.Thread | None = None
+
+    # ---- reading -------------------------------------------------------
+
+    def _refresh(self):
+        """Bring the in-memory state up to date with the files on disk."""
+        journal_stat = file_signature(self.journal_path)
+        journal_size = journal_stat[2] if journal_stat else 0
+        if (
+            self._trades is None
+            or file_signature(self.snapshot_path) != self._snapshot_stat
+            or journal_size < self._offset
+        ):
+            # First load, or another process compacted under us
+            self._read_snapshot()
+        if journal_size > self._offset:
+            self._replay_tail()
+
+    def _read_snapshot(self):
+        self._offset = 0
+        self._pending = 0
+
+        if not os.path.exists(self.snapshot_path):
+            # Seed the snapshot from an existing trades.json
+            trades = []
+            if os.path.exists(self.path):
+                trades = JsonStore(self.path).load()
+            self._trades = {t["id"]: Trade(t) for t in trades}
+            self._seq = 0
+            self._write_snapshot()
+            return
+
+        with open(self.snapshot_path, "rb") as f:
+            header = json.loads(f.readline() or b'{"seq": 0}')
+            trades = (Trade(json.loads(line)) for line in f if line.strip())
+            self._trades = {t.id: t for t in trades}
+        self._seq = header["seq"]
+        self._snapshot_stat = file_signature(self.snapshot_path)
+
+    def _replay_tail(self):
+        with open(self.journal_path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # event still being written; pick it up next time
+                self._offset += len(line)
+                event = json.loads(line)
+                if event["seq"] <= self._seq:
+                    continue  # already folded into the snapshot
+                self._apply(event)
+                self._pending += 1
+
+    def _apply(self, event: dict):
+        op = event["op"]
+        if op == "add":
+            trade = Trade(event["trade"])
+            self._trades[trade.id] = trade
+        elif op == "update":
+            if event["id"] in self._trades:
+                self._trades[event["id"]].update(event["fields"])
+        elif op == "delete":
+            self._trades.pop(event["id"], None)
+        self._seq = event["seq"]
+
+    # ---- writing -------------------------------------------------------
+
+    def _append(self, *events: dict):
+        """Append events with a single write and fold them into the state."""
+        lines = []
+        for seq, event in enumerate(events, start=self._seq + 1):
+            event["seq"] = seq
+            lines.append(json.dumps(event) + "\n")
+        data = "".join(lines).encode()
+        with open(self.journal_path, "ab") as f:
+            f.write(data)
+        self._offset += len(data)
+        for event in events:
+            self._apply(event)
+        self._pending += len(events)
+
+        if self._pending >= self.compact_threshold and not (
+            self._compactor and self._compactor.is_alive()
+        ):
+            self._compactor = threading.Thread(target=self.compact, daemon=True)
+            self._compactor.start()
+
+    def _write_snapshot(self):
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(json.dumps({"seq": self._seq}) + "\n")
+            for t in self._trades.values():
+                f.write(json.dumps(t.to_dict()) + "\n")
+        os.replace(tmp_path, self.snapshot_path)
+        self._snapshot_stat = file_signature(self.snapshot_path)
+
+    def compact(self):
+        """Fold every journal event into a new snapshot and empty the journal."""
+        # The file lock comes first everywhere, so the compactor thread and
+        # writers in other processes take turns with our own writers
+        with self.lock, self._lock:
+            self._refresh()
+            self._write_snapshot()
+            # Events up to self._seq are in the snapshot, so a crash before the
+            # truncate only leaves events that replay will skip.
+            with open(self.journal_path, "wb"):
+                pass
+            self._offset = 0
+            self._pending = 0
+
+    # ---- store API -----------------------------------------------------
+
+    def signature(self):
+        return (
+            file_signature(self.snapshot_path),
+            file_signature(self.journal_path),
+        )
+
+    def load(self) -> list[Trade]:
+        with self._lock:
+            self._refresh()
+            return [t.copy() for t in self._trades.values()]
+
+    def iter(self, status=None, pair=None, start=None, end=None):
+        # The replayed state is already in memory; stream copies of it
+        with self._lock:
+            self._refresh()
+            trades = list(self._trades.values())
+        for t in trades:
+            if matches(t, status, pair, start, end):
+                yield t.copy()
+
+    def save(self, trades: list[dict]):
+        """Replace the whole history (writes a new snapshot)."""
+        with self.lock, self._lock:
+            self._refresh()
+            self._trades = {t["id"]: Trade(t) for t in trades}
+            self.compact()
+
+    def get(self, trade_id: int) -> Trade | None:
+        with self._lock:
+            self._refresh()
+            trade = self._trades.get(trade_id)
+            return None if trade is None else trade.copy()
+
+    def add(self, trade: dict):
+        with self.lock, self._lock:
+            self._refresh()
+            self._append({"op": "add", "trade": dict(trade)})
+
+    def add_many(self, trades: list[dict]):
+        with self.lock, self._lock:
+            self._refresh()
+            self._append(*({"op": "add", "trade": dict(t)} for t in trades))
+
+    def update(self, trade_id: int, fields: dict) -> Trade | None:
+        with self.lock, self._lock:
+            self._refresh()
+            if trade_id not in self._trades:
+                return None
+            self._append({"op": "update", "id": trade_id, "fields": fields})
+            return self._trades[trade_id].copy()
+
+    def delete(self, trade_id: int) -> bool:
+        with self.lock, self._lock:
+            self._refresh()
+            if trade_id not in self._trades:
+                return False
+            self._append({"op": "delete", "id": trade_id})
+            return True
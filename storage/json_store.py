@@ -0,0 +1,128 @@
+import json
+import os
+
+from storage.base import (
+    StorageError,
+    TradeStore,
+    atomic_write,
+    file_signature,
+    matches,
+)
+from storage.records import Trade
+
+CHUNK_SIZE = 1 << 16
+
+
+def iter_json_array(f, chunk_size: int = CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array read from text file ``f``.
+
+    Only one chunk plus the element being decoded is held in memory. Elements
+    are expected to be objects (a truncated object never decodes, so a chunk
+    boundary can't be mistaken for the end of one).
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = False
+
+    while True:
+        # Skip whitespace, the opening bracket and separators
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,[":
+            if buffer[pos] == "[":
+                started = True
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == "]" and started:
+            return
+
+        if pos < len(buffer):
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                pass  # element continues in the next chunk
+            else:
+                yield item
+                pos = end
+                continue
+
+        chunk = f.read(chunk_size)
+        if not chunk:
+            if buffer[pos:].strip():
+                raise json.JSONDecodeError("Unterminated array", buffer, pos)
+            return
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+
+class JsonStore(TradeStore):
+    """Whole-file store: every trade lives in a single JSON array."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def signature(self):
+        return file_signature(self.path)
+
+    def load(self) -> list[Trade]:
+        """Load all trades from JSON file"""
+        if not os.path.exists(self.path):
+            # Create empty file to prevent JSON errors
+            with open(self.path, "w") as f:
+                json.dump([], f)
+            return []
+
+        try:
+            with open(self.path, "r") as f:
+                # Decoding element by element rather than with one json.loads
+                # lets other threads (the UI, when a worker loads) run in
+                # between, and frees each dict as soon as it is converted
+                # instead of all of them in one long deallocation at the end
+                return [Trade(t) for t in iter_json_array(f)]
+        except json.JSONDecodeError as e:
+            # Never treat a damaged log as empty: the next save would wipe it
+            raise StorageError(f"{self.path} is not valid JSON: {e}") from e
+
+    def iter(self, status=None, pair=None, start=None, end=None):
+        """Stream matching trades without parsing the whole file at once."""
+        try:
+            f = open(self.path, "r")
+        except FileNotFoundError:
+            return
+        with f:
+            for t in iter_json_array(f):
+                if matches(t, status, pair, start, end):
+                    yield Trade(t)
+
+    def save(self, trades: list[dict]):
+        """save all trades back to json file."""
+        atomic_write(self.path, json.dumps([dict(t) for t in trades], indent=4))
+
+    def add(self, trade: dict):
+        with self.lock:
+            trades = self.load()
+            trades.append(trade)
+            self.save(trades)
+
+    def add_many(self, trades: list[dict]):
+        with self.lock:
+            self.save(self.load() + list(trades))
+
+    def update(self, trade_id: int, fields: dict) -> dict | None:
+        with self.lock:
+            trades = self.load()
+            for t in trades:
+                if t["id"] == trade_id:
+                    t.update(fields)
+                    self.save(trades)
+                    return t
+            return None
+
+    def delete(self, trade_id: int) -> bool:
+        with self.lock:
+            trades = self.load()
+            updated_trades = [t for t in trades if t["id"] != trade_id]
+
+            if len(updated_trades) == len(trades):
+                return False  # No trade found to delete
+
+            self.save(updated_trades)
+            return True
@@ -0,0 +1,59 @@
+"""Advisory locking shared by every process that writes the trade store.
+
+Two TUI sessions and a reporting script may all work on the same trade log.
+Each read-modify-write cycle (allocate an id and add a trade, close a trade,
+delete one) runs while holding an exclusive ``fcntl.flock`` on
+``<trade log name>.lock``, so writers from different processes take turns
+instead of overwriting each other's changes. Readers do not lock: writes
+replace files atomically, so a reader always sees a complete version.
+
+``fcntl`` is POSIX only; elsewhere the lock still serializes the threads of
+one process, and the repository's version check (see
+``storage.repository``) catches writes from other processes.
+"""
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+class FileLock:
+    """Reentrant exclusive lock on a lock file, held across processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                os.close(fd)
+                self._thread_lock.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
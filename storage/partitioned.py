@@ -0,0 +1,573 @@
+"""Hot/cold partitioned trade store.
+
+Open trades are a handful; the rest of the history is closed trades that
+never change again. This store keeps them apart:
+
+* ``<name>.hot.json`` - the hot segment: open trades and the trades closed
+  this month or last month, plus tombstones for deleted archived trades
+  and the month of each archived trade edited here.
+  It is the only file a mutation rewrites, once per transaction.
+* ``<name>.archive/<YYYY-MM>.<n>.json.gz`` - one cold segment per close
+  month, a compressed JSON array (gzip, or lzma with ``codec="lzma"``).
+  Segments are never modified: rolling more trades into a month writes a
+  new segment and drops the old one.
+* ``<name>.archive/manifest.json`` - the segment of each month with its
+  trade count, id range, open-date range, pairs and net PnL range, and the
+  month the last roll archived up to.
+
+The first write of each month rolls the trades closed before last month
+into cold segments (``roll()``, also run by ``storage.compact()``). Between
+rolls, editing an archived trade copies it into the hot segment, which takes
+precedence over the cold copy (so does adding a trade with its id), and
+deleting one leaves a tombstone; the next roll folds both into a new segment
+for that month.
+
+Reads consult the manifest first: ``iter``/``find`` only decompress the
+segments whose date range, pairs and status can match (open trades are
+always hot), ``get`` only the segments whose id range holds the id, ``page``
+the segments with the lowest ids until the page is settled, and ``count``
+none at all. The store is ``partial``: ``TradeRepository`` caches
+only the hot segment (``load_hot``) and sends other reads here, so a process
+that never looks at old trades never decompresses them.
+
+A store without a hot segment is seeded from an existing ``trades.json``
+(left untouched); its old closed trades are archived on the first write, or
+right away by migrating from the command line::
+
+    python -m storage.partitioned trades.json [--codec lzma]
+"""
+
+import argparse
+import bisect
+import gzip
+import heapq
+import json
+import lzma
+import os
+import threading
+from datetime import date, timedelta
+
+from storage.base import (
+    StorageError,
+    TradeStore,
+    atomic_write,
+    file_signature,
+    matches,
+)
+from storage.index import close_key
+from storage.json_store import JsonStore
+from storage.records import Trade
+
+CODECS = {"gzip": (gzip, ".json.gz"), "lzma": (lzma, ".json.xz")}
+
+
+def close_month(t) -> str:
+    return (t.get("closed_at") or t["date"])[:7]
+
+
+def hot_cutoff(today: date | None = None) -> str:
+    """First month kept hot (YYYY-MM): the previous calendar month."""
+    first = (today or date.today()).replace(day=1)
+    return (first - timedelta(days=1)).strftime("%Y-%m")
+
+
+class PartitionedStore(TradeStore):
+    """Trade store split into a hot JSON segment and compressed cold months."""
+
+    incremental = True
+    partial = True
+
+    def __init__(self, path: str, codec: str = "gzip"):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown archive codec: {codec!r}")
+        base, _ = os.path.splitext(path)
+        self.path = path
+        self.hot_path = f"{base}.hot.json"
+        self.archive_dir = f"{base}.archive"
+        self.manifest_path = os.path.join(self.archive_dir, "manifest.json")
+        self.codec = codec
+
+        self._lock = threading.RLock()
+        self._hot: dict[int, Trade] | None = None  # id -> trade, in id order
+        self._deleted: dict[int, str] = {}  # archived id -> its close month
+        self._edited: dict[int, str] = {}  # hot copy of archived id -> month
+        self._manifest: dict = {"seq": 0, "segments": {}}
+        self._signature = None
+        self._last_segment: tuple[str, list] | None = None  # (file, trades)
+        self._held = False  # in a transaction: hot writes wait for end()
+        self._unwritten = False  # the hot segment changed while held
+
+    # ---- reading -------------------------------------------------------
+
+    def signature(self):
+        return (file_signature(self.hot_path), file_signature(self.manifest_path))
+
+    def _refresh(self):
+        """Re-read the hot segment and the manifest if either changed."""
+        signature = self.signature()
+        if self._hot is not None and signature == self._signature:
+            return
+        if signature[0] is None:
+            self._seed()
+            return
+        # Hot segment first: a roll replaces the manifest before the hot
+        # segment, so at worst we see rolled trades twice (the hot copy wins)
+        try:
+            with open(self.hot_path) as f:
+                hot = json.load(f)
+        except json.JSONDecodeError as e:
+            raise StorageError(f"{self.hot_path} is not valid JSON: {e}") from e
+        try:
+            with open(self.manifest_path) as f:
+                self._manifest = json.load(f)
+        except FileNotFoundError:
+            self._manifest = {"seq": 0, "segments": {}}
+        self._hot = {t["id"]: Trade(t) for t in hot["trades"]}
+        self._deleted = {int(i): month for i, month in hot["deleted"].items()}
+        self._edited = {int(i): month for i, month in hot.get("edited", {}).items()}
+        self._signature = signature
+
+    def _seed(self):
+        """Start from an existing trades.json, all of it hot until written."""
+        trades = JsonStore(self.path).load() if os.path.exists(self.path) else []
+        self._hot = {t["id"]: Trade(t) for t in sorted(trades, key=lambda t: t["id"])}
+        self._deleted = {}
+        self._edited = {}
+        self._manifest = {"seq": 0, "segments": {}}
+        self._signature = self.signature()
+
+    def _read_segment(self, month: str) -> list[dict]:
+        """The trades archived for ``month``, in id order (do not modify).
+
+        Segment files never change, so the last one read is kept: a delete
+        looks up the same month several times.
+        """
+        name = self._manifest["segments"][month]["file"]
+        if self._last_segment is not None and self._last_segment[0] == name:
+            return self._last_segment[1]
+        module = next(m for m, ext in CODECS.values() if name.endswith(ext))
+        try:
+            with open(os.path.join(self.archive_dir, name), "rb") as f:
+                trades = json.loads(module.decompress(f.read()))
+            self._last_segment = (name, trades)
+            return trades
+        except FileNotFoundError:
+            # Replaced by a roll in another process since we read the manifest
+            self._signature = None
+            self._refresh()
+            segment = self._manifest["segments"].get(month)
+            if segment is None:
+                return []
+            if segment["file"] == name:
+                raise StorageError(f"archive segment {name} is missing") from None
+            return self._read_segment(month)
+
+    def segments(self) -> dict[str, dict]:
+        """Manifest entry per archived month."""
+        with self._lock:
+            self._refresh()
+            return dict(self._manifest["segments"])
+
+    def _cold_months(self, status=None, pair=None, start=None, end=None):
+        """Months whose segment can hold trades matching the filters."""
+        if status is not None and status != "closed":
+            return []
+        return [
+            month
+            for month, seg in sorted(self._manifest["segments"].items())
+            if (pair is None or pair in seg["pairs"])
+            and (start is None or seg["last_date"] >= start)
+            and (end is None or seg["first_date"] < end)
+        ]
+
+    def _cold(self, months, skip) -> list:
+        """Per month, the archived trades not superseded by ``skip`` ids."""
+        return [
+            [Trade(t) for t in self._read_segment(month) if t["id"] not in skip]
+            for month in months
+        ]
+
+    def load_hot(self) -> list[Trade]:
+        """The hot segment alone: every open trade and the recent closes."""
+        with self._lock:
+            self._refresh()
+            return [t.copy() for t in self._hot.values()]
+
+    def page(self, offset: int, limit: int) -> list[Trade]:
+        """Trades ``offset`` to ``offset + limit`` in id order, reading the
+        segments in order of their first id only until the page is settled."""
+        end = max(offset, 0) + limit
+        with self._lock:
+            self._refresh()
+            skip = self._hot.keys() | self._deleted.keys()
+            known = [t.copy() for t in self._hot.values()]
+            segments = sorted(
+                self._manifest["segments"].items(), key=lambda s: s[1]["first_id"]
+            )
+            for month, seg in segments:
+                # Every trade below the next segment's first id is known
+                if sum(t.id < seg["first_id"] for t in known) >= end:
+                    break
+                known.extend(self._cold([month], skip)[0])
+        known.sort(key=lambda t: t.id)
+        return known[max(offset, 0) : end]
+
+    def count(self, status: str | None = None) -> int:
+        """Number of trades (with ``status``), from the manifest."""
+        with self._lock:
+            self._refresh()
+            open_trades = sum(t.status == "open" for t in self._hot.values())
+            if status == "open":
+                return open_trades
+            archived = sum(seg["count"] for seg in self._manifest["segments"].values())
+            total = len(self._hot) + archived - len(self._deleted) - len(self._edited)
+            if status is None:
+                return total
+            if status == "closed":
+                return total - open_trades
+            return 0
+
+    def max_id(self) -> int:
+        """The highest trade id stored."""
+        with self._lock:
+            self._refresh()
+            ids = [seg["last_id"] for seg in self._manifest["segments"].values()]
+            return max(ids + list(self._hot), default=0)
+
+    def closed_near(self, key: tuple, limit: int) -> tuple[list, list]:
+        """Up to ``limit`` closed trades either side of ``key`` in close order
+        (see ``TradeRepository.closed_near``), reading the segments of the
+        nearest months only."""
+        with self._lock:
+            self._refresh()
+            skip = self._hot.keys() | self._deleted.keys()
+            known = [t for t in self._hot.values() if t.status == "closed"]
+
+            def read(month):
+                segment = self._read_segment(month)
+                known.extend(Trade(t) for t in segment if t["id"] not in skip)
+
+            months = sorted(self._manifest["segments"])
+            month = key[0][:7]
+            # A side is settled once it has ``limit`` trades from months read
+            # (every trade of a month read is known: hot ones always are)
+            for m in reversed([m for m in months if m <= month]):
+                read(m)
+                if (
+                    sum(close_key(t) < key and close_month(t) >= m for t in known)
+                    >= limit
+                ):
+                    break
+            for m in [m for m in months if m > month]:
+                if (
+                    sum(close_key(t) >= key and close_month(t) < m for t in known)
+                    >= limit
+                ):
+                    break
+                read(m)
+        known.sort(key=close_key)
+        keys = [close_key(t) for t in known]
+        index = bisect.bisect_left(keys, key)
+        return known[max(index - limit, 0) : index][::-1], known[index : index + limit]
+
+    def pnl_range(self) -> tuple[float, float] | None:
+        """Lowest and highest net PnL, from the manifest where it can."""
+        with self._lock:
+            self._refresh()
+            edited = set(self._deleted.values()) | set(self._edited.values())
+            skip = self._hot.keys() | self._deleted.keys()
+            values = [
+                t.net_pnl for t in self._hot.values() if t.get("net_pnl") is not None
+            ]
+            for month, seg in self._manifest["segments"].items():
+                if month in edited or "max_pnl" not in seg:
+                    values += [
+                        t["net_pnl"]
+                        for t in self._read_segment(month)
+                        if t["id"] not in skip and t.get("net_pnl") is not None
+                    ]
+                elif seg["max_pnl"] is not None:
+                    values += [seg["min_pnl"], seg["max_pnl"]]
+        return (min(values), max(values)) if values else None
+
+    def load(self) -> list[Trade]:
+        with self._lock:
+            self._refresh()
+            skip = self._hot.keys() | self._deleted.keys()
+            parts = self._cold(sorted(self._manifest["segments"]), skip)
+            hot = [t.copy() for t in self._hot.values()]
+        return list(heapq.merge(*parts, hot, key=lambda t: t.id))
+
+    def iter(self, status=None, pair=None, start=None, end=None):
+        """Matching trades in id order, reading only the segments needed."""
+        with self._lock:
+            self._refresh()
+            skip = self._hot.keys() | self._deleted.keys()
+            months = self._cold_months(status, pair, start, end)
+            parts = [
+                [t for t in part if matches(t, status, pair, start, end)]
+                for part in self._cold(months, skip)
+            ]
+            hot = [
+                t.copy()
+                for t in self._hot.values()
+                if matches(t, status, pair, start, end)
+            ]
+        yield from heapq.merge(*parts, hot, key=lambda t: t.id)
+
+    def find(self, status=None, pair=None, start=None, end=None) -> list[Trade]:
+        return list(self.iter(status, pair, start, end))
+
+    def _archived(self, trade_id: int) -> tuple[str, dict] | None:
+        """``(close month, trade)`` of the archived copy of ``trade_id``."""
+        if trade_id in self._deleted:
+            return None
+        for month, seg in sorted(self._manifest["segments"].items()):
+            if seg["first_id"] <= trade_id <= seg["last_id"]:
+                for t in self._read_segment(month):
+                    if t["id"] == trade_id:
+                        return month, t
+        return None
+
+    def get(self, trade_id: int) -> Trade | None:
+        with self._lock:
+            self._refresh()
+            if trade_id in self._hot:
+                return self._hot[trade_id].copy()
+            archived = self._archived(trade_id)
+            return None if archived is None else Trade(archived[1])
+
+    # ---- writing -------------------------------------------------------
+
+    def _write_hot(self):
+        atomic_write(
+            self.hot_path,
+            json.dumps(
+                {
+                    "trades": [t.to_dict() for t in self._hot.values()],
+                    "deleted": self._deleted,
+                    "edited": self._edited,
+                }
+            ),
+        )
+        self._signature = self.signature()
+        self._unwritten = False
+
+    def begin(self):
+        with self._lock:
+            self._held = True
+
+    def end(self):
+        with self._lock:
+            self._held = False
+            if self._unwritten:
+                self._written()
+
+    def _written(self):
+        """Persist the hot segment (once per transaction); the first write of
+        a month rolls first."""
+        if self._held:
+            self._unwritten = True
+            return
+        if hot_cutoff() > self._manifest.get("before", ""):
+            self.roll()
+        else:
+            self._write_hot()
+
+    def roll(self, before: str | None = None) -> int:
+        """Archive the trades closed before month ``before`` (YYYY-MM).
+
+        ``before`` defaults to ``hot_cutoff()``. Every month that gains
+        trades or has tombstones gets a new segment; the manifest is
+        replaced before the hot segment, so a crash in between leaves the
+        rolled trades in both, where the hot copy wins. Returns the number of
+        trades archived.
+        """
+        with self.lock, self._lock:
+            self._refresh()
+            before = before or hot_cutoff()
+            rolled: dict[str, list[Trade]] = {}
+            for t in self._hot.values():
+                if t.status == "closed" and close_month(t) < before:
+                    rolled.setdefault(close_month(t), []).append(t)
+            # Archived copies to drop: deleted ones, and edited ones rolled
+            # back in (maybe into another month, if the edit moved it)
+            superseded = dict(self._deleted)
+            for t in (t for part in rolled.values() for t in part):
+                if t.id in self._edited:
+                    superseded[t.id] = self._edited.pop(t.id)
+            months = sorted(rolled.keys() | set(superseded.values()))
+            os.makedirs(self.archive_dir, exist_ok=True)
+            self._manifest["before"] = max(before, self._manifest.get("before", ""))
+            segments = self._manifest["segments"]
+            replaced = []
+            for month in months:
+                trades = {}
+                if month in segments:
+                    for t in self._read_segment(month):
+                        if t["id"] not in superseded:
+                            trades[t["id"]] = t
+                    replaced.append(segments.pop(month)["file"])
+                for t in rolled.get(month, []):
+                    trades[t.id] = t.to_dict()
+                if trades:
+                    segments[month] = self._write_segment(
+                        month, [trades[i] for i in sorted(trades)]
+                    )
+            atomic_write(self.manifest_path, json.dumps(self._manifest, indent=4))
+
+            for t in (t for part in rolled.values() for t in part):
+                del self._hot[t.id]
+            self._deleted = {}
+            self._write_hot()
+            for name in replaced:
+                try:
+                    os.remove(os.path.join(self.archive_dir, name))
+                except FileNotFoundError:
+                    pass
+            return sum(map(len, rolled.values()))
+
+    def _write_segment(self, month: str, trades: list[dict]) -> dict:
+        """Write a new immutable segment file; returns its manifest entry."""
+        module, ext = CODECS[self.codec]
+        self._manifest["seq"] += 1
+        name = f"{month}.{self._manifest['seq']}{ext}"
+        path = os.path.join(self.archive_dir, name)
+        data = json.dumps(trades, separators=(",", ":")).encode()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(module.compress(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        dates = [t["date"] for t in trades]
+        pnls = [t["net_pnl"] for t in trades if t.get("net_pnl") is not None]
+        return {
+            "file": name,
+            "count": len(trades),
+            "first_id": trades[0]["id"],
+            "last_id": trades[-1]["id"],
+            "first_date": min(dates),
+            "last_date": max(dates),
+            "pairs": sorted({t["pair"] for t in trades}),
+            "min_pnl": min(pnls, default=None),
+            "max_pnl": max(pnls, default=None),
+        }
+
+    def compact(self):
+        """Roll every trade closed before last month into the archive."""
+        self.roll()
+
+    def save(self, trades: list[dict]):
+        """Replace the whole history (re-archives it from scratch)."""
+        with self.lock, self._lock:
+            self._refresh()
+            old = [seg["file"] for seg in self._manifest["segments"].values()]
+            self._hot = {
+                t["id"]: Trade(t) for t in sorted(trades, key=lambda t: t["id"])
+            }
+            self._deleted = {}
+            self._edited = {}
+            self._write_hot()
+            if old:
+                self._manifest["segments"] = {}
+                atomic_write(self.manifest_path, json.dumps(self._manifest, indent=4))
+            self.roll()
+            for name in old:
+                try:
+                    os.remove(os.path.join(self.archive_dir, name))
+                except FileNotFoundError:
+                    pass
+
+    def add(self, trade: dict):
+        self.add_many([trade])
+
+    def add_many(self, trades: list[dict]):
+        with self.lock, self._lock:
+            self._refresh()
+            last_archived = max(
+                (seg["last_id"] for seg in self._manifest["segments"].values()),
+                default=0,
+            )
+            for t in trades:
+                if t["id"] <= last_archived and t["id"] not in self._hot:
+                    archived = self._archived(t["id"])
+                    if archived is not None:
+                        self._edited[t["id"]] = archived[0]
+                self._hot[t["id"]] = Trade(t)  # wins over an archived copy
+            if list(self._hot) != sorted(self._hot):
+                self._hot = {i: self._hot[i] for i in sorted(self._hot)}
+            self._written()
+
+    def update(self, trade_id: int, fields: dict) -> Trade | None:
+        with self.lock, self._lock:
+            self._refresh()
+            trade = self._hot.get(trade_id)
+            if trade is None:
+                # Archived: the edited copy lives in the hot segment from now on
+                archived = self._archived(trade_id)
+                if archived is None:
+                    return None
+                month, trade = archived[0], Trade(archived[1])
+                self._edited[trade_id] = month
+                self._hot[trade_id] = trade
+                self._hot = {i: self._hot[i] for i in sorted(self._hot)}
+            trade.update(fields)
+            self._written()
+            return trade.copy()
+
+    def delete(self, trade_id: int) -> bool:
+        with self.lock, self._lock:
+            self._refresh()
+            if self._hot.pop(trade_id, None) is not None:
+                month = self._edited.pop(trade_id, None)
+            else:
+                archived = self._archived(trade_id)
+                if archived is None:
+                    return False
+                month = archived[0]
+            if month is not None:
+                self._deleted[trade_id] = month  # tombstone the archived copy
+            self._written()
+            return True
+
+
+def archive_json(json_path: str, codec: str = "gzip", before: str | None = None):
+    """Partition an existing ``trades.json``; returns (trades archived, store)."""
+    store = PartitionedStore(json_path, codec)
+    return store.roll(before), store
+
+
+def _disk_usage(store: PartitionedStore) -> int:
+    files = [store.hot_path, store.manifest_path] + [
+        os.path.join(store.archive_dir, seg["file"])
+        for seg in store.segments().values()
+    ]
+    return sum(os.path.getsize(p) for p in files if os.path.exists(p))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Split trades.json into a hot segment and monthly archives."
+    )
+    parser.add_argument("trade_log", help="path of trades.json")
+    parser.add_argument("--codec", choices=sorted(CODECS), default="gzip")
+    parser.add_argument(
+        "--before", help="archive trades closed before this month (YYYY-MM)"
+    )
+    args = parser.parse_args()
+
+    _, store = archive_json(args.trade_log, args.codec, args.before)
+    segments = store.segments()
+    archived = sum(seg["count"] for seg in segments.values())
+    before = os.path.getsize(args.trade_log) if os.path.exists(args.trade_log) else 0
+    print(
+        f"{archived} trades in {len(segments)} monthly segments, "
+        f"{len(store._hot)} hot; "
+        f"{before / 1e6:.1f} MB -> {_disk_usage(store) / 1e6:.1f} MB"
+    )
+    print(f"Use it with TCH_STORAGE=partitioned TCH_TRADE_LOG={args.trade_log}")
+
+
+if __name__ == "__main__":
+    main()
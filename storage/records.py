@@ -0,0 +1,123 @@
+"""Compact in-memory trade record.
+
+A trade used to live in memory as a plain dict with ~20 string keys; with
+hundreds of thousands of trades the per-dict hash table dominates memory.
+``Trade`` stores the known fields in ``__slots__`` (no per-instance dict),
+interns the low-cardinality strings (pair, direction, status) and keeps any
+unknown keys in a small ``extra`` dict. It is a read/write ``Mapping``, so
+code written against trade dicts (``t["pair"]``, ``t.get("net_pnl")``,
+``dict(t)``) keeps working.
+"""
+
+import sys
+from collections.abc import Mapping
+
+FIELDS = (
+    "id",
+    "date",
+    "pair",
+    "account_size",
+    "risk_pct",
+    "entry",
+    "stop_loss",
+    "direction",
+    "risk_amount",
+    "quantity",
+    "order_value",
+    "required_leverage",
+    "leverage_note",
+    "taker_fee",
+    "maker_fee",
+    "status",
+    "exit_price",
+    "gross_pnl",
+    "fees_paid",
+    "net_pnl",
+    "notes",
+    "closed_at",
+    "close_seq",
+)
+_FIELD_SET = frozenset(FIELDS)
+_INTERNED = frozenset(("pair", "direction", "status", "leverage_note"))
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self):
+        return "<missing>"
+
+
+MISSING = _Missing()  # slot value for a field the trade does not have
+
+
+class Trade(Mapping):
+    """Slotted trade record with a dict-compatible interface."""
+
+    __slots__ = FIELDS + ("extra",)
+
+    def __init__(self, fields: Mapping | None = None):
+        for name in FIELDS:
+            setattr(self, name, MISSING)
+        self.extra = None
+        if fields:
+            self.update(fields)
+
+    @classmethod
+    def of(cls, trade: Mapping) -> "Trade":
+        """Return ``trade`` as a Trade, converting dicts."""
+        return trade if isinstance(trade, Trade) else cls(trade)
+
+    # ---- mapping interface ---------------------------------------------
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is not MISSING:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            if key in _INTERNED and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __iter__(self):
+        for name in FIELDS:
+            if getattr(self, name) is not MISSING:
+                yield name
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        count = sum(1 for name in FIELDS if getattr(self, name) is not MISSING)
+        return count + (len(self.extra) if self.extra else 0)
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key) is not MISSING
+        return bool(self.extra) and key in self.extra
+
+    def __repr__(self):
+        return f"Trade({dict(self)!r})"
+
+    def update(self, fields: Mapping):
+        for key, value in fields.items():
+            self[key] = value
+
+    def copy(self) -> "Trade":
+        other = Trade.__new__(Trade)
+        for name in FIELDS:
+            setattr(other, name, getattr(self, name))
+        other.extra = dict(self.extra) if self.extra else None
+        return other
+
+    def to_dict(self) -> dict:
+        return dict(self)
@@ -0,0 +1,495 @@
+"""In-process cache in front of a trade store.
+
+A single TUI session reads the same history over and over (every screen
+mount, every close, every delete). ``TradeRepository`` keeps the parsed
+trades in memory and answers reads from there; mutations are written through
+to the store and applied to the cache. The store is only re-read when its
+``signature()`` changes, i.e. when another process touched it.
+
+Cached trades are compact ``Trade`` records (see ``storage.records``) and
+reads hand out copies of them, which behave like the old trade dicts.
+
+The cache is indexed by trade id, so lookups, closes and deletes are O(1),
+and by ``storage.index.TradeIndex`` (pair, direction, status, dates, PnL and
+notes words), so listing open trades only touches open trades and
+``query()`` filters without scanning. ``columns()`` hands out whole fields
+for vectorized analytics, tagged with ``generation`` so derived arrays can be
+cached until the trades change. Trade ids are allocated from a counter
+persisted with the store and never reused.
+
+Several processes may share one store. Every write holds the store's file
+lock (see ``storage.locking``) and refreshes the cache first, so it applies
+on top of the latest version. ``transaction()`` holds the lock across a
+whole read-modify-write and pins the version it started from: if the store
+still changes underneath it (a writer that does not take the lock, or a
+platform without ``fcntl``), ``ConflictError`` is raised instead of writing
+over that change, and the caller retries (see ``storage.atomic``).
+
+Inside a transaction, whole-file writes (the JSON store) and meta documents
+are deferred and written once when the outermost transaction ends, so a
+batch of operations costs one file rewrite instead of one per operation. If
+the transaction fails, the deferred writes are dropped and the cache is
+reloaded; incremental stores have already applied their trade writes, so
+their deferred meta is written anyway to stay consistent with them. An
+incremental store may still hold its writes between ``begin()`` and
+``end()`` (the partitioned store rewrites its hot segment once).
+``after_commit()`` callbacks (change notifications) run after that write,
+and only if the transaction succeeded. Transaction state is per thread:
+another thread (a UI worker) reads the meta documents as last committed.
+
+A ``partial`` store (``storage.partitioned``) keeps most of the history in
+archives that are expensive to read. For it the cache holds only the hot
+trades (``load_hot()``, which include every open trade): ``get``, ``find``,
+``iter``, ``count``, ``page`` and the stats lookups (``closed_near``,
+``pnl_range``) are answered from the cache where the hot trades suffice and
+otherwise by the store, which reads only the archives a query needs. Reads
+that need every trade (``load``, ``query``, ``columns``, ...) load the rest
+into the cache on first use.
+
+Reloading a large store allocates hundreds of thousands of records at once,
+which sets off full cyclic garbage collections that stop every thread (the
+TUI loads on a worker thread but would still freeze). The collector is paused
+for the reload and put back the way it was afterwards.
+"""
+
+import bisect
+import gc
+import threading
+from contextlib import contextmanager
+from operator import attrgetter
+
+from core import perf
+from storage.base import ConflictError, TradeStore, matches
+from storage.index import TradeIndex
+from storage.records import MISSING, Trade
+
+
+@contextmanager
+def _bulk_load():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class TradeRepository:
+    """Cached, write-through view of a ``TradeStore``."""
+
+    def __init__(self, store: TradeStore):
+        self.store = store
+        self.generation = 0  # bumped on every change to the cached trades
+        self._lock = threading.RLock()
+        self._by_id: dict[int, Trade] | None = None  # in id order
+        self._complete = False  # the cache holds every trade, not just hot ones
+        self._ids: list[int] = []  # sorted, for paging
+        self._index = TradeIndex()
+        self._max_id = 0
+        self._signature = None
+        # Per-thread transaction state: depth, whether the trades changed
+        # (dirty), the meta written (meta) and the after-commit callbacks
+        self._local = threading.local()
+
+    def _refresh(self):
+        signature = self.store.signature()
+        if self._by_id is None or signature != self._signature:
+            if self._by_id is not None and getattr(self._local, "depth", 0):
+                # Whatever the transaction read so far is out of date
+                self._by_id = None
+                raise ConflictError("trade store changed during a transaction")
+            self._signature = signature
+            with perf.timer("storage.read"), _bulk_load():
+                if self.store.partial:
+                    self._reindex(self.store.load_hot())
+                    self._max_id = max(self._max_id, self.store.max_id())
+                else:
+                    self._reindex(self.store.load())
+                self._complete = not self.store.partial
+            if signature is None:
+                # Loading created the missing store; don't see that as a change
+                self._signature = self.store.signature()
+            self.generation += 1
+
+    def _whole(self):
+        """Refresh, and make sure the cache holds every trade."""
+        self._refresh()
+        if not self._complete:
+            with perf.timer("storage.read"), _bulk_load():
+                max_id = self._max_id
+                self._reindex(self.store.load())
+                self._max_id = max(self._max_id, max_id)
+            self._complete = True
+
+    def _cached(self, status=None) -> bool:
+        """Whether the cache can answer a read for trades with ``status``."""
+        return self._complete or status == "open"  # open trades are all hot
+
+    def _reindex(self, trades: list):
+        trades = sorted((Trade.of(t) for t in trades), key=lambda t: t.id)
+        self._by_id = {t["id"]: t for t in trades}
+        self._ids = list(self._by_id)
+        self._index = TradeIndex(trades)
+        self._max_id = trades[-1]["id"] if trades else 0
+
+    def _insert(self, trade: Trade):
+        """Cache a trade that was not cached (keeping the id order)."""
+        self._by_id[trade.id] = trade
+        if self._ids and trade.id < self._ids[-1]:
+            self._by_id = {i: self._by_id[i] for i in sorted(self._by_id)}
+        bisect.insort(self._ids, trade.id)
+        self._index.add(trade)
+
+    def _written(self):
+        """Record our own write so it does not look like an outside change."""
+        if not self.store.incremental:
+            if self.in_transaction():
+                self._local.dirty = True  # saved when the transaction ends
+                self.generation += 1
+                return
+            self.store.save(list(self._by_id.values()))
+        self._signature = self.store.signature()
+        self.generation += 1
+
+    def in_transaction(self) -> bool:
+        return getattr(self._local, "depth", 0) > 0
+
+    def _flush(self):
+        """Write what the transaction deferred: the trades, then the meta."""
+        with self._lock:
+            if self.store.incremental:
+                self.store.end()  # writes the store held back, if any
+                self._signature = self.store.signature()
+            elif self._local.dirty:
+                self._local.dirty = False
+                self.store.save(list(self._by_id.values()))
+                self._signature = self.store.signature()
+            for name, data in self._local.meta.items():
+                self.store.write_meta(name, data)
+            self._local.meta.clear()
+
+    def _abort(self):
+        with self._lock:
+            if self.store.incremental:
+                self._flush()
+            elif self._local.dirty or self._local.meta:
+                self._local.dirty = False
+                self._local.meta.clear()
+                self._by_id = None  # reload what is really on disk
+
+    # ---- reads ---------------------------------------------------------
+
+    def load(self) -> list[Trade]:
+        with self._lock:
+            self._whole()
+            return [t.copy() for t in self._by_id.values()]
+
+    def get(self, trade_id: int) -> Trade | None:
+        with self._lock:
+            self._refresh()
+            trade = self._by_id.get(trade_id)
+            if trade is None and not self._complete:
+                return self.store.get(trade_id)
+            return None if trade is None else trade.copy()
+
+    def find(self, status=None, pair=None, start=None, end=None) -> list[Trade]:
+        with self._lock:
+            self._refresh()
+            if not self._cached(status):
+                return self.store.find(status, pair, start, end)
+            ids = self._index.query(
+                self._by_id, status=status, pair=pair, start=start, end=end
+            )
+            trades = self._by_id.values() if ids is None else map(self._by_id.get, ids)
+            return [t.copy() for t in trades]
+
+    def query(self, **criteria) -> list[int] | None:
+        """Sorted ids of the trades matching ``criteria``, from the indexes.
+
+        See ``TradeIndex.query`` for the criteria; None when none is given.
+        """
+        if all(value is None or value == "" for value in criteria.values()):
+            return None  # (without loading a partial store's archives)
+        with self._lock:
+            self._whole()
+            return self._index.query(self._by_id, **criteria)
+
+    def get_many(self, trade_ids) -> list[Trade]:
+        """The trades with these ids (in that order), skipping missing ones."""
+        with self._lock:
+            self._whole()
+            trades = (self._by_id.get(i) for i in trade_ids)
+            return [t.copy() for t in trades if t is not None]
+
+    def page(self, offset: int, limit: int) -> list[Trade]:
+        """Trades ``offset`` to ``offset + limit`` in id order."""
+        with self._lock:
+            self._refresh()
+            if not self._complete:
+                return self.store.page(offset, limit)
+            ids = self._ids[max(offset, 0) : offset + limit]
+            return [self._by_id[i].copy() for i in ids]
+
+    def position(self, trade_id: int) -> int | None:
+        """Offset of a trade in id order, or None if it does not exist."""
+        with self._lock:
+            self._whole()
+            index = bisect.bisect_left(self._ids, trade_id)
+            if index < len(self._ids) and self._ids[index] == trade_id:
+                return index
+            return None
+
+    def count(self, status: str | None = None) -> int:
+        with self._lock:
+            self._refresh()
+            if not self._cached(status):
+                return self.store.count(status)
+            if status is None:
+                return len(self._by_id)
+            return len(self._index.ids("status", status))
+
+    def closed_near(self, key: tuple, limit: int) -> tuple[list, list]:
+        """Up to ``limit`` closed trades either side of ``key`` (see
+        ``storage.index.close_key``) in close order, nearest first."""
+        with self._lock:
+            self._refresh()
+            if not self._complete:
+                return self.store.closed_near(key, limit)
+            before, after = self._index.around(self._by_id, key, limit)
+            return (
+                [self._by_id[i].copy() for i in before],
+                [self._by_id[i].copy() for i in after],
+            )
+
+    def pnl_range(self) -> tuple[float, float] | None:
+        """Lowest and highest net PnL of the closed trades, None if none."""
+        with self._lock:
+            self._refresh()
+            if not self._complete:
+                return self.store.pnl_range()
+            values = self._index.pnls.values
+            return (values[0], values[-1]) if values else None
+
+    def version(self) -> int:
+        """The current generation, after picking up outside changes."""
+        with self._lock:
+            self._refresh()
+            return self.generation
+
+    def columns(self, fields, status: str | None = None) -> tuple[int, dict]:
+        """``(generation, {field: values})`` over the trades in id order.
+
+        Values are read straight off the cached records (no copies), with
+        None for a missing field; the generation identifies this version of
+        the trades, for callers that cache what they derive from them.
+        """
+        with self._lock:
+            self._whole()
+            ids = None if status is None else self._index.ids("status", status)
+            if ids is None or len(ids) == len(self._by_id):
+                trades = list(self._by_id.values())
+            else:
+                trades = list(map(self._by_id.__getitem__, sorted(ids)))
+            columns = {}
+            for field in fields:
+                values = list(map(attrgetter(field), trades))
+                if values.count(MISSING):
+                    values = [None if v is MISSING else v for v in values]
+                columns[field] = values
+            return self.generation, columns
+
+    def iter(self, status=None, pair=None, start=None, end=None):
+        """Yield matching trades one at a time.
+
+        Served from the cache when it is current (and holds the trades
+        asked for); otherwise streamed from the store without filling the
+        cache, so a one-off scan stays bounded in memory.
+        """
+        with self._lock:
+            warm = (
+                self._by_id is not None
+                and self.store.signature() == self._signature
+                and self._cached(status)
+            )
+            if warm:
+                if status is not None:
+                    ids = sorted(self._index.ids("status", status))
+                    trades = [self._by_id[i] for i in ids]
+                else:
+                    trades = list(self._by_id.values())
+        if not warm:
+            yield from self.store.iter(status, pair, start, end)
+            return
+        for t in trades:
+            if matches(t, status, pair, start, end):
+                yield t.copy()
+
+    def allocate_id(self) -> int:
+        """Reserve the next trade id. IDs only ever go up, even after deletes."""
+        return self.allocate_ids(1)[0]
+
+    def allocate_ids(self, count: int) -> range:
+        """Reserve ``count`` consecutive trade ids with one counter update."""
+        with self.store.lock, self._lock:
+            self._refresh()
+            meta = self.read_meta("ids") or {}
+            first = max(meta.get("next_id", 1), self._max_id + 1)
+            self.write_meta("ids", {"next_id": first + count})
+            self._max_id = first + count - 1
+            return range(first, first + count)
+
+    def allocate_close_seq(self) -> int:
+        """Reserve the next close sequence number: closes within the same
+        second of ``closed_at`` are ordered by it."""
+        with self.store.lock, self._lock:
+            meta = self.read_meta("closes") or {}
+            seq = meta.get("next_seq", 1)
+            self.write_meta("closes", {"next_seq": seq + 1})
+            return seq
+
+    # ---- writes --------------------------------------------------------
+
+    @contextmanager
+    def transaction(self):
+        """Hold the store lock so a read-modify-write cannot interleave.
+
+        Reads and writes inside the block raise ``ConflictError`` if the store
+        changes under the lock instead of silently reloading. Deferred writes
+        are flushed when the outermost block exits.
+        """
+        with self.store.lock:
+            depth = getattr(self._local, "depth", 0)
+            if not depth:
+                self._local.committed = []
+                self._local.dirty = False
+                self._local.meta = {}
+                with self._lock:
+                    self._refresh()
+                self.store.begin()
+            self._local.depth = depth + 1
+            try:
+                yield self
+            except BaseException:
+                if not depth:
+                    self._local.depth = 0
+                    self._local.committed = []
+                    self._abort()
+                raise
+            else:
+                if not depth:
+                    self._local.depth = 0
+                    self._flush()
+            finally:
+                self._local.depth = depth
+        if not depth:
+            callbacks, self._local.committed = self._local.committed, []
+            for callback in callbacks:
+                callback()
+
+    def after_commit(self, callback):
+        """Call ``callback()`` once the current transaction has committed.
+
+        Dropped if the transaction fails (a retried transaction queues its
+        own); called right away outside a transaction.
+        """
+        if self.in_transaction():
+            self._local.committed.append(callback)
+        else:
+            callback()
+
+    def read_meta(self, name: str) -> dict | None:
+        """A meta document; other threads see only what has been committed."""
+        if self.in_transaction() and name in self._local.meta:
+            return self._local.meta[name]
+        return self.store.read_meta(name)
+
+    def write_meta(self, name: str, data: dict):
+        with self.store.lock, self._lock:
+            if self.in_transaction():
+                self._local.meta[name] = data
+            else:
+                self.store.write_meta(name, data)
+
+    def save(self, trades: list[dict]):
+        with self.store.lock, self._lock:
+            self._reindex([Trade(t) for t in trades])
+            self._complete = True
+            self._local.dirty = False
+            self.store.save(list(self._by_id.values()))
+            self._signature = self.store.signature()
+            self.generation += 1
+
+    def add(self, trade: dict):
+        with self.store.lock, self._lock:
+            self._refresh()
+            if self.store.incremental:
+                self.store.add(trade)
+            trade = Trade(trade)
+            if trade["id"] not in self._by_id:
+                bisect.insort(self._ids, trade["id"])
+            old = self._by_id.get(trade["id"])
+            if old is not None:
+                self._index.remove(old)
+            self._by_id[trade["id"]] = trade
+            self._index.add(trade)
+            self._max_id = max(self._max_id, trade["id"])
+            self._written()
+
+    def add_many(self, trades: list[dict]):
+        """Add a batch of trades with a single store write."""
+        with self.store.lock, self._lock:
+            self._refresh()
+            trades = [Trade(t) for t in trades]
+            if self.store.incremental:
+                self.store.add_many(trades)
+            for trade in trades:
+                old = self._by_id.get(trade.id)
+                if old is not None:
+                    self._index.remove(old)
+                self._by_id[trade.id] = trade
+                self._index.add(trade)
+            self._ids = sorted(self._by_id)
+            if list(self._by_id) != self._ids:
+                self._by_id = {i: self._by_id[i] for i in self._ids}  # id order
+            if self._ids:
+                self._max_id = max(self._max_id, self._ids[-1])
+            self._written()
+
+    def update(self, trade_id: int, fields: dict) -> Trade | None:
+        with self.store.lock, self._lock:
+            self._refresh()
+            trade = self._by_id.get(trade_id)
+            if trade is None:
+                if self._complete:
+                    return None
+                # Not a hot trade: the store copies it into its hot segment
+                trade = self.store.update(trade_id, fields)
+                if trade is None:
+                    return None
+                self._insert(Trade.of(trade))
+                self._written()
+                return trade.copy()
+            if self.store.incremental:
+                self.store.update(trade_id, fields)
+            self._index.remove(trade)
+            trade.update(fields)
+            self._index.add(trade)
+            self._written()
+            return trade.copy()
+
+    def delete(self, trade_id: int) -> bool:
+        with self.store.lock, self._lock:
+            self._refresh()
+            trade = self._by_id.pop(trade_id, None)
+            if trade is None:
+                if self._complete or not self.store.delete(trade_id):
+                    return False
+                self._written()
+                return True
+            if self.store.incremental:
+                self.store.delete(trade_id)
+            del self._ids[bisect.bisect_left(self._ids, trade_id)]
+            self._index.remove(trade)
+            self._written()
+            return True
@@ -0,0 +1,271 @@
+"""SQLite trade store.
+
+Each trade is one row: the fields we query on (status, pair, date, direction)
+are real indexed columns and the full record is kept as JSON in ``data`` so
+new trade fields need no schema change. The database runs in WAL mode so the
+TUI and reporting scripts can read while another process writes.
+
+The store is ``partial`` (see ``storage.repository``): the repository caches
+only the open trades and sends the other reads here, where ``find``/``iter``/
+``get``/``count``/``page`` and the stats lookups run as indexed queries
+instead of over a copy of the whole table.
+
+Migrate an existing history with::
+
+    python -m storage.sqlite_store trades.json trades.db
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+from storage.base import TradeStore
+from storage.json_store import JsonStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    pair TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    status TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_trades_status ON trades (status);
+CREATE INDEX IF NOT EXISTS idx_trades_pair_date ON trades (pair, date);
+CREATE INDEX IF NOT EXISTS idx_trades_date ON trades (date);
+CREATE INDEX IF NOT EXISTS idx_trades_close ON trades ({close_key})
+    WHERE status = 'closed';
+CREATE INDEX IF NOT EXISTS idx_trades_pnl ON trades ({net_pnl});
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+INDEXED_COLUMNS = ("date", "pair", "direction", "status")
+
+# storage.index.close_key and the net PnL, as indexed expressions
+CLOSE_KEY_PARTS = (
+    "COALESCE(json_extract(data, '$.closed_at'), date)",
+    "COALESCE(json_extract(data, '$.close_seq'), 0)",
+    "id",
+)
+CLOSE_KEY = ", ".join(CLOSE_KEY_PARTS)
+NET_PNL = "json_extract(data, '$.net_pnl')"
+
+
+def _row(trade: dict) -> tuple:
+    data = {k: v for k, v in trade.items() if k != "id"}
+    return (
+        trade["id"],
+        *(trade[col] for col in INDEXED_COLUMNS),
+        json.dumps(data),
+    )
+
+
+def _trade(trade_id: int, data: str) -> dict:
+    return {"id": trade_id, **json.loads(data)}
+
+
+class SqliteStore(TradeStore):
+    """Trade store backed by an indexed SQLite database."""
+
+    incremental = True
+    partial = True
+
+    def __init__(self, path: str):
+        base, ext = os.path.splitext(path)
+        self.path = path if ext == ".db" else f"{base}.db"
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA.format(close_key=CLOSE_KEY, net_pnl=NET_PNL))
+
+    def close(self):
+        self._conn.close()
+
+    def signature(self):
+        # Changes only when *another* connection commits
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def read_meta(self, name: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE name = ?", (name,)
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def write_meta(self, name: str, data: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)", (name, json.dumps(data))
+            )
+
+    def _select(self, where: str = "", params: tuple = ()) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, data FROM trades {where} ORDER BY id", params
+            ).fetchall()
+        return [_trade(*row) for row in rows]
+
+    def load(self) -> list[dict]:
+        return self._select()
+
+    def load_hot(self) -> list[dict]:
+        """The open trades: the ones the repository caches."""
+        return self._select("WHERE status = 'open'")
+
+    def count(self, status: str | None = None) -> int:
+        where, params = self._where(status, None, None, None)
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM trades {where}", params
+            ).fetchone()[0]
+
+    def max_id(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT MAX(id) FROM trades").fetchone()[0] or 0
+
+    def page(self, offset: int, limit: int) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, data FROM trades ORDER BY id LIMIT ? OFFSET ?",
+                (limit, max(offset, 0)),
+            ).fetchall()
+        return [_trade(*row) for row in rows]
+
+    def closed_near(self, key: tuple, limit: int) -> tuple[list, list]:
+        """Up to ``limit`` closed trades either side of ``key`` in close order
+        (see ``TradeRepository.closed_near``), off the close-order index."""
+        # INDEXED BY: without ANALYZE statistics SQLite prefers the status
+        # index; the bound on the first key part is what it seeks on
+        closed = (
+            "FROM trades INDEXED BY idx_trades_close WHERE status = 'closed'"
+            f" AND {CLOSE_KEY_PARTS[0]} {{}} ? AND ({CLOSE_KEY}) {{}} (?, ?, ?)"
+        )
+        descending = ", ".join(f"{part} DESC" for part in CLOSE_KEY_PARTS)
+        with self._lock:
+            before = self._conn.execute(
+                f"SELECT id, data {closed.format('<=', '<')}"
+                f" ORDER BY {descending} LIMIT ?",
+                (key[0], *key, limit),
+            ).fetchall()
+            after = self._conn.execute(
+                f"SELECT id, data {closed.format('>=', '>=')}"
+                f" ORDER BY {CLOSE_KEY} LIMIT ?",
+                (key[0], *key, limit),
+            ).fetchall()
+        return [_trade(*row) for row in before], [_trade(*row) for row in after]
+
+    def pnl_range(self) -> tuple[float, float] | None:
+        """Lowest and highest net PnL, off the net PnL index."""
+        with self._lock:
+            # One aggregate per query, so each is a single index lookup
+            low, high = self._conn.execute(
+                f"SELECT (SELECT MIN({NET_PNL}) FROM trades),"
+                f" (SELECT MAX({NET_PNL}) FROM trades)"
+            ).fetchone()
+        return None if low is None else (low, high)
+
+    def save(self, trades: list[dict]):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM trades")
+            self._conn.executemany(
+                "INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?)",
+                (_row(t) for t in trades),
+            )
+
+    def get(self, trade_id: int) -> dict | None:
+        trades = self._select("WHERE id = ?", (trade_id,))
+        return trades[0] if trades else None
+
+    def find(self, status=None, pair=None, start=None, end=None) -> list[dict]:
+        where, params = self._where(status, pair, start, end)
+        return self._select(where, params)
+
+    def iter(self, status=None, pair=None, start=None, end=None):
+        """Stream matching trades straight off a cursor."""
+        where, params = self._where(status, pair, start, end)
+        # A separate cursor on a separate connection so other calls can run
+        # while the caller is still iterating
+        conn = sqlite3.connect(self.path)
+        try:
+            for row in conn.execute(
+                f"SELECT id, data FROM trades {where} ORDER BY id", params
+            ):
+                yield _trade(*row)
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _where(status, pair, start, end) -> tuple[str, tuple]:
+        clauses, params = [], []
+        for clause, value in (
+            ("status = ?", status),
+            ("pair = ?", pair),
+            ("date >= ?", start),
+            ("date < ?", end),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, tuple(params)
+
+    def add(self, trade: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?)", _row(trade)
+            )
+
+    def add_many(self, trades: list[dict]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO trades VALUES (?, ?, ?, ?, ?, ?)",
+                (_row(t) for t in trades),
+            )
+
+    def update(self, trade_id: int, fields: dict) -> dict | None:
+        with self._lock, self._conn:
+            trade = self.get(trade_id)
+            if trade is None:
+                return None
+            trade.update(fields)
+            self._conn.execute(
+                "UPDATE trades SET date = ?, pair = ?, direction = ?, status = ?,"
+                " data = ? WHERE id = ?",
+                (*_row(trade)[1:], trade_id),
+            )
+            return trade
+
+    def delete(self, trade_id: int) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute("DELETE FROM trades WHERE id = ?", (trade_id,))
+            return cursor.rowcount > 0
+
+
+def migrate_json(json_path: str, db_path: str) -> int:
+    """Copy every trade from a ``trades.json`` file into a SQLite database.
+
+    Existing rows in the database are replaced. Returns the number of trades
+    migrated.
+    """
+    trades = JsonStore(json_path).load()
+    store = SqliteStore(db_path)
+    try:
+        store.save(trades)
+    finally:
+        store.close()
+    return len(trades)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m storage.sqlite_store <trades.json> <trades.db>")
+    count = migrate_json(sys.argv[1], sys.argv[2])
+    print(f"Migrated {count} trades into {sys.argv[2]}")
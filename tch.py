@@ -0,0 +1,239 @@
+### tch.py
+### Headless command line for scripts and automation (no Textual)
+###
+###     python -m tch size --account-size 1000 --risk-pct 1 --entry 100 --stop-loss 95
+###     python -m tch open --pair BTCUSDT --direction long --account-size 1000 \
+###                        --risk-pct 1 --entry 100 --stop-loss 95
+###     python -m tch close 12 --exit-price 110 [--notes "tp hit"]
+###     python -m tch delete 12
+###     python -m tch list [--status open] [--pair BTCUSDT] [--start 2025-01-01]
+###     python -m tch stats
+###     python -m tch batch [ops.jsonl]         (stdin when no file or "-")
+###
+### Every command prints JSON: one document, or one line per trade for
+### ``list``. A batch is JSON lines such as ``{"op": "close", "trade_id": 12,
+### "exit_price": 110}`` using the same fields as the commands (with
+### underscores). All its operations run in one storage transaction, so the
+### trade log is written once for the whole batch; each line gets a result
+### line ``{"ok": true, "result": ...}`` or ``{"ok": false, "error": ...}``.
+
+import argparse
+import inspect
+import json
+import sys
+from dataclasses import asdict
+
+import storage
+from core import aggregates
+from core.calculator import calculate_quantity
+from core.trades import close_trade, delete_trade, open_trade
+
+
+class OperationError(ValueError):
+    """An operation could not be applied (unknown trade, bad arguments...)."""
+
+
+def _number(name, value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise OperationError(f"{name} must be a number, not {value!r}")
+    try:
+        return float(value)
+    except ValueError:
+        raise OperationError(f"{name} must be a number, not {value!r}") from None
+
+
+def _trade_id(value) -> int:
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise OperationError(f"trade_id must be an integer, not {value!r}")
+    try:
+        return int(value)
+    except ValueError:
+        raise OperationError(f"trade_id must be an integer, not {value!r}") from None
+
+
+def _text(name, value, optional=False) -> str | None:
+    if optional and value is None:
+        return None
+    if not isinstance(value, str):
+        raise OperationError(f"{name} must be a string, not {value!r}")
+    return value
+
+
+def op_size(account_size, risk_pct, entry, stop_loss):
+    return calculate_quantity(
+        _number("account_size", account_size),
+        _number("risk_pct", risk_pct),
+        _number("entry", entry),
+        _number("stop_loss", stop_loss),
+    )
+
+
+def op_open(pair, direction, account_size, risk_pct, entry, stop_loss):
+    if direction not in ("long", "short"):
+        raise OperationError(f"direction must be long or short, not {direction!r}")
+    trade = open_trade(
+        _text("pair", pair).upper(),
+        direction,
+        _number("account_size", account_size),
+        _number("risk_pct", risk_pct),
+        _number("entry", entry),
+        _number("stop_loss", stop_loss),
+    )
+    return dict(trade)
+
+
+def op_close(trade_id, exit_price, notes=""):
+    trade_id = _trade_id(trade_id)
+    notes = _text("notes", notes, optional=True)
+    trade = close_trade(trade_id, _number("exit_price", exit_price), notes or "")
+    if trade is None:
+        raise OperationError(f"no open trade with id {trade_id}")
+    return dict(trade)
+
+
+def op_delete(trade_id):
+    trade_id = _trade_id(trade_id)
+    if not delete_trade(trade_id):
+        raise OperationError(f"no trade with id {trade_id}")
+    return {"deleted": trade_id}
+
+
+def op_list(status=None, pair=None, start=None, end=None):
+    pair = _text("pair", pair, optional=True)
+    return [
+        dict(t)
+        for t in storage.iter_trades(
+            status=_text("status", status, optional=True),
+            pair=pair and pair.upper(),
+            start=_text("start", start, optional=True),
+            end=_text("end", end, optional=True),
+        )
+    ]
+
+
+def op_stats():
+    stats = aggregates.load_stats()
+    return {
+        **asdict(stats),
+        "win_rate": stats.win_rate,
+        "profit_factor": stats.profit_factor,
+        "avg_win": stats.avg_win,
+        "avg_loss": stats.avg_loss,
+        "r_std": stats.r_std,
+    }
+
+
+OPERATIONS = {
+    "size": op_size,
+    "open": op_open,
+    "close": op_close,
+    "delete": op_delete,
+    "list": op_list,
+    "stats": op_stats,
+}
+
+
+def apply(operation: dict):
+    """Run one ``{"op": name, **arguments}`` operation and return its result."""
+    if not isinstance(operation, dict):
+        raise OperationError(f"an operation is a JSON object, not {operation!r}")
+    fields = dict(operation)
+    func = OPERATIONS.get(fields.pop("op", None))
+    if func is None:
+        raise OperationError(f"unknown op {operation.get('op')!r}")
+    try:
+        inspect.signature(func).bind(**fields)
+    except TypeError as e:  # missing or unexpected fields
+        raise OperationError(str(e)) from e
+    return func(**fields)
+
+
+@storage.atomic
+def run_batch(lines) -> list[dict]:
+    """Apply JSON-lines operations in one transaction; one result per line.
+
+    A failing operation is reported in its result and the batch goes on.
+    """
+    results = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            results.append({"ok": True, "result": apply(json.loads(line))})
+        except (ValueError, KeyError) as e:  # includes JSON and operation errors
+            results.append({"ok": False, "error": str(e)})
+    return results
+
+
+def _print(document):
+    print(json.dumps(document))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="tch", description="Trading Crypto Helper without the TUI."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def sizing(command):
+        command.add_argument("--account-size", type=float, required=True)
+        command.add_argument("--risk-pct", type=float, required=True)
+        command.add_argument("--entry", type=float, required=True)
+        command.add_argument("--stop-loss", type=float, required=True)
+
+    sizing(commands.add_parser("size", help="position size for a setup"))
+
+    command = commands.add_parser("open", help="open a trade")
+    command.add_argument("--pair", required=True)
+    command.add_argument("--direction", choices=("long", "short"), required=True)
+    sizing(command)
+
+    command = commands.add_parser("close", help="close an open trade")
+    command.add_argument("trade_id", type=int)
+    command.add_argument("--exit-price", type=float, required=True)
+    command.add_argument("--notes", default="")
+
+    command = commands.add_parser("delete", help="delete a trade")
+    command.add_argument("trade_id", type=int)
+
+    command = commands.add_parser("list", help="trades as JSON lines")
+    command.add_argument("--status", choices=("open", "closed"))
+    command.add_argument("--pair")
+    command.add_argument("--start", help="first date (inclusive)")
+    command.add_argument("--end", help="last date (exclusive)")
+
+    commands.add_parser("stats", help="running performance stats")
+
+    command = commands.add_parser("batch", help="apply JSON-lines operations")
+    command.add_argument("path", nargs="?", default="-")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = vars(build_parser().parse_args(argv))
+    command = args.pop("command")
+
+    if command == "batch":
+        path = args["path"]
+        if path == "-":
+            results = run_batch(sys.stdin.readlines())
+        else:
+            with open(path) as f:
+                results = run_batch(f.readlines())
+        sys.stdout.writelines(json.dumps(r) + "\n" for r in results)
+        return 0 if all(r["ok"] for r in results) else 1
+
+    try:
+        result = apply({"op": command, **args})
+    except ValueError as e:
+        _print({"error": str(e)})
+        return 1
+    if command == "list":
+        sys.stdout.writelines(json.dumps(t) + "\n" for t in result)
+    else:
+        _print(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+# tests/test_aggregates.py
+import pytest
+
+import storage
+from core import aggregates
+from core.aggregates import RunningStats
+
+
+def closed(trade_id, pnl, risk=10.0):
+    return {"id": trade_id, "status": "closed", "net_pnl": pnl, "risk_amount": risk}
+
+
+def test_running_stats_summary():
+    stats = RunningStats()
+    for i, pnl in enumerate([20.0, -5.0, -10.0, -5.0, 30.0, -2.0], start=1):
+        stats.add(closed(i, pnl))
+
+    assert stats.closed == 6
+    assert stats.wins == 2
+    assert stats.net_pnl == 28.0
+    assert stats.profit_factor == 50.0 / 22.0
+    assert stats.max_loss_streak == 3
+    assert stats.largest_loss == -10.0
+    assert abs(stats.r_mean - 28.0 / 60) < 1e-12
+
+
+def test_remove_matches_stats_built_without_the_trade():
+    """Welford removal should land on the same mean/variance as a rebuild"""
+    trades = [closed(i, pnl) for i, pnl in enumerate([12.0, 3.5, 40.0, 7.25], 1)]
+    stats = RunningStats()
+    for t in trades:
+        stats.add(t)
+    stats.remove(trades[1])
+
+    expected = RunningStats()
+    for t in trades[:1] + trades[2:]:
+        expected.add(t)
+
+    assert not stats.stale
+    assert stats.matches(expected)
+
+
+def test_removing_largest_win_marks_stale():
+    stats = RunningStats()
+    stats.add(closed(1, 50.0))
+    stats.add(closed(2, 5.0))
+    stats.remove(closed(1, 50.0))
+
+    assert stats.stale
+
+
+def test_first_close_is_counted_once(tmp_path, monkeypatch):
+    """Without stored stats the rebuild already includes the closed trade"""
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    trade = closed(1, 15.0)
+    storage.add_trade({**trade, "date": "2025-01-01 00:00:00", "pair": "BTCUSDT"})
+
+    aggregates.record_close(trade)
+
+    assert aggregates.load_stats().closed == 1
+
+
+def test_removal_with_neighbours_matches_a_rebuild():
+    pnls = [5.0, -1.0, -2.0, 3.0, -4.0, 50.0, -6.0, -7.0, -8.0, 0.0, -9.0]
+    trades = [closed(i, pnl) for i, pnl in enumerate(pnls, 1)]
+    for removed in range(len(trades)):
+        stats = RunningStats()
+        for t in trades:
+            stats.add(t)
+        rest = trades[:removed] + trades[removed + 1 :]
+        limit = stats.max_loss_streak + 1
+        near = (
+            [t["net_pnl"] for t in trades[:removed][::-1][:limit]],
+            [t["net_pnl"] for t in trades[removed + 1 :][:limit]],
+        )
+        rest_pnls = [t["net_pnl"] for t in rest]
+        stats.remove(trades[removed], near, (min(rest_pnls), max(rest_pnls)))
+
+        expected = RunningStats()
+        for t in rest:
+            expected.add(t)
+        assert not stats.stale
+        assert stats.matches(expected), removed
+
+
+@pytest.mark.parametrize("mode", ["json", "partitioned", "sqlite"])
+def test_deletes_keep_the_stored_stats_current(tmp_path, monkeypatch, mode):
+    from core.trades import close_trade, delete_trade, open_trade
+
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    monkeypatch.setenv("TCH_STORAGE", mode)
+    ids = []
+    for exit_price in (90, 80, 120, 85, 200, 95):
+        trade = open_trade("BTCUSDT", "long", 1000, 1, 100, 95)
+        close_trade(trade["id"], exit_price)
+        ids.append(trade["id"])
+    rebuilds = []
+    rebuild = aggregates.rebuild_stats
+    monkeypatch.setattr(
+        aggregates, "rebuild_stats", lambda: rebuilds.append(1) or rebuild()
+    )
+
+    for trade_id in (ids[4], ids[2], ids[1]):  # the largest win, then a join
+        delete_trade(trade_id)
+    stored = aggregates.load_stats()
+
+    assert rebuilds == []
+    assert stored.matches(rebuild())
+    assert stored.max_loss_streak == 3 and stored.largest_win == 0.0
+
+
+@pytest.mark.parametrize("mode", ["json", "partitioned", "sqlite"])
+def test_closes_within_one_second_keep_their_order(tmp_path, monkeypatch, mode):
+    """Trades closed in the same second out of id order, then one deleted"""
+    from datetime import datetime
+
+    from core import trades
+    from core.trades import close_trade, delete_trade, open_trade
+
+    class FrozenClock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2025, 3, 1, 12, 0, 0)
+
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    monkeypatch.setenv("TCH_STORAGE", mode)
+    monkeypatch.setattr(trades, "datetime", FrozenClock)
+    ids = [open_trade("BTCUSDT", "long", 1000, 1, 100, 95)["id"] for _ in range(4)]
+    for i, exit_price in ((1, 90), (0, 120), (3, 85), (2, 80)):  # loss, win, 2 losses
+        close_trade(ids[i], exit_price)
+
+    delete_trade(ids[0])  # joins all three losses into one run
+    stored = aggregates.load_stats()
+
+    assert stored.matches(aggregates.rebuild_stats())
+    assert stored.loss_streaks == {3: 1}
+    assert stored.loss_streak == stored.max_loss_streak == 3
+
+
+def test_replacing_the_trades_drops_the_derived_summaries(tmp_path, monkeypatch):
+    from core import rollups
+    from core.trades import close_trade, open_trade
+
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    trade = open_trade("BTCUSDT", "long", 1000, 1, 100, 95)
+    close_trade(trade["id"], 110.0)
+    assert aggregates.load_stats().closed == 1
+
+    storage.save_trades([])
+
+    assert set(storage.DERIVED_META) == {aggregates.STATS_META, rollups.ROLLUPS_META}
+    assert aggregates.load_stats().closed == 0
+    assert rollups.load_rollups().days == {}
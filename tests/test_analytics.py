@@ -0,0 +1,95 @@
+# tests/test_analytics.py
+import asyncio
+
+import numpy as np
+import pytest
+
+import storage
+from core import analytics
+
+
+def closed_values(rows):
+    """``read_columns``-style values from (closed_at, net_pnl) rows."""
+    return {
+        "date": ["2025-01-01 09:00:00"] * len(rows),
+        "closed_at": [closed_at for closed_at, _ in rows],
+        "net_pnl": [pnl for _, pnl in rows],
+        "fees_paid": [0.5] * len(rows),
+        "risk_amount": [10.0] * len(rows),
+    }
+
+
+def test_equity_drawdown_and_ratios():
+    values = closed_values(
+        [
+            ("2025-01-04 12:00:00", 20.0),
+            ("2025-01-01 12:00:00", 10.0),
+            (None, -5.0),  # no close time: ordered by its open date
+            ("2025-01-02 12:00:00", -10.0),
+            ("2025-01-05 12:00:00", -3.0),
+        ]
+    )
+    report = analytics.compute(analytics.build_columns(values))
+
+    r = np.array([-5.0, 10.0, -10.0, 20.0, -3.0]) / 10
+    assert report.equity.tolist() == [-5.0, 5.0, -5.0, 15.0, 12.0]
+    assert report.drawdown.tolist() == [-5.0, 0.0, -10.0, 0.0, -3.0]
+    assert report.max_drawdown == -10.0
+    assert report.max_drawdown_trades == 1
+    assert report.max_drawdown_days == pytest.approx(3.0)  # Jan 1 -> Jan 4
+    assert report.underwater
+    assert report.fees_paid == 2.5
+    assert report.sharpe == pytest.approx(r.mean() / r.std(ddof=1))
+    assert report.sortino == pytest.approx(
+        r.mean() / np.sqrt(np.mean(np.minimum(r, 0) ** 2))
+    )
+    assert report.r_percentiles[50] == pytest.approx(-0.3)
+    assert report.r_histogram.sum() == 5
+
+
+def test_sparkline():
+    assert analytics.sparkline(np.arange(8.0)) == analytics.SPARK
+    assert analytics.sparkline(np.ones(3)) == "▅▅▅"
+    line = analytics.sparkline(np.arange(1000.0), width=20)
+    assert len(line) == 20 and line[0] == "▁" and line[-1] == "█"
+    assert analytics.sparkline(np.array([])) == ""
+
+
+def test_report_is_cached_until_the_trades_change(tmp_path, monkeypatch):
+    from core.trades import close_trade, open_trade
+
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    ids = [open_trade("BTCUSDT", "long", 1000, 1, 100, 95)["id"] for _ in range(2)]
+    close_trade(ids[0], 110.0)
+
+    first = analytics.load_report()
+    assert analytics.load_report() is first
+    close_trade(ids[1], 90.0)
+    second = analytics.load_report()
+    assert second is not first
+    assert (first.trades, second.trades) == (1, 2)
+    assert second.equity[0] == first.net_pnl
+
+
+def test_history_screen_shows_the_equity_curve(tmp_path, monkeypatch):
+    from core.trades import close_trade, open_trade
+    from screens.view_history_screen import ViewHistoryScreen
+    from tui import CryptoHelperApp
+
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    for exit_price in (110.0, 90.0):
+        trade = open_trade("BTCUSDT", "long", 1000, 1, 100, 95)
+        close_trade(trade["id"], exit_price)
+
+    async def run():
+        app = CryptoHelperApp()
+        async with app.run_test() as pilot:
+            screen = ViewHistoryScreen()
+            await app.push_screen(screen)
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            return str(screen.query_one("#history_equity").render())
+
+    text = asyncio.run(run())
+    assert text.startswith("Equity: █▁")
+    assert "Max DD" in text
@@ -0,0 +1,113 @@
+# tests/test_backtest.py
+import numpy as np
+import pytest
+
+from core.backtest import (
+    REASONS,
+    Candles,
+    CandleSet,
+    ExitRule,
+    first_touch,
+    run_backtest,
+)
+from core.calculator import calculate_quantity, trade_pnl
+
+T0 = 1736071200  # 2025-01-05 10:00:00 UTC
+
+
+def write_candles(path, lows, highs, closes=None):
+    n = len(lows)
+    closes = (
+        closes if closes is not None else [(lo + hi) / 2 for lo, hi in zip(lows, highs)]
+    )
+    data = np.column_stack(
+        [T0 + 60 * np.arange(1, n + 1), closes, highs, lows, closes, np.ones(n)]
+    )
+    np.save(path, data)
+
+
+def trade(trade_id, direction, entry, stop, pair="BTCUSDT"):
+    return {
+        "id": trade_id,
+        "date": "2025-01-05 10:00:00",
+        "pair": pair,
+        "direction": direction,
+        "entry": entry,
+        "stop_loss": stop,
+        "risk_pct": 1.0,
+        "account_size": 1000.0,
+    }
+
+
+def test_first_touch_scans_past_first_block():
+    n = 5000
+    lows = np.full(n, 100.0)
+    lows[3000] = 90.0
+    candles = Candles(np.arange(n), lows, lows + 1, lows, lows)
+    hit = first_touch(
+        candles,
+        start=np.array([0, 3500]),
+        span=np.array([n, n - 3500]),
+        level=np.array([95.0, 95.0]),
+        falls=np.array([True, True]),
+    )
+    assert hit.tolist() == [3000, -1]
+
+
+def test_first_touch_with_many_pending_trades_uses_short_blocks(monkeypatch):
+    import core.backtest as backtest
+
+    monkeypatch.setattr(backtest, "MAX_CELLS", 64)  # 4 candles per block
+    n = 1000
+    lows = np.full(n, 100.0)
+    lows[700] = 90.0
+    candles = Candles(np.arange(n), lows, lows + 1, lows, lows)
+    trades = 16
+
+    hit = first_touch(
+        candles,
+        start=np.zeros(trades, dtype=np.int64),
+        span=np.full(trades, n),
+        level=np.full(trades, 95.0),
+        falls=np.ones(trades, dtype=bool),
+    )
+    assert hit.tolist() == [700] * trades
+
+
+def test_stop_target_and_time_exits(tmp_path):
+    # Price drifts up to 106 then collapses to 97
+    highs = [101, 102, 104, 106, 105, 100, 98]
+    lows = [99.5, 100, 102, 104, 100, 97, 96]
+    write_candles(tmp_path / "BTCUSDT.npy", lows, highs)
+    trades = [trade(1, "long", 100.0, 98.0), trade(2, "short", 100.0, 103.0)]
+    rules = [ExitRule(2.0), ExitRule(None, max_bars=2), ExitRule(5.0)]
+
+    result = run_backtest(trades, CandleSet(str(tmp_path)), rules)
+    rows = {(r["id"], r["rule"]): r for r in result.rows()}
+
+    assert rows[1, "2R"]["reason"] == "target"  # 104 reached in candle 3
+    assert rows[1, "2R"]["exit_price"] == 104.0
+    assert rows[1, "no target / 2 bars"]["reason"] == "time"
+    assert rows[1, "5R"]["reason"] == "stop"  # 110 never reached
+    assert rows[2, "2R"]["reason"] == "stop"  # 103 hit in candle 3
+    assert set(r["reason"] for r in rows.values()) <= set(REASONS)
+
+    # Sizing and PnL match the live calculator / close_trade model
+    sized = calculate_quantity(1000.0, 1.0, 100.0, 98.0)
+    expected = trade_pnl({**trades[0], **sized}, 104.0)
+    assert rows[1, "2R"]["net_pnl"] == pytest.approx(expected[2])
+    assert rows[1, "2R"]["r_multiple"] == pytest.approx(expected[2] / 10.0)
+
+    stats = result.summary()["2R"]
+    assert stats.closed == 2 and stats.wins == 1
+
+
+def test_trades_without_candles_or_sizing_are_skipped(tmp_path):
+    write_candles(tmp_path / "BTCUSDT.npy", [99.0], [101.0])
+    trades = [
+        trade(1, "long", 100.0, 98.0, pair="ETHUSDT"),
+        {**trade(2, "long", 100.0, 98.0), "stop_loss": None},
+    ]
+    result = run_backtest(trades, CandleSet(str(tmp_path)), [ExitRule(1.0)])
+    assert result.skipped == 2
+    assert len(result.trade_id) == 0
@@ -0,0 +1,35 @@
+# tests/test_bench_suite.py
+import json
+
+from benchmarks.suite import BASELINE, DEFAULT_SIZES, compare, percentiles
+
+
+def test_percentiles():
+    p50, p95 = percentiles([float(i) for i in range(1, 101)])
+
+    assert p50 == 50.5
+    assert 94 < p95 < 96
+    assert percentiles([3.0]) == (3.0, 3.0)
+
+
+def test_compare_flags_regressions_over_threshold_and_noise_floor():
+    baseline = {"1000": {"load_s": 1.0, "open_p50_ms": 0.1, "load_peak_mb": 10.0}}
+    results = {
+        "1000": {"load_s": 1.5, "open_p50_ms": 0.3, "load_peak_mb": 11.0},
+        "10000": {"load_s": 9.0},  # not in the baseline
+    }
+
+    regressions = compare(results, baseline, threshold=0.25)
+
+    # open_p50_ms tripled but by less than the 0.5 ms noise floor
+    assert len(regressions) == 1
+    assert regressions[0].startswith("1000 trades load_s")
+    assert compare(results, baseline, threshold=0.6) == []
+
+
+def test_committed_baseline_covers_the_default_sizes():
+    with open(BASELINE) as f:
+        baseline = json.load(f)
+
+    assert baseline["meta"]["backend"] == "json"
+    assert set(baseline["results"]) == {str(size) for size in DEFAULT_SIZES}
@@ -1,7 +1,8 @@
 # tests/test_calculator.py
+import numpy as np
 import pytest
 
-from core.calculator import calculate_quantity
+from core.calculator import calculate_quantity, calculate_quantity_batch
 
 
 def test_stop_loss_equal_entry():
@@ -60,3 +61,41 @@ def test_calculate_quantity_long():
     expected_order_value = expected_quantity * entry
     expected_leverage = expected_order_value / account_size
     assert result["required_leverage"] == expected_leverage
+
+
+def test_batch_matches_scalar_bit_for_bit():
+    """Every batch element should equal the scalar result exactly"""
+    rng = np.random.default_rng(7)
+    entries = rng.uniform(0.05, 70000, 2000)
+    stops = entries * rng.uniform(0.9, 1.1, 2000)
+    accounts = rng.choice([250, 1000, 5000.5], 2000)
+    risks = rng.choice([0.5, 1, 2, 3], 2000)
+    # Leverage ties such as 1.15 / 2.45 round differently in NumPy and Python
+    entries[:4] = [1.15, 2.45, 3.15, 1.05]
+    stops[:4] = [0.15, 1.45, 2.15, 0.05]
+    accounts[:4] = risks[:4] = 100
+
+    batch = calculate_quantity_batch(accounts, risks, entries, stops)
+
+    for i in range(len(entries)):
+        scalar = calculate_quantity(
+            float(accounts[i]), float(risks[i]), float(entries[i]), float(stops[i])
+        )
+        for key in (
+            "risk_amount",
+            "quantity",
+            "order_value",
+            "required_leverage",
+            "taker_fee",
+            "maker_fee",
+        ):
+            assert batch[key][i] == scalar[key], (key, i)
+
+
+def test_batch_flags_zero_stop_distance():
+    """Stop equal to entry is reported in the mask instead of raising"""
+    batch = calculate_quantity_batch(1000, 2, [25000, 25000], [24500, 25000])
+
+    assert batch["valid"].tolist() == [True, False]
+    assert np.isnan(batch["quantity"][1])
+    assert batch["quantity"][0] == calculate_quantity(1000, 2, 25000, 24500)["quantity"]
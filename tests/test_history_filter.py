@@ -0,0 +1,119 @@
+# tests/test_history_filter.py
+import asyncio
+
+import pytest
+
+import storage
+from screens.view_history_screen import parse_filter
+
+
+def test_parse_filter_terms():
+    assert parse_filter(
+        "pair:solusdt dir:SHORT from:2025-01-01 to:2025-01-31 pnl:>0 fomo late"
+    ) == {
+        "pair": "SOLUSDT",
+        "direction": "short",
+        "start": "2025-01-01",
+        "end": "2025-02-01",
+        "min_pnl": 0.0,
+        "text": "fomo late",
+    }
+    assert parse_filter("pnl:-5..10 status:closed") == {
+        "min_pnl": -5.0,
+        "max_pnl": 10.0,
+        "status": "closed",
+    }
+    assert parse_filter("  ") == {}
+    with pytest.raises(ValueError):
+        parse_filter("dir:sideways")
+    with pytest.raises(ValueError):
+        parse_filter("from:last-week")
+
+
+def test_typing_a_filter_narrows_the_history(tmp_path, monkeypatch):
+    from core.trades import close_trade, open_trade
+    from screens.view_history_screen import ViewHistoryScreen
+    from tui import CryptoHelperApp
+
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    sol = [open_trade("SOLUSDT", "short", 1000, 1, 100, 105)["id"] for _ in range(2)]
+    btc = open_trade("BTCUSDT", "long", 1000, 1, 100, 95)["id"]
+    close_trade(sol[1], 90, notes="Breakout retest")
+
+    async def run():
+        app = CryptoHelperApp()
+        async with app.run_test() as pilot:
+            screen = ViewHistoryScreen()
+            await app.push_screen(screen)
+            await app.workers.wait_for_complete()
+            await pilot.press("f", *"pair:SOLUSDT")
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            by_pair = [t["id"] for t in screen.trades]
+
+            await pilot.press(*" bre")
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            by_notes = [t["id"] for t in screen.trades]
+
+            # A trade that starts matching shows up without retyping
+            screen.run_write(close_trade, sol[0], 100.0, "break even")
+            screen.run_write(close_trade, btc, 100.0, "break even")
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            return by_pair, by_notes, [t["id"] for t in screen.trades]
+
+    by_pair, by_notes, after_close = asyncio.run(run())
+
+    assert by_pair == sol
+    assert by_notes == [sol[1]]
+    assert after_close == sol
+
+
+def test_paging_during_a_reload_waits_for_it(tmp_path, monkeypatch):
+    import threading
+
+    from core.trades import open_trade
+    from screens import view_history_screen
+    from screens.view_history_screen import ViewHistoryScreen
+    from textual.widgets import DataTable
+    from tui import CryptoHelperApp
+
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    monkeypatch.setattr(view_history_screen, "PAGE_SIZE", 2)
+    pairs = ["SOLUSDT", "BTCUSDT"] * 6
+    ids = [open_trade(pair, "long", 1000, 1, 100, 95)["id"] for pair in pairs]
+    started, release = threading.Event(), threading.Event()
+    fetch_all = ViewHistoryScreen._fetch_all
+
+    def slow_fetch_all(start, criteria):
+        if criteria:
+            started.set()
+            release.wait(5)
+        return fetch_all(start, criteria)
+
+    monkeypatch.setattr(ViewHistoryScreen, "_fetch_all", staticmethod(slow_fetch_all))
+
+    async def run():
+        app = CryptoHelperApp()
+        async with app.run_test() as pilot:
+            screen = ViewHistoryScreen()
+            await app.push_screen(screen)
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            table = screen.query_one("#history_table", DataTable)
+
+            screen.criteria = {"pair": "SOLUSDT"}
+            screen._reload_table()
+            await asyncio.to_thread(started.wait, 5)
+            screen.action_page(1)  # asked for while the reload is running
+            release.set()
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            return screen.matches, [t["id"] for t in screen.trades], table.loading
+
+    matches, shown, loading = asyncio.run(run())
+
+    assert matches == ids[::2]
+    assert shown == matches  # paged within the new matches
+    assert not loading
@@ -0,0 +1,141 @@
+# tests/test_history_paging.py
+import asyncio
+
+import pytest
+
+import storage
+from screens import view_history_screen
+
+TRADES = 10  # five 2-row pages; the window holds three of them
+
+
+@pytest.fixture
+def ids(tmp_path, monkeypatch):
+    from core.trades import open_trade
+
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    monkeypatch.setattr(view_history_screen, "PAGE_SIZE", 2)
+    return [
+        open_trade("BTCUSDT", "long", 1000, 1, 100, 95)["id"] for _ in range(TRADES)
+    ]
+
+
+def run_screen(steps):
+    """Open the history screen and run ``await steps(screen, settle)``."""
+    from tui import CryptoHelperApp
+
+    async def run():
+        app = CryptoHelperApp()
+        async with app.run_test() as pilot:
+
+            async def settle(*keys):
+                await pilot.press(*keys)
+                await app.workers.wait_for_complete()
+                await pilot.pause()
+
+            screen = view_history_screen.ViewHistoryScreen()
+            await app.push_screen(screen)
+            await settle()
+            return await steps(screen, settle)
+
+    return asyncio.run(run())
+
+
+def state(screen):
+    """(window_start, shown ids, highlighted id)."""
+    return (
+        screen.window_start,
+        [t["id"] for t in screen.trades],
+        screen._highlighted_id(),
+    )
+
+
+def test_window_is_clamped_at_both_ends(ids):
+    async def steps(screen, settle):
+        opened = state(screen)
+        await settle("[")  # already on the first page
+        first = state(screen)
+        await settle("g", *"5", "enter")  # last page
+        last = state(screen)
+        await settle("]")  # past the end
+        return opened, first, last, state(screen)
+
+    opened, first, last, past_end = run_screen(steps)
+
+    assert opened == first == (0, ids[:6], ids[0])
+    assert last == (4, ids[4:], ids[8])
+    assert past_end == (4, ids[4:], ids[9])
+
+
+def test_cursor_keeps_its_row_across_page_moves(ids):
+    async def steps(screen, settle):
+        await settle("down")
+        moved = [state(screen)]
+        for key in "]]][":
+            await settle(key)
+            moved.append(state(screen))
+        return moved
+
+    moved = run_screen(steps)
+
+    # Each page move keeps the offset within the page (row 1 of 2)
+    assert [highlighted for _, _, highlighted in moved] == [
+        ids[1],
+        ids[3],
+        ids[5],
+        ids[7],
+        ids[5],
+    ]
+    # The window slides with the cursor and always contains it
+    for start, shown, highlighted in moved:
+        assert shown == ids[start : start + 6] and highlighted in shown
+
+
+def test_sliding_the_window_keeps_the_highlighted_trade(ids):
+    async def steps(screen, settle):
+        await settle(*["down"] * 5)  # last row of the window
+        return state(screen)
+
+    start, shown, highlighted = run_screen(steps)
+
+    assert start == 2 and shown == ids[2:8]
+    assert highlighted == ids[5]
+
+
+def test_jump_to_trade_id(ids):
+    async def steps(screen, settle):
+        await settle("g", *f"#{ids[7]}", "enter")
+        found = state(screen)
+        await settle("g", *"#999", "enter")
+        return found, state(screen)
+
+    found, missing = run_screen(steps)
+
+    assert found == (4, ids[4:], ids[7])
+    assert missing == found  # unknown id: a popup, the window stays
+
+
+def test_equity_is_recomputed_on_demand_not_per_change(ids, monkeypatch):
+    from core.trades import close_trade
+
+    reports = []
+    load_report = view_history_screen.load_report
+    monkeypatch.setattr(
+        view_history_screen,
+        "load_report",
+        lambda: reports.append(1) or load_report(),
+    )
+
+    async def steps(screen, settle):
+        shown = [len(reports)]
+        close_trade(ids[0], 110.0)
+        await settle()
+        shown.append(len(reports))
+        await settle("e")
+        shown.append(len(reports))
+        return shown, screen._equity_text
+
+    shown, equity = run_screen(steps)
+
+    assert shown == [1, 1, 2]  # once the rows are shown, then on E only
+    assert equity.startswith("Equity:")
@@ -0,0 +1,78 @@
+# tests/test_importer.py
+import os
+
+import pytest
+
+import storage
+from core import importer
+from core.importer import Fill, group_fills
+
+DATA = os.path.join(os.path.dirname(__file__), "data")
+CSV = os.path.join(DATA, "fills.csv")
+JSONL = os.path.join(DATA, "fills.jsonl")
+
+
+@pytest.fixture
+def trade_log(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+
+
+def fill(time, side, price, qty, fee=0.0, order_id="o", symbol="BTCUSDT"):
+    return Fill(f"2025-01-01 {time}", symbol, side, price, qty, fee, order_id)
+
+
+def test_group_fills_scales_in_and_flips():
+    trades = group_fills(
+        [
+            fill("10:00:00", "buy", 100.0, 1.0, 0.1, "a"),
+            fill("11:00:00", "buy", 110.0, 1.0, 0.1, "b"),
+            fill("12:00:00", "sell", 120.0, 3.0, 0.3, "c"),  # close 2, short 1
+        ]
+    )
+
+    long, short = trades
+    assert long["direction"] == "long" and long["status"] == "closed"
+    assert long["entry"] == 105.0 and long["quantity"] == 2.0
+    assert long["gross_pnl"] == pytest.approx(30.0)
+    assert long["fees_paid"] == pytest.approx(0.4)
+    assert long["exchange_order_id"] == "a"
+    assert short["direction"] == "short" and short["status"] == "open"
+    assert short["quantity"] == pytest.approx(1.0)
+    assert short["exchange_order_id"] == "c"
+
+
+def test_import_sample_exports_and_dedupe(trade_log):
+    result = importer.import_files([CSV, JSONL], workers=2, chunk_bytes=64)
+
+    assert result.rows == 13
+    assert result.duplicate_fills == 3  # repeated CSV row + ETH fills in both files
+    assert result.added == 5
+    trades = storage.load_trades()
+    assert [t["pair"] for t in trades] == [
+        "BTCUSDT",
+        "ETHUSDT",
+        "SOLUSDT",
+        "SOLUSDT",
+        "DOGEUSDT",
+    ]
+    assert trades[0]["net_pnl"] == pytest.approx(35.0 - 1.32825)
+    assert storage.count_trades(status="open") == 1
+
+    again = importer.import_files([CSV, JSONL], workers=1)
+    assert (again.added, again.skipped) == (0, 5)
+    assert storage.count_trades() == 5
+
+
+def test_import_closes_previously_open_trade(trade_log, tmp_path):
+    partial = tmp_path / "partial.jsonl"
+    with open(JSONL) as f:
+        partial.write_text("".join(f.readlines()[:3]))  # DOGE entry only
+    importer.import_files([str(partial)])
+    assert storage.find_trades(pair="DOGEUSDT")[0]["status"] == "open"
+
+    result = importer.import_files([JSONL])
+
+    assert (result.added, result.updated) == (0, 1)
+    doge = storage.find_trades(pair="DOGEUSDT")[0]
+    assert doge["status"] == "closed"
+    assert doge["net_pnl"] == pytest.approx(-20.429)
@@ -0,0 +1,67 @@
+# tests/test_perf.py
+import asyncio
+import json
+
+import pytest
+
+from core import perf
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    perf.reset()
+    yield
+    perf.reset()
+
+
+def test_timed_counts_calls_and_percentiles():
+    @perf.timed("test.op")
+    def op(x):
+        return x * 2
+
+    assert [op(i) for i in range(200)][-1] == 398
+    for elapsed_ms in range(1, 101):
+        perf.record("test.spread", elapsed_ms * 1_000_000)
+
+    stats = perf.snapshot()
+    assert stats["test.op"]["count"] == 200
+    spread = stats["test.spread"]
+    assert spread["count"] == 100
+    assert spread["total_ms"] == pytest.approx(5050)
+    assert spread["p50_ms"] == 51
+    assert spread["p95_ms"] == 96
+    assert spread["p99_ms"] == 100
+    assert spread["max_ms"] == 100
+
+
+def test_timer_records_failures_and_coroutines(tmp_path):
+    with pytest.raises(ZeroDivisionError):
+        with perf.timer("test.block"):
+            1 / 0
+
+    @perf.timed()
+    async def fetch():
+        await asyncio.sleep(0)
+        return "ok"
+
+    assert asyncio.run(fetch()) == "ok"
+
+    path = tmp_path / "perf.json"
+    perf.dump(str(path))
+    dumped = json.loads(path.read_text())
+    assert dumped["test.block"]["count"] == 1
+    assert any(name.endswith("fetch") for name in dumped)
+
+
+def test_trade_mutations_are_instrumented(tmp_path, monkeypatch):
+    import storage
+    from core.trades import close_trade, open_trade
+
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    trade = open_trade("BTCUSDT", "long", 1000, 1, 100.0, 95.0)
+    close_trade(trade["id"], 110.0)
+
+    stats = perf.snapshot()
+    assert stats["trades.open"]["count"] == 1
+    assert stats["trades.close"]["count"] == 1
+    assert stats["calculator.calculate_quantity"]["count"] == 1
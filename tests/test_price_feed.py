@@ -0,0 +1,60 @@
+# tests/test_price_feed.py
+import asyncio
+import json
+
+import pytest
+
+from core.calculator import trade_pnl
+from core.price_feed import PriceFeed, parse_tick, replay_source
+
+
+def open_trade(trade_id, pair, direction="long", entry=100.0, quantity=2.0):
+    return {
+        "id": trade_id,
+        "pair": pair,
+        "direction": direction,
+        "entry": entry,
+        "quantity": quantity,
+        "order_value": entry * quantity,
+        "status": "open",
+    }
+
+
+def test_trade_pnl_long_and_short():
+    gross, fees, net = trade_pnl(open_trade(1, "BTCUSDT"), 110.0)
+    assert gross == 20.0
+    assert fees == pytest.approx(200 * 0.00055 + 220 * 0.00055)
+    assert net == gross - fees
+
+    gross, _, _ = trade_pnl(open_trade(2, "BTCUSDT", "short"), 110.0)
+    assert gross == -20.0
+
+
+def test_parse_tick_formats():
+    assert parse_tick('{"symbol": "btcusdt", "price": "1.5", "time": 3}') == (
+        "BTCUSDT",
+        1.5,
+        3,
+    )
+    assert parse_tick("ETHUSDT 3500.25\n") == ("ETHUSDT", 3500.25, None)
+
+
+def test_feed_coalesces_ticks_into_few_updates(tmp_path):
+    ticks = tmp_path / "ticks.jsonl"
+    with open(ticks, "w") as f:
+        for i in range(5000):
+            pair = "BTCUSDT" if i % 2 else "ETHUSDT"
+            f.write(json.dumps({"pair": pair, "price": 100 + i * 0.01}) + "\n")
+
+    trades = [open_trade(1, "BTCUSDT"), open_trade(2, "ETHUSDT", "short")]
+    feed = PriceFeed(replay_source(str(ticks)), open_trades=trades, max_ui_rate=2)
+    updates = []
+    feed.subscribe(updates.append)
+
+    asyncio.run(feed.run())
+
+    assert feed.ticks == 5000
+    assert 1 <= len(updates) <= 3  # one per 0.5s interval plus the final flush
+    assert feed.prices == {"BTCUSDT": 100 + 4999 * 0.01, "ETHUSDT": 100 + 4998 * 0.01}
+    assert feed.marks[1].net_pnl == trade_pnl(trades[0], feed.prices["BTCUSDT"])[2]
+    assert updates[-1][2].price == feed.prices["ETHUSDT"]
@@ -0,0 +1,124 @@
+# tests/test_rollups.py
+import asyncio
+
+import storage
+from core import rollups
+from core.rollups import Rollups
+
+
+def closed(trade_id, day, pnl, pair="BTCUSDT", direction="long"):
+    return {
+        "id": trade_id,
+        "date": "2025-01-01 09:00:00",
+        "closed_at": f"{day} 12:00:00",
+        "pair": pair,
+        "direction": direction,
+        "status": "closed",
+        "net_pnl": pnl,
+        "fees_paid": 1.0,
+        "risk_amount": 10.0,
+    }
+
+
+def test_rollup_buckets_by_period_and_pair():
+    r = Rollups()
+    r.add(closed(1, "2025-03-03", 20.0))  # Monday of ISO week 10
+    r.add(closed(2, "2025-03-09", -5.0, "SOLUSDT", "short"))  # Sunday, same week
+    r.add(closed(3, "2025-04-01", 10.0))
+
+    months = r.rows("month", split=False)
+    assert [(bucket, cell.trades, cell.net_pnl) for bucket, _, cell in months] == [
+        ("2025-04", 1, 10.0),
+        ("2025-03", 2, 15.0),
+    ]
+    weeks = r.rows("week")
+    assert [(bucket, key) for bucket, key, _ in weeks] == [
+        ("2025-W14", "BTCUSDT/long"),
+        ("2025-W10", "BTCUSDT/long"),
+        ("2025-W10", "SOLUSDT/short"),
+    ]
+    march = r.total(start="2025-03-01", end="2025-04-01")
+    assert (march.trades, march.wins, march.fees_paid, march.avg_r) == (
+        2,
+        1,
+        2.0,
+        0.75,
+    )
+    assert r.total(pair="SOLUSDT").net_pnl == -5.0
+
+
+def test_removing_a_trade_is_exact():
+    r = Rollups()
+    trades = [closed(i, "2025-03-03", pnl) for i, pnl in enumerate([1.5, -2.25], 1)]
+    for t in trades:
+        r.add(t)
+    r.remove(trades[0])
+    r.remove(trades[1])
+
+    assert r.days == {}
+    assert Rollups.from_json(r.to_json()).days == {}
+
+
+def test_close_and_delete_keep_persisted_rollups_current(tmp_path, monkeypatch):
+    from core.trades import close_trade, delete_trade, open_trade
+
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    ids = [open_trade("BTCUSDT", "long", 1000, 1, 100, 95)["id"] for _ in range(3)]
+    close_trade(ids[0], 110.0)
+    close_trade(ids[1], 90.0)
+    delete_trade(ids[0])
+    delete_trade(ids[2])  # still open: not in the rollups
+
+    stored = rollups._stored_rollups()
+    assert stored.total().trades == 1
+    assert stored.matches(rollups.rebuild_rollups())
+
+
+def test_a_close_rewrites_only_its_month(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    storage.add_trade(closed(1, "2025-01-03", 5.0))
+    rollups.rebuild_rollups()
+    written = []
+    write_meta = storage.write_meta
+    monkeypatch.setattr(
+        storage,
+        "write_meta",
+        lambda name, data: written.append(name) or write_meta(name, data),
+    )
+
+    new = closed(2, "2025-03-09", -2.0, pair="ETHUSDT")
+    storage.add_trade(new)
+    rollups.record_close(new)
+    rollups.record_close({**new, "id": 3})  # same month, now listed
+
+    assert written == [
+        rollups.month_meta("2025-03"),
+        rollups.ROLLUPS_META,
+        rollups.month_meta("2025-03"),
+    ]
+    assert set(rollups.load_rollups().days) == {"2025-01-03", "2025-03-09"}
+
+
+def test_rollup_screen_switches_buckets(tmp_path, monkeypatch):
+    from core.trades import close_trade, open_trade
+    from screens.rollup_screen import RollupScreen
+    from tui import CryptoHelperApp
+
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    for direction in ("long", "short"):
+        trade = open_trade("BTCUSDT", direction, 1000, 1, 100, 95)
+        close_trade(trade["id"], 105.0)
+
+    async def run():
+        app = CryptoHelperApp()
+        async with app.run_test() as pilot:
+            screen = RollupScreen()
+            await app.push_screen(screen)
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            table = screen.query_one("#rollup_table")
+            split_rows = table.row_count
+            await pilot.press("p", "d")
+            return split_rows, table.row_count, screen.granularity
+
+    assert asyncio.run(run()) == (2, 1, "day")
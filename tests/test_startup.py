@@ -0,0 +1,60 @@
+# tests/test_startup.py
+import asyncio
+
+import pytest
+
+from benchmarks.bench_startup import imported_modules
+
+UI_PACKAGES = ("rich", "textual")
+
+
+def _packages(modules):
+    return {name.split(".")[0] for name in modules}
+
+
+@pytest.mark.parametrize(
+    "module", ["core.trades", "core.calculator", "core.aggregates", "storage", "tch"]
+)
+def test_computational_path_does_not_import_ui(module):
+    assert not _packages(imported_modules(module)) & set(UI_PACKAGES)
+
+
+def test_tui_imports_screens_on_first_selection():
+    loaded = imported_modules("tui")
+
+    assert "screens" in loaded
+    assert not {name for name in loaded if name.startswith("screens.")}
+    assert "core.trades" not in loaded
+
+
+def test_number_key_opens_menu_screen(tmp_path, monkeypatch):
+    import storage
+    from tui import CryptoHelperApp
+
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+
+    async def run():
+        app = CryptoHelperApp()
+        async with app.run_test() as pilot:
+            await pilot.press("3")
+            await pilot.pause()
+            return type(app.screen).__name__
+
+    assert asyncio.run(run()) == "ViewHistoryScreen"
+
+
+def test_view_history_is_still_importable_from_core_trades(tmp_path, monkeypatch):
+    import storage
+    from core import report
+    from core.trades import close_trade, open_trade, view_history
+
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    trade = open_trade("BTCUSDT", "long", 1000, 1, 100, 95)
+    close_trade(trade["id"], 110.0)
+
+    assert view_history is report.view_history
+    with report.console.capture() as capture:
+        view_history()
+    text = capture.get()
+    # The analytics summary comes before the table, as it always did
+    assert text.index("Trade Analytics") < text.index("Trade History")
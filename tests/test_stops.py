@@ -0,0 +1,107 @@
+# tests/test_stops.py
+import threading
+
+import storage
+from core import events, stops
+from core.price_feed import PriceFeed
+from core.stops import StopEngine, Trigger
+
+
+def open_trade(trade_id, direction, stop, pair="BTCUSDT"):
+    return {
+        "id": trade_id,
+        "pair": pair,
+        "direction": direction,
+        "stop_loss": stop,
+        "status": "open",
+    }
+
+
+def test_ticks_pop_only_crossed_stops():
+    engine = StopEngine(
+        [
+            open_trade(1, "long", 95.0),
+            open_trade(2, "long", 90.0),
+            open_trade(3, "short", 105.0),
+            open_trade(4, "short", 110.0),
+            open_trade(5, "long", 99.0, pair="ETHUSDT"),
+        ]
+    )
+
+    assert engine.on_tick("BTCUSDT", 100.0) == []
+    assert engine.on_tick("BTCUSDT", 94.0) == [
+        Trigger(1, "BTCUSDT", "long", 95.0, 94.0)
+    ]
+    assert [t.trade_id for t in engine.on_tick("BTCUSDT", 120.0)] == [3, 4]
+    assert engine.on_tick("BTCUSDT", 80.0)[0].trade_id == 2
+    assert len(engine) == 1  # only the ETH trade is still watched
+
+
+def test_closed_and_moved_stops_are_skipped(monkeypatch):
+    engine = StopEngine([open_trade(1, "long", 95.0), open_trade(2, "long", 96.0)])
+    trades = {2: open_trade(2, "long", 90.0)}
+    monkeypatch.setattr("storage.get_trade", trades.get)
+
+    # Trade 1 was closed; trade 2 moved its stop down
+    engine.on_trades_changed(events.TradeChange(removed=[1], updated=[2]))
+
+    assert engine.on_tick("BTCUSDT", 93.0) == []
+    assert engine.on_tick("BTCUSDT", 89.0)[0].stop == 90.0
+
+
+def test_replay_file(tmp_path):
+    ticks = tmp_path / "ticks.txt"
+    ticks.write_text("BTCUSDT 100\nETHUSDT 50\nBTCUSDT 96\nBTCUSDT 94.5\n")
+    engine = StopEngine([open_trade(1, "long", 95.0)])
+    seen = []
+
+    hits = engine.replay(str(ticks), on_trigger=seen.extend)
+
+    assert hits == seen == [Trigger(1, "BTCUSDT", "long", 95.0, 94.5)]
+
+
+def test_stop_detaches_the_tick_handler(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    feed = PriceFeed(source=None, open_trades=[])
+    seen = []
+
+    stops.start(feed, seen.extend)
+    assert len(feed._tick_handlers) == 1
+    stops.stop()
+
+    # A tick arriving before the feed itself stops must not reach the engine
+    assert feed._tick_handlers == []
+    assert stops.get_engine() is None
+
+
+def test_starting_reads_the_open_trades_on_the_feed_thread(tmp_path, monkeypatch):
+    from core.price_feed import replay_source
+    from core.trades import open_trade as open_real_trade
+
+    monkeypatch.setattr(storage, "TRADE_LOG", str(tmp_path / "trades.json"))
+    trade = open_real_trade("BTCUSDT", "long", 1000, 1, 100, 95)
+    ticks = tmp_path / "ticks.jsonl"
+    ticks.write_text(
+        '{"pair": "ETHUSDT", "price": 1, "time": 0}\n'
+        '{"pair": "BTCUSDT", "price": 94, "time": 1}\n'
+    )
+    readers = []
+    iter_trades = storage.iter_trades
+    monkeypatch.setattr(
+        storage,
+        "iter_trades",
+        lambda **kw: readers.append(threading.current_thread()) or iter_trades(**kw),
+    )
+    feed = PriceFeed(replay_source(str(ticks), speed=10))
+    seen = []
+
+    feed.start()
+    stops.start(feed, seen.extend)
+    assert threading.current_thread() not in readers
+    feed._thread.join(timeout=5)
+    stops.stop()
+    feed.stop()
+
+    assert readers and threading.current_thread() not in readers
+    assert [hit.trade_id for hit in seen] == [trade["id"]]
+    assert feed.marks[trade["id"]].price == 94.0
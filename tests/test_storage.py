@@ -0,0 +1,565 @@
+# tests/test_storage.py
+import contextlib
+import json
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+import storage
+from storage.base import ConflictError, StorageError
+from storage.journal import JournalStore
+from storage.json_store import JsonStore, iter_json_array
+from storage.locking import fcntl
+from storage.partitioned import PartitionedStore, archive_json
+from storage.records import Trade
+from storage.repository import TradeRepository
+from storage.sqlite_store import SqliteStore, migrate_json
+
+
+def make_trade(trade_id, pair="BTCUSDT"):
+    return {"id": trade_id, "pair": pair, "status": "open", "net_pnl": None}
+
+
+def test_journal_replays_events_in_new_instance(tmp_path):
+    """A fresh store should rebuild the same state from snapshot + journal"""
+    path = str(tmp_path / "trades.json")
+    store = JournalStore(path)
+    store.add(make_trade(1))
+    store.add(make_trade(2, "ETHUSDT"))
+    store.update(1, {"status": "closed", "net_pnl": 12.5})
+
+    reloaded = JournalStore(path).load()
+
+    assert reloaded == store.load()
+    assert reloaded[0]["status"] == "closed"
+    assert reloaded[1]["pair"] == "ETHUSDT"
+
+
+def test_journal_delete_leaves_other_ids_alone(tmp_path):
+    path = str(tmp_path / "trades.json")
+    store = JournalStore(path)
+    for i in range(1, 4):
+        store.add(make_trade(i))
+
+    assert store.delete(2)
+    assert not store.delete(99)
+    assert [t["id"] for t in JournalStore(path).load()] == [1, 3]
+
+
+def test_journal_compaction_folds_events_into_snapshot(tmp_path):
+    path = str(tmp_path / "trades.json")
+    store = JournalStore(path)
+    store.add(make_trade(1))
+    store.update(1, {"notes": "tp hit"})
+    store.compact()
+
+    with open(store.journal_path) as f:
+        assert f.read() == ""
+    assert JournalStore(path).load() == [{**make_trade(1), "notes": "tp hit"}]
+
+
+def test_journal_seeds_from_existing_json_log(tmp_path):
+    path = tmp_path / "trades.json"
+    path.write_text('[{"id": 1, "pair": "SOLUSDT", "status": "open"}]')
+
+    assert JournalStore(str(path)).load()[0]["pair"] == "SOLUSDT"
+
+
+def test_sqlite_queries_and_delete(tmp_path):
+    store = SqliteStore(str(tmp_path / "trades.json"))
+    store.add({**make_trade(1), "date": "2025-01-05 10:00:00", "direction": "long"})
+    store.add(
+        {
+            **make_trade(2, "SOLUSDT"),
+            "date": "2025-02-01 09:00:00",
+            "direction": "short",
+        }
+    )
+    store.add(
+        {
+            **make_trade(3, "SOLUSDT"),
+            "date": "2025-02-20 09:00:00",
+            "direction": "short",
+        }
+    )
+    store.update(1, {"status": "closed", "net_pnl": 5.0})
+
+    assert [t["id"] for t in store.find(status="open")] == [2, 3]
+    assert store.get(1)["net_pnl"] == 5.0
+    feb = store.find(pair="SOLUSDT", start="2025-02-01", end="2025-02-10")
+    assert [t["id"] for t in feb] == [2]
+
+    assert store.delete(2)
+    assert [t["id"] for t in store.load()] == [1, 3]
+    assert store.get(2) is None
+
+
+def test_migrate_json_to_sqlite(tmp_path):
+    json_path = tmp_path / "trades.json"
+    json_path.write_text(
+        '[{"id": 1, "date": "2025-01-01 00:00:00", "pair": "BTCUSDT",'
+        ' "direction": "long", "status": "open"}]'
+    )
+    db_path = str(tmp_path / "trades.db")
+
+    assert migrate_json(str(json_path), db_path) == 1
+    assert SqliteStore(db_path).load()[0]["pair"] == "BTCUSDT"
+
+
+def closed_in(trade_id, month, pair="BTCUSDT"):
+    return {
+        **make_trade(trade_id, pair),
+        "status": "closed",
+        "net_pnl": 1.0,
+        "date": f"{month}-02 10:00:00",
+        "closed_at": f"{month}-03 10:00:00",
+    }
+
+
+def test_partitioned_store_reads_only_the_segments_a_query_needs(tmp_path):
+    path = tmp_path / "trades.json"
+    trades = [
+        closed_in(1, "2025-01"),
+        closed_in(2, "2025-01", "SOLUSDT"),
+        closed_in(3, "2025-02"),
+        {**make_trade(4), "date": "2025-01-05 09:00:00"},
+    ]
+    path.write_text(json.dumps(trades))
+
+    assert archive_json(str(path))[0] == 3
+    store = PartitionedStore(str(path))
+    assert store.load() == trades
+    assert {m: seg["count"] for m, seg in store.segments().items()} == {
+        "2025-01": 2,
+        "2025-02": 1,
+    }
+    with open(store.hot_path) as f:
+        assert [t["id"] for t in json.load(f)["trades"]] == [4]
+
+    reads = []
+    read_segment = store._read_segment
+    store._read_segment = lambda month: reads.append(month) or read_segment(month)
+    assert [t["id"] for t in store.find(status="open")] == [4]
+    assert reads == []
+    assert [t["id"] for t in store.find(start="2025-02-01")] == [3]
+    assert [t["id"] for t in store.find(pair="SOLUSDT")] == [2]
+    assert reads == ["2025-02", "2025-01"]
+
+
+def test_partitioned_store_mutations_only_rewrite_the_hot_segment(tmp_path):
+    path = str(tmp_path / "trades.json")
+    store = PartitionedStore(path, codec="lzma")
+    store.add_many([closed_in(1, "2025-01"), closed_in(2, "2025-01")])
+    archived = store.signature()[1], store.segments()
+    assert archived[1]["2025-01"]["file"].endswith(".json.xz")
+
+    store.add({**make_trade(3), "date": "2025-03-01 09:00:00"})
+    store.update(3, {"notes": "hot edit"})
+    store.update(1, {"notes": "archived edit"})  # copied into the hot segment
+    store.delete(2)  # tombstone
+    assert (store.signature()[1], store.segments()) == archived
+
+    reloaded = PartitionedStore(path)
+    assert [(t["id"], t.get("notes")) for t in reloaded.load()] == [
+        (1, "archived edit"),
+        (3, "hot edit"),
+    ]
+    assert reloaded.get(2) is None
+
+    # The next roll folds the edit and the delete into a new January segment
+    assert reloaded.roll() == 1
+    january = reloaded.segments()["2025-01"]
+    assert january["count"] == 1 and january["file"] != archived[1]["2025-01"]["file"]
+    assert not os.path.exists(
+        os.path.join(reloaded.archive_dir, archived[1]["2025-01"]["file"])
+    )
+    assert PartitionedStore(path).load() == reloaded.load()
+
+
+def test_partitioned_repository_caches_only_the_hot_segment(tmp_path, monkeypatch):
+    path = tmp_path / "trades.json"
+    trades = [
+        closed_in(1, "2025-01"),
+        closed_in(2, "2025-02", "SOLUSDT"),
+        closed_in(3, "2025-02"),
+        {**make_trade(4), "date": "2025-03-05 09:00:00"},
+    ]
+    path.write_text(json.dumps(trades))
+    archive_json(str(path))
+    monkeypatch.setattr(storage, "TRADE_LOG", str(path))
+    monkeypatch.setenv("TCH_STORAGE", "partitioned")
+    store = storage.get_store()
+    reads = []
+    read_segment = store._read_segment
+    store._read_segment = lambda month: reads.append(month) or read_segment(month)
+
+    assert [t["id"] for t in storage.iter_trades(status="open")] == [4]
+    assert storage.count_trades() == 4 and storage.count_trades("closed") == 3
+    assert storage.get_trade(4)["status"] == "open"
+    assert storage.remove_trade(4)  # hot: no archive lookup
+    assert reads == []
+
+    assert storage.get_trade(1)["pair"] == "BTCUSDT"
+    assert [t["id"] for t in storage.iter_trades(start="2025-02-01")] == [2, 3]
+    assert reads == ["2025-01", "2025-02"]
+
+    storage.update_trade(2, {"notes": "archived edit"})  # now hot
+    assert storage.remove_trade(3)  # tombstone
+    assert storage.count_trades() == 2
+    before, after = storage.closed_trades_near(("2025-02-03 10:00:00", 0, 2), 5)
+    assert ([t["id"] for t in before], [t["id"] for t in after]) == ([1], [2])
+    assert storage.net_pnl_range() == (1.0, 1.0)
+    assert [(t["id"], t.get("notes")) for t in storage.load_trades()] == [
+        (1, None),
+        (2, "archived edit"),
+    ]
+
+
+def test_partitioned_pages_read_only_the_lowest_segments(tmp_path, monkeypatch):
+    path = tmp_path / "trades.json"
+    trades = [
+        closed_in(1, "2025-01"),
+        closed_in(2, "2025-01"),
+        closed_in(3, "2025-02"),
+        {**make_trade(4), "date": "2025-03-05 09:00:00"},
+    ]
+    path.write_text(json.dumps(trades))
+    archive_json(str(path))
+    monkeypatch.setattr(storage, "TRADE_LOG", str(path))
+    monkeypatch.setenv("TCH_STORAGE", "partitioned")
+    store = storage.get_store()
+    reads = []
+    read_segment = store._read_segment
+    store._read_segment = lambda month: reads.append(month) or read_segment(month)
+
+    assert storage.query_trade_ids() is None  # no filter: nothing to load
+    assert [t["id"] for t in storage.page_trades(0, 2)] == [1, 2]
+    assert reads == ["2025-01"]
+    assert [t["id"] for t in storage.page_trades(1, 5)] == [2, 3, 4]
+
+
+class CountingStore(JsonStore):
+    loads = 0
+
+    def load(self):
+        self.loads += 1
+        return super().load()
+
+
+def test_repository_serves_reads_from_cache(tmp_path):
+    store = CountingStore(str(tmp_path / "trades.json"))
+    repo = TradeRepository(store)
+    repo.add(make_trade(1))
+    repo.add(make_trade(2))
+    repo.update(1, {"status": "closed"})
+    repo.find(status="open")
+    repo.get(2)
+
+    assert store.loads == 1
+    assert [t["status"] for t in JsonStore(store.path).load()] == ["closed", "open"]
+
+
+def test_sqlite_repository_sends_reads_to_indexed_queries(tmp_path):
+    class LoadCounting(SqliteStore):
+        loads = 0
+
+        def load(self):
+            self.loads += 1
+            return super().load()
+
+    store = LoadCounting(str(tmp_path / "trades.db"))
+    repo = TradeRepository(store)
+    repo.add_many([{**closed_in(1, "2025-01"), "direction": "long"}])
+    repo.add_many(
+        [{**make_trade(i), "date": "2025-02-01", "direction": "long"} for i in (2, 3)]
+    )
+    repo.update(3, {"status": "closed", "net_pnl": -2.0, "closed_at": "2025-02-02"})
+
+    assert [t["id"] for t in repo.find(status="closed")] == [1, 3]
+    assert repo.get(1)["pair"] == "BTCUSDT"
+    assert repo.count() == 3 and repo.count("open") == 1
+    assert [t["id"] for t in repo.page(1, 5)] == [2, 3]
+    before, after = repo.closed_near(("2025-02-02", 0, 3), 5)
+    assert ([t["id"] for t in before], [t["id"] for t in after]) == ([1], [3])
+    assert repo.pnl_range() == (-2.0, 1.0)
+    assert store.loads == 0
+
+
+def test_repository_reloads_after_outside_write(tmp_path):
+    path = tmp_path / "trades.json"
+    repo = TradeRepository(JsonStore(str(path)))
+    repo.add(make_trade(1))
+
+    # Another process rewrites the file
+    path.write_text(json.dumps([make_trade(1), make_trade(2, "ETHUSDT")]))
+    os.utime(path, ns=(0, 0))
+
+    assert [t["pair"] for t in repo.load()] == ["BTCUSDT", "ETHUSDT"]
+
+
+def test_repository_ids_are_stable_and_never_reused(tmp_path):
+    path = str(tmp_path / "trades.json")
+    repo = TradeRepository(JsonStore(path))
+    for _ in range(3):
+        repo.add(stress_trade(repo.allocate_id()))
+
+    assert repo.delete(3)
+    assert repo.delete(1)
+    assert [t["id"] for t in repo.find(status="open")] == [2]
+
+    # A fresh repository picks up the persisted counter
+    fresh = TradeRepository(JsonStore(path))
+    assert fresh.allocate_id() == 4
+
+
+def test_trade_record_behaves_like_its_dict():
+    data = {"id": 7, "pair": "".join(["BTC", "USDT"]), "status": "open", "custom": 1}
+    trade = Trade(data)
+
+    assert trade == data
+    assert dict(trade) == data
+    assert list(trade) == ["id", "pair", "status", "custom"]
+    assert "notes" not in trade and trade.get("notes") is None
+    assert trade["pair"] is Trade({"pair": "BTCUSDT"})["pair"]  # interned
+
+    trade.update({"status": "closed", "net_pnl": 3.0})
+    assert trade.copy() == {**data, "status": "closed", "net_pnl": 3.0}
+
+
+def test_repository_query_uses_maintained_indexes(tmp_path):
+    repo = TradeRepository(JsonStore(str(tmp_path / "trades.json")))
+    days = ["2025-01-05", "2025-02-10", "2025-02-20", "2025-03-01"]
+    for i, (pair, day) in enumerate(
+        zip(["SOLUSDT", "SOLUSDT", "BTCUSDT", "SOLUSDT"], days), 1
+    ):
+        repo.add(
+            {**make_trade(i, pair), "direction": "short", "date": day, "notes": ""}
+        )
+    repo.update(2, {"status": "closed", "net_pnl": 12.5, "notes": "Breakout retest"})
+    repo.update(4, {"status": "closed", "net_pnl": -3.0, "notes": "late entry"})
+
+    assert repo.query() is None
+    assert repo.query(pair="SOLUSDT", start="2025-02-01", end="2025-03-01") == [2]
+    assert repo.query(status="closed", min_pnl=0) == [2]
+    assert repo.query(max_pnl=0) == [4]
+    assert repo.query(text="bre") == repo.query(text="RETEST break") == [2]
+
+    # Edits after the notes index exists keep it current
+    repo.update(2, {"notes": "fomo"})
+    repo.delete(4)
+    assert repo.query(text="bre") == []
+    assert repo.query(text="fomo", direction="short") == [2]
+    assert repo.query(status="closed") == [2]
+    assert [t["id"] for t in repo.find(pair="SOLUSDT")] == [1, 2]
+
+
+def test_repository_columns_follow_the_generation(tmp_path):
+    repo = TradeRepository(JsonStore(str(tmp_path / "trades.json")))
+    for i in range(1, 4):
+        repo.add(make_trade(i))
+    repo.update(3, {"status": "closed", "net_pnl": 5.0})
+
+    version = repo.version()
+    generation, columns = repo.columns(("id", "net_pnl"), status="closed")
+    assert (generation, columns) == (version, {"id": [3], "net_pnl": [5.0]})
+    assert repo.columns(("closed_at",))[1] == {"closed_at": [None] * 3}
+    assert repo.version() == version
+    repo.delete(1)
+    assert repo.version() > version
+
+
+def test_iter_json_array_across_chunk_boundaries(tmp_path):
+    trades = [make_trade(i, pair=f"PAIR{i}USDT") for i in range(1, 50)]
+    path = tmp_path / "trades.json"
+    path.write_text(json.dumps(trades, indent=4))
+
+    with open(path) as f:
+        assert list(iter_json_array(f, chunk_size=7)) == trades
+
+
+def test_json_store_iter_pushes_filters_down(tmp_path):
+    path = tmp_path / "trades.json"
+    trades = [make_trade(1), {**make_trade(2), "status": "closed"}, make_trade(3)]
+    path.write_text(json.dumps(trades))
+
+    assert [t["id"] for t in JsonStore(str(path)).iter(status="open")] == [1, 3]
+
+
+def test_json_store_refuses_corrupt_log(tmp_path):
+    path = tmp_path / "trades.json"
+    path.write_text('[{"id": 1, "pair": "BTC')
+
+    with pytest.raises(StorageError):
+        JsonStore(str(path)).load()
+    with pytest.raises(StorageError):
+        TradeRepository(JsonStore(str(path))).add(make_trade(2))
+    assert path.read_text() == '[{"id": 1, "pair": "BTC'
+
+
+def test_transaction_conflicts_on_unlocked_write(tmp_path):
+    path = tmp_path / "trades.json"
+    repo = TradeRepository(JsonStore(str(path)))
+    repo.add(make_trade(1))
+
+    with pytest.raises(ConflictError):
+        with repo.transaction():
+            repo.get(1)
+            # A writer that ignores the lock
+            path.write_text(json.dumps([make_trade(1), make_trade(2)]))
+            os.utime(path, ns=(0, 0))
+            repo.update(1, {"status": "closed"})
+
+    assert [t["status"] for t in repo.load()] == ["open", "open"]
+
+
+def test_transaction_writes_json_log_once(tmp_path, monkeypatch):
+    repo = TradeRepository(JsonStore(str(tmp_path / "trades.json")))
+    repo.add(make_trade(1))
+    saves = []
+    monkeypatch.setattr(repo.store, "save", lambda trades: saves.append(len(trades)))
+
+    with repo.transaction():
+        for trade_id in repo.allocate_ids(3):
+            repo.add(make_trade(trade_id))
+        repo.update(1, {"status": "closed"})
+        repo.write_meta("note", {"n": 1})
+        assert repo.read_meta("note") == {"n": 1}
+        assert not os.path.exists(repo.store.meta_path("note"))
+
+    assert saves == [4]
+    assert repo.store.read_meta("note") == {"n": 1}
+
+
+def test_transaction_writes_partitioned_hot_segment_once(tmp_path, monkeypatch):
+    path = str(tmp_path / "trades.json")
+    repo = TradeRepository(PartitionedStore(path))
+    repo.add({**make_trade(1), "date": "2025-03-01 09:00:00"})
+    writes = []
+    write_hot = repo.store._write_hot
+    monkeypatch.setattr(
+        repo.store, "_write_hot", lambda: writes.append(1) or write_hot()
+    )
+
+    with repo.transaction():
+        for trade_id in repo.allocate_ids(3):
+            repo.add({**make_trade(trade_id), "date": "2025-03-02 09:00:00"})
+        repo.update(1, {"notes": "hot edit"})
+        repo.delete(2)
+        assert writes == []
+
+    assert writes == [1]
+    assert [(t["id"], t.get("notes")) for t in PartitionedStore(path).load()] == [
+        (1, "hot edit"),
+        (3, None),
+        (4, None),
+    ]
+    repo.add({**make_trade(5), "date": "2025-03-03 09:00:00"})  # not stale
+    assert [t["id"] for t in repo.load()] == [1, 3, 4, 5]
+
+
+def test_other_threads_read_only_committed_meta(tmp_path):
+    repo = TradeRepository(JsonStore(str(tmp_path / "trades.json")))
+    repo.write_meta("note", {"n": 1})
+    seen = []
+
+    def read():
+        seen.append(repo.read_meta("note"))
+
+    with repo.transaction():
+        repo.write_meta("note", {"n": 2})
+        worker = threading.Thread(target=read)
+        worker.start()
+        worker.join()
+        read()
+    read()
+
+    assert seen == [{"n": 1}, {"n": 2}, {"n": 2}]
+
+
+def test_failed_transaction_leaves_json_log_untouched(tmp_path):
+    path = str(tmp_path / "trades.json")
+    repo = TradeRepository(JsonStore(path))
+    repo.add(make_trade(1))
+
+    with pytest.raises(RuntimeError):
+        with repo.transaction():
+            repo.add(make_trade(2))
+            repo.write_meta("note", {"n": 1})
+            raise RuntimeError("batch failed")
+
+    assert [t["id"] for t in repo.load()] == [1]
+    assert [t["id"] for t in JsonStore(path).load()] == [1]
+    assert repo.read_meta("note") is None
+
+
+def test_atomic_retries_after_conflict(monkeypatch):
+    calls = []
+
+    @storage.atomic
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConflictError("changed")
+        return "done"
+
+    monkeypatch.setattr(storage, "transaction", contextlib.nullcontext)
+    assert flaky() == "done"
+    assert len(calls) == 2
+
+
+STRESS_WORKERS = 4
+STRESS_ROUNDS = 25
+
+
+def stress_trade(trade_id):
+    return {**make_trade(trade_id), "date": "2025-01-01 00:00:00", "direction": "long"}
+
+
+def _hammer(store_cls, path):
+    repo = TradeRepository(store_cls(path))
+    for _ in range(STRESS_ROUNDS):
+        with repo.transaction():
+            repo.add(stress_trade(repo.allocate_id()))
+            counter = repo.get(1)
+            repo.update(1, {"net_pnl": counter["net_pnl"] + 1})
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl file locks")
+@pytest.mark.parametrize(
+    "store_cls", [JsonStore, JournalStore, SqliteStore, PartitionedStore]
+)
+def test_concurrent_writers_lose_no_updates(tmp_path, store_cls):
+    path = str(tmp_path / "trades.json")
+    repo = TradeRepository(store_cls(path))
+    repo.add({**stress_trade(repo.allocate_id()), "net_pnl": 0})
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [
+        ctx.Process(target=_hammer, args=(store_cls, path))
+        for _ in range(STRESS_WORKERS)
+    ]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    assert all(w.exitcode == 0 for w in workers)
+
+    trades = TradeRepository(store_cls(path)).load()
+    ids = [t["id"] for t in trades]
+    assert len(ids) == len(set(ids)) == 1 + STRESS_WORKERS * STRESS_ROUNDS
+    assert trades[0]["net_pnl"] == STRESS_WORKERS * STRESS_ROUNDS
+
+
+@pytest.mark.parametrize(
+    "store_cls", [JsonStore, JournalStore, SqliteStore, PartitionedStore]
+)
+def test_repository_bulk_add(tmp_path, store_cls):
+    path = str(tmp_path / "trades.json")
+    repo = TradeRepository(store_cls(path))
+    repo.add(stress_trade(repo.allocate_id()))
+    repo.add_many([stress_trade(i) for i in repo.allocate_ids(3)])
+
+    assert [t["id"] for t in TradeRepository(store_cls(path)).load()] == [1, 2, 3, 4]
+    assert repo.allocate_id() == 5
@@ -0,0 +1,193 @@
+# tests/test_storage_workers.py
+import asyncio
+import json
+import threading
+
+import pytest
+
+import storage
+from storage.json_store import JsonStore
+from storage.records import Trade
+
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    path = tmp_path / "trades.json"
+    monkeypatch.setattr(storage, "TRADE_LOG", str(path))
+    return path
+
+
+def _seed(count):
+    from core.trades import open_trade
+
+    return [
+        open_trade("BTCUSDT", "long", 1000, 1, 100 + i, 95 + i)["id"]
+        for i in range(count)
+    ]
+
+
+def test_json_store_loads_the_same_off_the_main_thread(tmp_path):
+    path = tmp_path / "trades.json"
+    trades = [{"id": i, "pair": "BTCUSDT", "notes": "a, [b]"} for i in range(50)]
+    path.write_text(json.dumps(trades, indent=4))
+    store = JsonStore(str(path))
+
+    loaded = []
+    worker = threading.Thread(target=lambda: loaded.append(store.load()))
+    worker.start()
+    worker.join()
+
+    assert loaded == [trades] == [store.load()]
+    assert {type(t) for t in loaded[0] + store.load()} == {Trade}
+
+
+def test_history_loads_in_background_and_applies_writes_in_order(log):
+    from core.trades import close_trade, delete_trade
+    from screens.view_history_screen import ViewHistoryScreen
+    from tui import CryptoHelperApp
+
+    ids = _seed(3)
+
+    async def run():
+        app = CryptoHelperApp()
+        async with app.run_test() as pilot:
+            screen = ViewHistoryScreen()
+            await app.push_screen(screen)
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            shown = [t["id"] for t in screen.trades]
+
+            # Queued back to back: the delete runs after the close
+            screen.run_write(close_trade, ids[0], 110.0, "")
+            screen.run_write(delete_trade, ids[0])
+            screen.run_write(close_trade, ids[1], 90.0, "")
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            return shown, screen.trades, screen.total
+
+    shown, rows, total = asyncio.run(run())
+
+    assert shown == ids
+    assert [t["id"] for t in rows] == ids[1:] and total == 2
+    assert rows[0]["status"] == "closed"
+    assert storage.get_trade(ids[0]) is None
+
+
+def test_changes_reach_the_screen_once_and_only_after_commit(log):
+    from core.trades import close_trade, delete_trade, open_trade
+    from screens.view_history_screen import ViewHistoryScreen
+    from storage.base import ConflictError
+    from tui import CryptoHelperApp
+
+    ids = _seed(3)
+    attempts = []
+
+    @storage.atomic
+    def open_after_a_conflict():
+        trade = open_trade("ETHUSDT", "short", 1000, 1, 50, 55)
+        attempts.append(trade["id"])
+        if len(attempts) == 1:
+            raise ConflictError("simulated")  # retried by storage.atomic
+        return trade
+
+    @storage.atomic
+    def close_then_fail():
+        close_trade(ids[2], 120.0)
+        raise ValueError("rolled back")
+
+    async def run():
+        app = CryptoHelperApp()
+        async with app.run_test() as pilot:
+            screen = ViewHistoryScreen()
+            await app.push_screen(screen)
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            changes = []
+            apply_change = screen.apply_change
+            screen.apply_change = lambda change, trades: (
+                changes.append(change),
+                apply_change(change, trades),
+            )
+
+            screen.run_write(open_after_a_conflict)
+            screen.run_write(close_trade, ids[0], 110.0, "")
+            screen.run_write(delete_trade, ids[1])
+            screen.run_write(close_then_fail)
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            return changes, screen.trades, screen.total
+
+    changes, rows, total = asyncio.run(run())
+
+    added = attempts[-1]
+    assert len(attempts) == 2
+    assert [(c.added, c.updated, c.removed) for c in changes] == [
+        ([added], [], []),
+        ([], [ids[0]], []),
+        ([], [], [ids[1]]),
+    ]
+    assert [t["id"] for t in rows] == [ids[0], ids[2], added] and total == 3
+    assert [t["status"] for t in rows] == ["closed", "open", "open"]
+
+
+def test_removing_a_trade_before_the_window_shifts_it(log, monkeypatch):
+    from core.trades import delete_trade
+    from screens import view_history_screen
+    from screens.view_history_screen import ViewHistoryScreen
+    from tui import CryptoHelperApp
+
+    monkeypatch.setattr(view_history_screen, "PAGE_SIZE", 2)
+    ids = _seed(10)
+
+    async def run():
+        app = CryptoHelperApp()
+        async with app.run_test() as pilot:
+            screen = ViewHistoryScreen()
+            await app.push_screen(screen)
+            await app.workers.wait_for_complete()
+            screen._jump_to(8)
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            before = screen.window_start, [t["id"] for t in screen.trades]
+
+            delete_trade(ids[0])
+            await app.workers.wait_for_complete()
+            await pilot.pause()
+            return before, screen.window_start, [t["id"] for t in screen.trades]
+
+    before, start, shown = asyncio.run(run())
+
+    assert before == (4, ids[4:])
+    assert (start, shown) == (3, ids[4:])
+    assert storage.page_trades(start, len(shown)) == storage.get_trades(shown)
+
+
+def test_leaving_the_screen_cancels_its_reads(log):
+    from screens.close_trade_screen import CloseTradeScreen
+    from tui import CryptoHelperApp
+
+    _seed(1)
+    started, release = threading.Event(), threading.Event()
+    shown = []
+
+    def slow_read():
+        started.set()
+        release.wait(5)
+        return []
+
+    async def run():
+        app = CryptoHelperApp()
+        async with app.run_test() as pilot:
+            screen = CloseTradeScreen()
+            await app.push_screen(screen)
+            await app.workers.wait_for_complete()
+            worker = screen.run_read(slow_read, done=shown.append)
+            await asyncio.to_thread(started.wait, 5)
+            app.pop_screen()
+            await pilot.pause()
+            release.set()
+            await pilot.pause()
+            return worker.is_cancelled
+
+    assert asyncio.run(run())
+    assert shown == []
@@ -0,0 +1,121 @@
+# tests/test_tch.py
+import io
+import json
+
+import pytest
+
+import storage
+import tch
+from storage.json_store import JsonStore
+
+
+@pytest.fixture
+def trade_log(tmp_path, monkeypatch):
+    path = str(tmp_path / "trades.json")
+    monkeypatch.setattr(storage, "TRADE_LOG", path)
+    return path
+
+
+def run(capsys, *argv):
+    status = tch.main(list(argv))
+    lines = capsys.readouterr().out.splitlines()
+    return status, [json.loads(line) for line in lines]
+
+
+SIZING = ["--account-size", "1000", "--risk-pct", "1", "--entry", "100"]
+
+
+def test_commands_print_json(trade_log, capsys):
+    status, [sized] = run(capsys, "size", *SIZING, "--stop-loss", "95")
+    assert status == 0
+    assert sized["quantity"] == 2.0
+
+    _, [opened] = run(
+        capsys,
+        "open",
+        "--pair",
+        "btcusdt",
+        "--direction",
+        "long",
+        *SIZING,
+        "--stop-loss",
+        "95",
+    )
+    assert opened["pair"] == "BTCUSDT"
+    assert opened["status"] == "open"
+
+    _, [closed] = run(capsys, "close", str(opened["id"]), "--exit-price", "110")
+    assert closed["net_pnl"] < closed["gross_pnl"] == 20.0
+
+    status, [error] = run(capsys, "close", "99", "--exit-price", "1")
+    assert status == 1
+    assert "99" in error["error"]
+
+    _, listed = run(capsys, "list", "--status", "closed")
+    assert [t["id"] for t in listed] == [opened["id"]]
+    _, [stats] = run(capsys, "stats")
+    assert stats["closed"] == 1
+    assert stats["win_rate"] == 100.0
+
+
+def test_batch_is_one_write_with_per_line_results(trade_log, capsys, monkeypatch):
+    ops = [
+        {
+            "op": "open",
+            "pair": "ETHUSDT",
+            "direction": "short",
+            "account_size": 500,
+            "risk_pct": 2,
+            "entry": 2000,
+            "stop_loss": 2100,
+        }
+        for _ in range(50)
+    ]
+    ops += [{"op": "close", "trade_id": i, "exit_price": 1900} for i in range(1, 51)]
+    ops += [{"op": "delete", "trade_id": 7}, {"op": "delete", "trade_id": 7}]
+    batch = "\n".join(json.dumps(op) for op in ops) + "\nnot json\n"
+    monkeypatch.setattr("sys.stdin", io.StringIO(batch))
+
+    saves = []
+    save = JsonStore.save
+    monkeypatch.setattr(
+        JsonStore, "save", lambda self, trades: saves.append(1) or save(self, trades)
+    )
+    status, results = run(capsys, "batch")
+
+    assert status == 1  # the repeated delete and the bad line failed
+    assert len(results) == len(ops) + 1
+    assert all(r["ok"] for r in results[:-2])
+    assert not results[-2]["ok"] and not results[-1]["ok"]
+    assert saves == [1]
+    assert storage.count_trades(status="closed") == 49
+    assert storage.read_meta("stats")["closed"] == 49
+
+
+def test_batch_reports_badly_typed_lines_and_goes_on(trade_log):
+    opened = {
+        "op": "open",
+        "pair": "BTCUSDT",
+        "direction": "long",
+        "account_size": 1000,
+        "risk_pct": 1,
+        "entry": 100,
+        "stop_loss": 95,
+    }
+    ops = [
+        opened,
+        {**opened, "pair": 5},
+        {**opened, "entry": None},
+        {**opened, "stop_loss": [95]},
+        {"op": "close", "trade_id": {"id": 1}, "exit_price": 110},
+        {"op": "close", "trade_id": 1, "exit_price": 110, "notes": 3},
+        {"op": "list", "start": 2025},
+        {"op": "close", "trade_id": 1, "exit_price": 110},
+    ]
+
+    results = tch.run_batch([json.dumps(op) for op in ops])
+
+    assert [r["ok"] for r in results] == [True] + [False] * 6 + [True]
+    assert "pair must be a string" in results[1]["error"]
+    assert storage.count_trades() == 1
+    assert storage.get_trade(1)["status"] == "closed"
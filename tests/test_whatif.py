@@ -0,0 +1,30 @@
+# tests/test_whatif.py
+import pytest
+
+from core.calculator import calculate_quantity
+from core.whatif import RISK_STEPS, STOP_STEPS, cache_info, whatif_grid
+
+
+def test_grid_matches_calculate_quantity_per_cell():
+    grid = whatif_grid(1000.0, 25000.0, "short")
+
+    assert grid["quantity"].shape == (len(RISK_STEPS), len(STOP_STEPS))
+    for i, risk in enumerate(RISK_STEPS):
+        for j in range(len(STOP_STEPS)):
+            stop = float(grid["stop_loss"][i, j])
+            assert stop > 25000.0  # short stops sit above the entry
+            expected = calculate_quantity(1000.0, risk, 25000.0, stop)
+            assert grid["quantity"][i, j] == expected["quantity"]
+            assert grid["required_leverage"][i, j] == expected["required_leverage"]
+
+
+def test_grid_is_memoized_on_rounded_inputs():
+    first = whatif_grid(1234.5, 3100.0)
+    hits = cache_info().hits
+
+    again = whatif_grid(1234.5000000001, 3100.0)
+
+    assert again is first
+    assert cache_info().hits == hits + 1
+    with pytest.raises(ValueError):
+        first["quantity"][0, 0] = 0  # cached arrays are shared, so read-only
@@ -1,25 +1,44 @@
+import os
+
 from textual import events
 from textual.app import App, ComposeResult
+from textual.binding import Binding
+from textual.message import Message
 from textual.widgets import Footer, Header, Label, ListItem, ListView, Static
 
-from screens import CloseTradeScreen, OpenTradeScreen, ViewHistoryScreen
+import screens
+from core import perf, price_feed, stops
+
+
+class StopsTriggered(Message):
+    """Stop losses crossed by the price feed (posted from the feed thread)."""
+
+    def __init__(self, triggers: list):
+        super().__init__()
+        self.triggers = triggers
 
 
 class CryptoHelperApp(App):
     CSS_PATH = None
 
+    # Hidden: timing registry of storage, trade and screen operations
+    BINDINGS = [Binding("f12", "show_perf", "Performance", show=False)]
+
     MENU_ITEMS = [
         "Open Trade",
         "Close Trade",
         "View History",
+        "PnL Rollups",
         "Exit",
     ]
 
+    # Screens by name: each module is imported the first time it is selected
     MENU_MAP = {
-        0: OpenTradeScreen,
-        1: CloseTradeScreen,
-        2: ViewHistoryScreen,
-        3: exit,
+        0: "OpenTradeScreen",
+        1: "CloseTradeScreen",
+        2: "ViewHistoryScreen",
+        3: "RollupScreen",
+        4: "exit",
     }
 
     def compose(self) -> ComposeResult:
@@ -33,16 +52,60 @@ class CryptoHelperApp(App):
         self.menu = ListView(*[ListItem(Label(item)) for item in self.MENU_ITEMS])
         yield self.menu
 
+    def on_mount(self) -> None:
+        # Live unrealized PnL, if TCH_PRICE_FEED names a source
+        feed = price_feed.start_from_env()
+        if feed is not None:
+            # TCH_STOP_ACTION=close closes trades at their stop; default alerts
+            self.stop_action = os.environ.get("TCH_STOP_ACTION", "alert")
+            if self.stop_action not in stops.ACTIONS:
+                raise ValueError(f"Unknown stop action: {self.stop_action!r}")
+            stops.start(feed, lambda hits: self.post_message(StopsTriggered(hits)))
+
+    def on_unmount(self) -> None:
+        stops.stop()
+        price_feed.stop()
+
+    def action_show_perf(self) -> None:
+        if not isinstance(self.screen, screens.PerfScreen):
+            self.push_screen(screens.PerfScreen())
+
+    def on_stops_triggered(self, message: StopsTriggered) -> None:
+        """Alert on (or close) trades whose stop loss was hit."""
+        for hit in message.triggers:
+            text = (
+                f"🛑 Stop hit: trade {hit.trade_id} {hit.pair}"
+                f" {hit.direction.upper()} @ {hit.stop} (last {hit.price})"
+            )
+            if self.stop_action == "close":
+                self.run_worker(self._close_at_stop(hit, text), group="storage-write")
+            else:
+                self._alert(text)
+
+    async def _close_at_stop(self, hit, text: str) -> None:
+        # Queued behind the screens' writes on the storage writer thread
+        from screens.storage_workers import submit_write
+
+        if await submit_write(stops.close_at_stop, hit):
+            text += " - closed"
+        self._alert(text)
+
+    def _alert(self, text: str) -> None:
+        self.screen.mount(
+            screens.PopupMessage(text, style="bold white on red", auto_close=5)
+        )
+
     def on_list_view_selected(self, event: ListView.Selected) -> None:
         """Handle arrow-key selection + Enter"""
-        index = self.menu.index
-        if index is None:
-            return
+        if self.menu.index is not None:
+            self.open_menu_item(self.menu.index)
+
+    def open_menu_item(self, index: int) -> None:
         choice = self.MENU_MAP.get(index)
         if choice == "exit":
             self.exit()
         elif choice:
-            self.push_screen(choice())
+            self.push_screen(getattr(screens, choice)())
 
     def on_key(self, event: events.Key) -> None:
         """Handle number keys and quit shortcut."""
@@ -53,23 +116,12 @@ class CryptoHelperApp(App):
             while len(self.screen_stack) > 1:
                 self.pop_screen()
         elif event.key in [str(i + 1) for i in range(len(self.MENU_ITEMS))]:
-            self.handle_menu_choice(
-                f"[{event.key}] {self.MENU_ITEMS[int(event.key) - 1]}"
-            )
-
-    def handle_menu_choice(self, choice: str) -> None:
-        """Run the logic for each menu option."""
-        screen_maps = {
-            "[1] Open Trade": OpenTradeScreen,
-            "[2] Close Trade": CloseTradeScreen,
-            "[3] View History": ViewHistoryScreen,  #
-            "exit": self.exit,
-        }
-        if choice in screen_maps:
-            screen_maps[choice]()
+            if len(self.screen_stack) == 1:  # number keys only act on the menu
+                self.open_menu_item(int(event.key) - 1)
 
 
 if __name__ == "__main__":
-
+    # TCH_PROFILE / TCH_PERF_DUMP: cProfile the session / dump timings on exit
+    perf.configure_from_env()
     app = CryptoHelperApp()
     app.run()